@@ -8,10 +8,82 @@ from .models import (
     Reservation,
     Ticket,
 )
+from .pagination import EstimatedCountPaginator
 
-admin.site.register(AstronomyShow)
-admin.site.register(ShowTheme)
-admin.site.register(ShowSession)
-admin.site.register(PlanetariumDome)
-admin.site.register(Reservation)
-admin.site.register(Ticket)
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables with millions of rows.
+
+    Totals come from planner estimates and the "x of y" count of an
+    unfiltered changelist is skipped, so no page runs a full COUNT(*).
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(AstronomyShow)
+class AstronomyShowAdmin(admin.ModelAdmin):
+    list_display = ("title", "duration")
+    search_fields = ("title",)
+    filter_horizontal = ("theme",)
+
+
+@admin.register(ShowTheme)
+class ShowThemeAdmin(admin.ModelAdmin):
+    search_fields = ("name",)
+
+
+@admin.register(PlanetariumDome)
+class PlanetariumDomeAdmin(admin.ModelAdmin):
+    list_display = ("name", "rows", "seats_in_row")
+    search_fields = ("name",)
+
+
+@admin.register(ShowSession)
+class ShowSessionAdmin(LargeTableAdmin):
+    list_display = ("astronomy_show", "planetarium_dome", "show_time")
+    list_select_related = ("astronomy_show", "planetarium_dome")
+    list_filter = (
+        ("show_time", admin.DateFieldListFilter),
+        "planetarium_dome",
+    )
+    search_fields = ("astronomy_show__title",)
+    autocomplete_fields = ("astronomy_show", "planetarium_dome")
+
+    def get_search_results(self, request, queryset, search_term):
+        # Autocomplete widgets render every result as "<title> <time>".
+        queryset, may_have_duplicates = super().get_search_results(
+            request, queryset, search_term
+        )
+        return queryset.select_related("astronomy_show"), may_have_duplicates
+
+
+class TicketInline(admin.TabularInline):
+    model = Ticket
+    extra = 0
+    autocomplete_fields = ("show_session",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            "show_session__astronomy_show"
+        )
+
+
+@admin.register(Reservation)
+class ReservationAdmin(LargeTableAdmin):
+    list_display = ("id", "user", "created_at")
+    list_select_related = ("user",)
+    list_filter = (("created_at", admin.DateFieldListFilter),)
+    search_fields = ("=id", "=user__email")
+    raw_id_fields = ("user",)
+    inlines = (TicketInline,)
+
+
+@admin.register(Ticket)
+class TicketAdmin(LargeTableAdmin):
+    list_display = ("id", "show_session", "row", "seat", "reservation")
+    list_select_related = ("show_session__astronomy_show", "reservation")
+    search_fields = ("=reservation__id",)
+    autocomplete_fields = ("show_session",)
+    raw_id_fields = ("reservation",)
@@ -0,0 +1,319 @@
+import math
+import time
+import uuid
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import Throttled
+from rest_framework.response import Response
+
+from planetarium.metrics import count_rejection
+from planetarium.store import get_store
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS admission_lease (
+    token TEXT PRIMARY KEY,
+    room TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS admission_lease_room
+    ON admission_lease (room, expires);
+CREATE TABLE IF NOT EXISTS admission_queue (
+    token TEXT PRIMARY KEY,
+    room TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS admission_queue_room
+    ON admission_queue (room, seq);
+CREATE TABLE IF NOT EXISTS admission_stats (
+    room TEXT PRIMARY KEY,
+    service_time REAL NOT NULL
+);
+"""
+
+HEADER = "X-Queue-Token"
+DEFAULT_SERVICE_TIME = 0.5
+SERVICE_TIME_WEIGHT = 0.2
+MAX_POLL_INTERVAL = 5
+
+
+class Queued(Exception):
+    def __init__(self, token, position, wait):
+        self.token = token
+        self.position = position
+        self.wait = wait
+
+
+class WaitingRoom:
+    """Admission control for one show session, shared by all workers.
+
+    At most ``capacity`` requests run at once. Clients arriving while it
+    is full get a queue token and are admitted in arrival order when they
+    come back with it; tokens that are not polled again within
+    ``token_ttl`` seconds drop out, and once ``queue_limit`` clients are
+    waiting new arrivals are turned away.
+    """
+
+    def __init__(self, name, capacity, queue_limit, lease, token_ttl):
+        self.name = name
+        self.capacity = capacity
+        self.queue_limit = queue_limit
+        self.lease = lease
+        self.token_ttl = token_ttl
+
+    @classmethod
+    def for_session(cls, session_id):
+        return cls(
+            f"show_session:{session_id}",
+            capacity=settings.ADMISSION_SESSION_CONCURRENCY,
+            queue_limit=settings.ADMISSION_QUEUE_LIMIT,
+            lease=settings.ADMISSION_LEASE,
+            token_ttl=settings.ADMISSION_TOKEN_TTL,
+        )
+
+    def estimated_wait(self, connection, position):
+        row = connection.execute(
+            "SELECT service_time FROM admission_stats WHERE room = ?",
+            (self.name,),
+        ).fetchone()
+        service_time = row[0] if row else DEFAULT_SERVICE_TIME
+        return math.ceil(position * service_time / max(self.capacity, 1))
+
+    def enter(self, token=None):
+        """Return a lease token if the request may run now.
+
+        Otherwise raise ``Queued`` with the client's place in the queue,
+        or ``Throttled`` if the queue is full. An admitted client keeps
+        its place until ``forget`` is called, so it can come back with
+        the same token if it has to wait elsewhere.
+        """
+        store = get_store()
+        store.ensure_schema("admission", SCHEMA)
+        now = time.time()
+        with store.transaction() as connection:
+            for table in ("admission_lease", "admission_queue"):
+                connection.execute(
+                    f"DELETE FROM {table} WHERE room = ? AND expires < ?",
+                    (self.name, now),
+                )
+            (running,) = connection.execute(
+                "SELECT COUNT(*) FROM admission_lease WHERE room = ?",
+                (self.name,),
+            ).fetchone()
+            (waiting,) = connection.execute(
+                "SELECT COUNT(*) FROM admission_queue WHERE room = ?",
+                (self.name,),
+            ).fetchone()
+
+            row = None
+            if token:
+                row = connection.execute(
+                    "SELECT seq FROM admission_queue "
+                    "WHERE token = ? AND room = ?",
+                    (token, self.name),
+                ).fetchone()
+            if row is None:
+                position = waiting
+            else:
+                (position,) = connection.execute(
+                    "SELECT COUNT(*) FROM admission_queue "
+                    "WHERE room = ? AND seq < ?",
+                    (self.name, row[0]),
+                ).fetchone()
+                connection.execute(
+                    "UPDATE admission_queue SET expires = ? WHERE token = ?",
+                    (now + self.token_ttl, token),
+                )
+
+            if self.capacity - running > position:
+                lease = uuid.uuid4().hex
+                connection.execute(
+                    "INSERT INTO admission_lease (token, room, expires) "
+                    "VALUES (?, ?, ?)",
+                    (lease, self.name, now + self.lease),
+                )
+                return lease
+
+            if row is None:
+                if waiting >= self.queue_limit:
+                    raise Throttled(
+                        wait=self.estimated_wait(connection, waiting) or 1,
+                        detail="The queue for this show session is full.",
+                    )
+                token = uuid.uuid4().hex
+                connection.execute(
+                    "INSERT INTO admission_queue (token, room, seq, expires) "
+                    "SELECT ?, ?, COALESCE(MAX(seq), 0) + 1, ? "
+                    "FROM admission_queue WHERE room = ?",
+                    (token, self.name, now + self.token_ttl, self.name),
+                )
+            wait = self.estimated_wait(connection, position + 1)
+        raise Queued(token, position + 1, wait)
+
+    def forget(self, token):
+        """Give up the place in the queue held by ``token``."""
+        store = get_store()
+        store.ensure_schema("admission", SCHEMA)
+        with store.transaction() as connection:
+            connection.execute(
+                "DELETE FROM admission_queue WHERE token = ? AND room = ?",
+                (token, self.name),
+            )
+
+    def leave(self, lease, elapsed=None):
+        """Free a lease and fold its run time into the wait estimate."""
+        store = get_store()
+        store.ensure_schema("admission", SCHEMA)
+        with store.transaction() as connection:
+            connection.execute(
+                "DELETE FROM admission_lease WHERE token = ?", (lease,)
+            )
+            if elapsed is None:
+                return
+            connection.execute(
+                "INSERT INTO admission_stats (room, service_time) "
+                "VALUES (?, ?) ON CONFLICT (room) DO UPDATE SET "
+                "service_time = service_time * ? + excluded.service_time * ?",
+                (
+                    self.name,
+                    elapsed,
+                    1 - SERVICE_TIME_WEIGHT,
+                    SERVICE_TIME_WEIGHT,
+                ),
+            )
+
+
+def parse_tokens(value):
+    """Map show session ids to the queue tokens sent in ``X-Queue-Token``.
+
+    The header holds one ``<session id>:<token>`` pair per waiting room
+    the client is queued in, separated by commas.
+    """
+    tokens = {}
+    for pair in (value or "").split(","):
+        session_id, _, token = pair.strip().partition(":")
+        if session_id.isdigit() and token:
+            tokens[int(session_id)] = token
+    return tokens
+
+
+def format_tokens(tokens):
+    return ",".join(
+        f"{session_id}:{token}" for session_id, token in sorted(tokens.items())
+    )
+
+
+def requested_session_ids(data):
+    """Collect the show session ids of the tickets in a booking payload."""
+    if isinstance(data, list):
+        return set().union(*map(requested_session_ids, data))
+    if not isinstance(data, dict):
+        return set()
+    ids = set()
+    for name, value in data.items():
+        if name == "show_session":
+            try:
+                ids.add(int(value))
+            except (TypeError, ValueError):
+                pass
+        else:
+            ids |= requested_session_ids(value)
+    return ids
+
+
+class AdmissionControlMixin:
+    """Pass bookings through the waiting room of every session they touch.
+
+    Only ``admission_actions`` are gated, so browsing the catalogue is
+    never queued behind an on-sale rush. Queued clients get 202 with a
+    queue token to send back in ``X-Queue-Token`` and ``Retry-After``
+    saying when to poll. The token holds the client's place in each
+    room separately, so a booking spanning several sessions keeps its
+    turn in all of them: it runs only once every room admits it, and
+    until then a room that already did keeps its place.
+
+    Throttles are only checked once a request is admitted: polling the
+    queue is free, and a waiting client is never throttled out of its
+    place.
+    """
+
+    admission_actions = ()
+
+    def initial(self, request, *args, **kwargs):
+        self.admission_leases = []
+        self.admission_pending = self.action in self.admission_actions
+        super().initial(request, *args, **kwargs)
+        if not self.admission_pending:
+            return
+        tokens = parse_tokens(request.headers.get(HEADER))
+        session_ids = sorted(requested_session_ids(request.data))
+        try:
+            for session_id in session_ids:
+                room = WaitingRoom.for_session(session_id)
+                try:
+                    lease = room.enter(tokens.get(session_id))
+                except Queued as queued:
+                    tokens[session_id] = queued.token
+                    queued.token = format_tokens({
+                        requested: tokens[requested]
+                        for requested in session_ids
+                        if requested in tokens
+                    })
+                    raise
+                self.admission_leases.append((room, lease))
+        except Throttled:
+            count_rejection(self, "waiting_room")
+            self.release_admission()
+            raise
+        except Exception:
+            self.release_admission()
+            raise
+        for session_id in session_ids:
+            if session_id in tokens:
+                WaitingRoom.for_session(session_id).forget(
+                    tokens[session_id]
+                )
+        self.admission_started = time.monotonic()
+        self.admission_pending = False
+        self.check_throttles(request)
+
+    def check_throttles(self, request):
+        if getattr(self, "admission_pending", False):
+            return
+        super().check_throttles(request)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, Queued):
+            return Response(
+                {
+                    "detail": "Many people are booking this show session; "
+                              "you are in the queue.",
+                    "queue_token": exc.token,
+                    "position": exc.position,
+                    "estimated_wait": exc.wait,
+                },
+                status=status.HTTP_202_ACCEPTED,
+                headers={
+                    "Retry-After": str(
+                        min(max(exc.wait, 1), MAX_POLL_INTERVAL)
+                    )
+                },
+            )
+        try:
+            return super().handle_exception(exc)
+        except Exception:
+            self.release_admission()
+            raise
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if getattr(self, "admission_leases", None):
+            self.release_admission(
+                time.monotonic() - self.admission_started
+            )
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def release_admission(self, elapsed=None):
+        for room, lease in getattr(self, "admission_leases", []):
+            room.leave(lease, elapsed)
+        self.admission_leases = []
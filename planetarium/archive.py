@@ -0,0 +1,190 @@
+import gzip
+import json
+import os
+import re
+from datetime import date
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from planetarium.models import Reservation, ShowSession, Ticket
+
+FILE_NAME = re.compile(
+    r"^sessions-(?P<first>\d{8})-(?P<last>\d{8})-(?P<id>\d+)\.jsonl\.gz$"
+)
+
+
+def session_record(session, tickets, reservations):
+    """One archived session, its tickets and reservations as columns."""
+    return {
+        "id": session.id,
+        "show_time": session.show_time,
+        "end_time": session.end_time,
+        "astronomy_show": {
+            "id": session.astronomy_show_id,
+            "title": session.astronomy_show.title,
+        },
+        "planetarium_dome": {
+            "id": session.planetarium_dome_id,
+            "name": session.planetarium_dome.name,
+            "rows": session.planetarium_dome.rows,
+            "seats_in_row": session.planetarium_dome.seats_in_row,
+        },
+        "tickets": {
+            "id": [ticket[0] for ticket in tickets],
+            "row": [ticket[1] for ticket in tickets],
+            "seat": [ticket[2] for ticket in tickets],
+            "reservation": [ticket[3] for ticket in tickets],
+        },
+        "reservations": {
+            "id": [reservation[0] for reservation in reservations],
+            "user": [reservation[1] for reservation in reservations],
+            "created_at": [reservation[2] for reservation in reservations],
+        },
+    }
+
+
+def write_chunk(directory, records):
+    """Write records to a gzip JSON Lines file named after their dates."""
+    os.makedirs(directory, exist_ok=True)
+    first = min(record["show_time"] for record in records)
+    last = max(record["show_time"] for record in records)
+    name = (
+        f"sessions-{first:%Y%m%d}-{last:%Y%m%d}-{records[0]['id']}.jsonl.gz"
+    )
+    temporary = os.path.join(directory, f".{name}.tmp")
+    with gzip.open(temporary, "wt", encoding="utf-8") as output:
+        for record in records:
+            output.write(json.dumps(record, cls=DjangoJSONEncoder) + "\n")
+    with open(temporary, "rb") as written:
+        os.fsync(written.fileno())
+    os.replace(temporary, os.path.join(directory, name))
+    # The rename is only durable once the directory entry is synced.
+    descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+    return name
+
+
+def archive_batch(before, directory, batch_size):
+    """Move up to ``batch_size`` sessions that ended before ``before``.
+
+    Returns ``(file name, sessions, tickets)``, or ``None`` when nothing
+    is left to archive. The file is complete on disk before the rows are
+    deleted in the same transaction, and is removed if that transaction
+    fails.
+    """
+    name = None
+    try:
+        with transaction.atomic():
+            sessions = list(
+                ShowSession.objects.filter(end_time__lt=before)
+                .select_related("astronomy_show", "planetarium_dome")
+                .select_for_update(of=("self",), skip_locked=True)
+                .order_by("id")[:batch_size]
+            )
+            if not sessions:
+                return None
+            session_ids = [session.id for session in sessions]
+            tickets = {}
+            for ticket in Ticket.objects.filter(
+                show_session_id__in=session_ids,
+                show_time__in={session.show_time for session in sessions},
+            ).order_by("id").values_list(
+                "show_session_id", "id", "row", "seat", "reservation_id"
+            ):
+                tickets.setdefault(ticket[0], []).append(ticket[1:])
+            reservation_ids = {
+                ticket[3] for rows in tickets.values() for ticket in rows
+            }
+            reservations = {
+                reservation[0]: reservation
+                for reservation in Reservation.objects.filter(
+                    id__in=reservation_ids
+                ).values_list("id", "user_id", "created_at")
+            }
+
+            records = []
+            for session in sessions:
+                session_tickets = tickets.get(session.id, [])
+                records.append(session_record(
+                    session,
+                    session_tickets,
+                    [
+                        reservations[reservation_id]
+                        for reservation_id in sorted(
+                            {ticket[3] for ticket in session_tickets}
+                        )
+                    ],
+                ))
+            name = write_chunk(directory, records)
+
+            # Raw deletes skip loading every ticket for the seat map signals;
+            # past sessions are never shown again.
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {Ticket._meta.db_table} "
+                    f"WHERE show_session_id = ANY(%s)",
+                    [session_ids],
+                )
+                ticket_count = cursor.rowcount
+            ShowSession.objects.filter(id__in=session_ids).delete()
+            # Reservations with tickets for later sessions stay.
+            Reservation.objects.filter(
+                id__in=reservation_ids, tickets__isnull=True
+            ).delete()
+    except BaseException:
+        # The rows are still there; don't archive them twice.
+        if name is not None:
+            os.remove(os.path.join(directory, name))
+        raise
+    return name, len(sessions), ticket_count
+
+
+def archive_sessions(before, directory=None, batch_size=500):
+    """Archive every session that ended before ``before``, in batches."""
+    directory = directory or str(settings.ARCHIVE_DIR)
+    while True:
+        result = archive_batch(before, directory, batch_size)
+        if result is None:
+            return
+        yield result
+
+
+def archived_sessions(date_from=None, date_to=None, show_id=None,
+                      directory=None):
+    """Yield archived session records as JSON lines, oldest file first.
+
+    Only files whose date range overlaps ``date_from``-``date_to`` are
+    opened; a file is read one line at a time. Records are not
+    deduplicated: if the archiver dies between writing a file and
+    committing, a later run archives those sessions again and they are
+    yielded twice.
+    """
+    directory = directory or str(settings.ARCHIVE_DIR)
+    try:
+        names = sorted(os.listdir(directory))
+    except FileNotFoundError:
+        return
+    for name in names:
+        match = FILE_NAME.match(name)
+        if match is None:
+            continue
+        first = date.fromisoformat(match["first"])
+        last = date.fromisoformat(match["last"])
+        if (date_from and last < date_from) or (date_to and first > date_to):
+            continue
+        with gzip.open(os.path.join(directory, name), "rt") as lines:
+            for line in lines:
+                record = json.loads(line)
+                show_date = date.fromisoformat(record["show_time"][:10])
+                if date_from and show_date < date_from:
+                    continue
+                if date_to and show_date > date_to:
+                    continue
+                if show_id and record["astronomy_show"]["id"] != show_id:
+                    continue
+                yield line
@@ -0,0 +1,162 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from planetarium.middleware import MetricsMiddleware
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "/api/"
+# What a batched request keeps of the batch's META. Conditional and
+# encoding headers are dropped: items must come back as full, plain
+# bodies that can be embedded in the batch's JSON.
+FORWARDED_META = (
+    "HTTP_ACCEPT",
+    "HTTP_ACCEPT_LANGUAGE",
+    "HTTP_AUTHORIZATION",
+    "HTTP_HOST",
+    "HTTP_X_FORWARDED_FOR",
+    "HTTP_X_FORWARDED_HOST",
+    "HTTP_X_FORWARDED_PROTO",
+    "REMOTE_ADDR",
+    "SERVER_NAME",
+    "SERVER_PORT",
+    "SERVER_PROTOCOL",
+)
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    requests = serializers.ListField(
+        child=serializers.CharField(),
+        allow_empty=False,
+        help_text="Paths of GET requests with their query strings, "
+                  "e.g. /api/planetarium/show_sessions/?date=2024-06-01. "
+                  "They skip the middleware, so the slow-query log and "
+                  "traffic capture only see the batch.",
+    )
+    concurrent = serializers.BooleanField(
+        default=False,
+        help_text="Run the requests in parallel threads, each with its "
+                  "own database connection.",
+    )
+
+    def validate_requests(self, value):
+        if len(value) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(
+                f"At most {settings.BATCH_MAX_REQUESTS} requests can be "
+                f"batched."
+            )
+        return value
+
+
+class BatchItemSerializer(serializers.Serializer):
+    path = serializers.CharField()
+    status = serializers.IntegerField()
+    body = serializers.JSONField(allow_null=True)
+
+
+class BatchResponseSerializer(serializers.Serializer):
+    responses = BatchItemSerializer(many=True)
+
+
+def item(path, status, body):
+    return {"path": path, "status": status, "body": body}
+
+
+def sub_request(request, path, query):
+    """A GET request for ``path`` made as the user of ``request``.
+
+    DRF views take the batch's user and token as they are, so the JWT
+    is only decoded once.
+    """
+    sub = HttpRequest()
+    sub.method = "GET"
+    sub.path = sub.path_info = path
+    sub.META = {
+        key: request.META[key]
+        for key in FORWARDED_META if key in request.META
+    }
+    sub.META.update(
+        REQUEST_METHOD="GET", PATH_INFO=path, QUERY_STRING=query
+    )
+    # A bare HttpRequest would always report http.
+    sub._get_scheme = request._get_scheme
+    sub.GET = QueryDict(query)
+    sub.COOKIES = request.COOKIES
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    # The batch has already been throttled for every request in it.
+    sub.batch_item = True
+    return sub
+
+
+def run_one(request, url):
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path.startswith(PREFIX):
+        return item(
+            url, 400, {"detail": f"Only {PREFIX} paths can be batched."}
+        )
+    try:
+        match = resolve(parts.path)
+    except Resolver404:
+        return item(url, 404, {"detail": "Not found."})
+    if match.func is request.resolver_match.func:
+        return item(url, 400, {"detail": "Batches cannot be nested."})
+
+    sub = sub_request(request, parts.path, parts.query)
+    sub.resolver_match = match
+    # Items are recorded in the request metrics under their own view.
+    view = MetricsMiddleware(
+        lambda sub: match.func(sub, *match.args, **match.kwargs)
+    )
+    try:
+        return response_item(url, view(sub))
+    except Exception:
+        logger.exception("Batched request to %s failed", url)
+        return item(url, 500, {"detail": "Internal server error."})
+
+
+def response_item(url, response):
+    if isinstance(response, Response):
+        return item(url, response.status_code, response.data)
+    if response.streaming:
+        return item(
+            url, 400, {"detail": "Streaming responses cannot be batched."}
+        )
+    content = response.content.decode(response.charset)
+    if response.get("Content-Type", "").startswith("application/json"):
+        content = json.loads(content)
+    return item(url, response.status_code, content)
+
+
+def run_in_thread(request, url):
+    try:
+        return run_one(request, url)
+    finally:
+        connections.close_all()
+
+
+def run_batch(request, urls, concurrent=False):
+    """Run GET requests through their views and collect the responses.
+
+    By default the requests run one after the other on the batch's
+    database connection; ``concurrent`` runs them in threads, each
+    with its own connection.
+    """
+    if not concurrent or len(urls) == 1:
+        return [run_one(request, url) for url in urls]
+    with ThreadPoolExecutor(
+        max_workers=min(settings.BATCH_MAX_CONCURRENCY, len(urls)),
+        thread_name_prefix="batch",
+    ) as executor:
+        return list(executor.map(
+            lambda url: run_in_thread(request, url), urls
+        ))
@@ -0,0 +1,192 @@
+import threading
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from planetarium.metrics import count_cache
+from planetarium.models import AstronomyShow, ShowSession, Ticket
+from planetarium.store import get_store
+
+_pending = threading.local()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_version (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+
+def get_version(name):
+    store = get_store()
+    store.ensure_schema("cache_version", SCHEMA)
+    row = store.connection.execute(
+        "SELECT version FROM cache_version WHERE name = ?", (name,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def invalidate(*names):
+    """Bump the version of cached values on every worker on the host.
+
+    The cache itself may be per process; only the version lives in the
+    shared store, so the old entries are simply never read again.
+    """
+    store = get_store()
+    store.ensure_schema("cache_version", SCHEMA)
+    with store.transaction() as connection:
+        connection.executemany(
+            "INSERT INTO cache_version (name, version) VALUES (?, 1) "
+            "ON CONFLICT (name) DO UPDATE SET version = version + 1",
+            [(name,) for name in names],
+        )
+
+
+def invalidate_on_commit(*names):
+    """Invalidate once the current transaction commits.
+
+    Values rebuilt by other requests before the commit saw the old data
+    and are dropped by the bump; without a transaction it is immediate.
+    """
+    transaction.on_commit(lambda: invalidate(*names))
+
+
+def cached(name, build, timeout, variant=None):
+    """Return the cached value of ``name``, building it when missing.
+
+    Values that differ by ``variant`` (e.g. a month) share the version
+    of ``name`` and are invalidated together.
+    """
+    key = f"planetarium:{name}:{get_version(name)}"
+    if variant is not None:
+        key = f"{key}:{variant}"
+    value = cache.get(key)
+    count_cache(name.split(":")[0], value is not None)
+    if value is None:
+        value = build()
+        cache.set(key, value, timeout)
+    return value
+
+
+def seat_map_name(show_session_id):
+    return f"seat_map:{show_session_id}"
+
+
+def seat_map(show_session_id, show_time=None):
+    """Taken ``(row, seat)`` pairs of a show session.
+
+    Passing the session's ``show_time`` limits the query to its partition
+    when tickets are partitioned.
+    """
+    tickets = Ticket.objects.filter(show_session_id=show_session_id)
+    if show_time is not None:
+        tickets = tickets.filter(show_time=show_time)
+    return cached(
+        seat_map_name(show_session_id),
+        lambda: list(
+            tickets.order_by("row", "seat").values_list("row", "seat")
+        ),
+        settings.SEAT_MAP_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_seat_maps(show_session_ids):
+    names = {seat_map_name(session_id) for session_id in show_session_ids}
+    if names:
+        invalidate_on_commit(*names)
+
+
+def catalog(build, variant=None):
+    """The serialized list of every astronomy show, built by ``build``.
+
+    ``variant`` tells apart payloads that depend on the request, such as
+    the host in image URLs.
+    """
+    return cached(
+        "catalog", build, settings.CATALOG_CACHE_TIMEOUT, variant=variant
+    )
+
+
+def invalidate_catalog():
+    invalidate_on_commit("catalog")
+
+
+def calendar_name(astronomy_show_id):
+    return f"calendar:{astronomy_show_id}"
+
+
+def _calendar_days(astronomy_show_id, start, end):
+    sessions = (
+        ShowSession.objects.filter(
+            astronomy_show_id=astronomy_show_id,
+            show_time__gte=start,
+            show_time__lt=end,
+        )
+        .annotate(
+            tickets_available=ShowSession.tickets_available_expression()
+        )
+        .order_by("show_time")
+        .values("id", "show_time", "planetarium_dome", "tickets_available")
+    )
+    days = {}
+    for session in sessions:
+        day = days.setdefault(
+            timezone.localdate(session["show_time"]),
+            {"tickets_available": 0, "sessions": []},
+        )
+        day["tickets_available"] += session["tickets_available"]
+        day["sessions"].append(session)
+    return [{"date": date, **day} for date, day in days.items()]
+
+
+def calendar(astronomy_show_id, year, month):
+    """Days of a month with sessions of a show, and the seats left.
+
+    Built with a single query; rebooking any session of the show
+    invalidates every month of its calendar.
+    """
+    start = timezone.make_aware(datetime(year, month, 1))
+    end = timezone.make_aware(
+        datetime(year + month // 12, month % 12 + 1, 1)
+    )
+    return cached(
+        calendar_name(astronomy_show_id),
+        lambda: _calendar_days(astronomy_show_id, start, end),
+        settings.CALENDAR_CACHE_TIMEOUT,
+        variant=f"{year}-{month:02d}",
+    )
+
+
+def invalidate_calendars(astronomy_show_ids):
+    names = {calendar_name(show_id) for show_id in astronomy_show_ids}
+    if names:
+        invalidate_on_commit(*names)
+
+
+def invalidate_session_calendars(show_session_ids):
+    """Invalidate the calendars of the shows of some show sessions.
+
+    The sessions are collected until the transaction commits and their
+    shows looked up then in one query, so deleting many tickets does
+    not load their sessions one by one.
+    """
+    sessions = getattr(_pending, "calendar_sessions", None)
+    if sessions is None:
+        sessions = _pending.calendar_sessions = set()
+    sessions.update(show_session_ids)
+    transaction.on_commit(_invalidate_pending_calendars)
+
+
+def _invalidate_pending_calendars():
+    sessions = getattr(_pending, "calendar_sessions", None)
+    if not sessions:
+        return
+    _pending.calendar_sessions = set()
+    invalidate_calendars(
+        ShowSession.objects.filter(id__in=sessions)
+        .values_list("astronomy_show_id", flat=True)
+        .distinct()
+    )
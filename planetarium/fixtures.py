@@ -0,0 +1,279 @@
+import gzip
+import json
+
+from django.apps import apps
+from django.core import serializers
+from django.core.management.color import no_style
+from django.core.serializers.base import DeserializationError
+from django.core.serializers.python import Deserializer
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from planetarium import caching
+from planetarium.models import AstronomyShow, ShowSession, ShowTheme, Ticket
+
+CHUNK_SIZE = 64 * 1024
+MAX_ITEM_SIZE = 16 * 1024 * 1024
+# Longest JSON literal a chunk can cut short: -Infinity.
+LONGEST_TOKEN = 9
+
+
+def open_fixture(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def iter_json_lines(stream):
+    for number, line in enumerate(stream, 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as error:
+                raise DeserializationError(f"line {number}: {error}")
+
+
+def _needs_more(error):
+    # Only an unterminated string, or a token cut off by the end of the
+    # buffer ("tru", "1e", a short \u escape), may still be valid once
+    # the next chunk arrives. Anything else is a syntax error already.
+    return (
+        error.msg.startswith("Unterminated string")
+        or len(error.doc) - error.pos <= LONGEST_TOKEN
+    )
+
+
+def iter_json_array(stream, chunk_size=CHUNK_SIZE,
+                    max_item_size=MAX_ITEM_SIZE):
+    """Yield the objects of a top-level JSON array without reading it all.
+
+    Only the item being decoded and one chunk are held in memory. Syntax
+    errors are raised as soon as they are read, and an item longer than
+    ``max_item_size`` characters is rejected rather than buffered.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, eof = "", 0, False
+    # What may come next: "[", an item or "]", "," or "]", or an item.
+    expecting = "array"
+
+    def read():
+        nonlocal buffer, position, eof
+        chunk = stream.read(chunk_size)
+        buffer, position, eof = buffer[position:] + chunk, 0, not chunk
+
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n":
+            position += 1
+        if position == len(buffer):
+            if eof:
+                raise DeserializationError("Unexpected end of JSON array")
+            read()
+            continue
+        character = buffer[position]
+        if expecting == "array":
+            if character != "[":
+                raise DeserializationError("Expected a JSON array")
+            position += 1
+            expecting = "first"
+            continue
+        if expecting == "separator":
+            if character == "]":
+                return
+            if character != ",":
+                raise DeserializationError("Expected ',' or ']'")
+            position += 1
+            expecting = "item"
+            continue
+        if character == "]" and expecting == "first":
+            return
+        if character != "{":
+            raise DeserializationError("Expected a JSON object")
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError as error:
+            if eof or not _needs_more(error):
+                raise DeserializationError(str(error))
+            if len(buffer) - position > max_item_size:
+                raise DeserializationError(
+                    f"JSON array item longer than {max_item_size} characters"
+                )
+            # The item continues in the next chunk.
+            read()
+            continue
+        position = end
+        expecting = "separator"
+        yield item
+
+
+def iter_fixture(stream, path):
+    if path.removesuffix(".gz").endswith(".jsonl"):
+        return iter_json_lines(stream)
+    return iter_json_array(stream)
+
+
+def model_order():
+    """Every model, each after the models its foreign keys point to."""
+    return {
+        model: index
+        for index, model in enumerate(serializers.sort_dependencies(
+            [(app_config, None) for app_config in apps.get_app_configs()],
+            allow_cycles=True,
+        ))
+    }
+
+
+class BulkLoader:
+    """Insert deserialized fixture objects in batches per model.
+
+    Like ``loaddata``, rows are saved raw (``Model.save`` is not called)
+    and replace existing rows with the same primary key. Each batch
+    deletes those rows and inserts the new ones with one INSERT;
+    foreign keys are checked once at the end.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS, batch_size=1000):
+        self.using = using
+        self.batch_size = batch_size
+        self.order = model_order()
+        self.pending = {}
+        self.counts = {}
+
+    def add(self, deserialized):
+        model = deserialized.object._meta.concrete_model
+        batch = self.pending.setdefault(model, [])
+        batch.append(deserialized)
+        if len(batch) >= self.batch_size:
+            # Flushing every model keeps parents ahead of their children
+            # whenever the fixture lists them first.
+            self.flush()
+
+    def flush(self):
+        for model in sorted(
+            self.pending, key=lambda model: self.order.get(model, 0)
+        ):
+            self.insert(model, self.pending[model])
+        self.pending.clear()
+
+    def insert(self, model, batch):
+        if model._meta.parents:
+            # bulk_create() cannot save multi-table inheritance children.
+            for deserialized in batch:
+                deserialized.save(using=self.using)
+        else:
+            objects = [deserialized.object for deserialized in batch]
+            model._base_manager.using(self.using).filter(
+                pk__in=[obj.pk for obj in objects if obj.pk is not None]
+            )._raw_delete(self.using)
+            self.insert_raw(model, objects)
+            for field in model._meta.many_to_many:
+                self.set_m2m(field, batch)
+        self.counts[model] = self.counts.get(model, 0) + len(batch)
+        self.invalidate_caches(model, batch)
+
+    def insert_raw(self, model, objects):
+        """INSERT the objects' values as they are, in one query.
+
+        Unlike bulk_create(), fields such as ``auto_now_add`` keep the
+        fixture's values, as with ``save(raw=True)``.
+        """
+        fields = model._meta.local_concrete_fields
+        with_pk = [obj for obj in objects if obj.pk is not None]
+        without_pk = [obj for obj in objects if obj.pk is None]
+        manager = model._base_manager.using(self.using)
+        if with_pk:
+            manager._insert(with_pk, fields, using=self.using, raw=True)
+        if without_pk:
+            manager._insert(
+                without_pk,
+                [field for field in fields
+                 if field is not model._meta.auto_field],
+                using=self.using,
+                raw=True,
+            )
+
+    def set_m2m(self, field, batch):
+        through = field.remote_field.through
+        source = field.m2m_field_name()
+        target = field.m2m_reverse_field_name()
+        loaded = [
+            deserialized for deserialized in batch
+            if field.name in deserialized.m2m_data
+        ]
+        if not loaded:
+            return
+        through._base_manager.using(self.using).filter(**{
+            f"{source}__in": [
+                deserialized.object.pk for deserialized in loaded
+            ],
+        })._raw_delete(self.using)
+        through._base_manager.using(self.using).bulk_create(
+            through(**{
+                f"{source}_id": deserialized.object.pk,
+                f"{target}_id": target_id,
+            })
+            for deserialized in loaded
+            for target_id in deserialized.m2m_data[field.name]
+        )
+
+    @staticmethod
+    def invalidate_caches(model, batch):
+        # Batched inserts send no post_save signals.
+        if model is Ticket:
+            session_ids = {
+                deserialized.object.show_session_id for deserialized in batch
+            }
+            caching.invalidate_seat_maps(session_ids)
+            caching.invalidate_calendars(
+                ShowSession.objects.filter(id__in=session_ids)
+                .values_list("astronomy_show_id", flat=True)
+                .distinct()
+            )
+        elif model is ShowSession:
+            caching.invalidate_calendars(
+                {deserialized.object.astronomy_show_id
+                 for deserialized in batch}
+            )
+        elif model in (AstronomyShow, ShowTheme):
+            caching.invalidate_catalog()
+
+    def finish(self):
+        """Check foreign keys and reset the sequences of loaded models.
+
+        Called after constraint checks are enabled again, as loaddata
+        does.
+        """
+        connection = connections[self.using]
+        connection.check_constraints(
+            table_names=[model._meta.db_table for model in self.counts]
+        )
+        sequence_sql = connection.ops.sequence_reset_sql(
+            no_style(), list(self.counts)
+        )
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
+        return self.counts
+
+
+def load_fixture(path, using=DEFAULT_DB_ALIAS, batch_size=1000,
+                 ignorenonexistent=False):
+    """Load a JSON or JSON Lines fixture, optionally gzipped.
+
+    Returns the number of objects loaded per model. Memory use depends
+    on ``batch_size``, not on the size of the fixture.
+    """
+    loader = BulkLoader(using, batch_size)
+    connection = connections[using]
+    with transaction.atomic(using=using):
+        with (
+            connection.constraint_checks_disabled(),
+            open_fixture(path) as stream,
+        ):
+            for deserialized in Deserializer(
+                iter_fixture(stream, path),
+                using=using,
+                ignorenonexistent=ignorenonexistent,
+            ):
+                loader.add(deserialized)
+            loader.flush()
+        return loader.finish()
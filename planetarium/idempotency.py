@@ -0,0 +1,175 @@
+import hashlib
+import json
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from planetarium.models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+PURGE_PROBABILITY = 0.01
+
+
+class IdempotencyKeyInUse(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = (
+        "A request with this Idempotency-Key is still being processed."
+    )
+    default_code = "idempotency_key_in_use"
+    wait = 1
+
+
+class IdempotencyKeyMismatch(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = (
+        "This Idempotency-Key was already used for a different request."
+    )
+    default_code = "idempotency_key_mismatch"
+
+
+class IdempotentReplay(Exception):
+    def __init__(self, record):
+        self.record = record
+
+
+def request_fingerprint(request):
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.path}\n".encode())
+    if request.content_type.startswith("multipart/"):
+        # Uploads are not buffered in memory just to hash them.
+        digest.update(request.META.get("CONTENT_LENGTH", "").encode())
+    else:
+        digest.update(request._request.body)
+    return digest.hexdigest()
+
+
+def lock_id(user, key):
+    digest = hashlib.sha256(f"idempotency:{user.pk}:{key}".encode()).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+def acquire_lock(lock, timeout):
+    """Take a session advisory lock, waiting up to ``timeout`` seconds."""
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('lock_timeout', %s, true)",
+                [f"{int(timeout * 1000)}ms"],
+            )
+            cursor.execute("SELECT pg_advisory_lock(%s)", [lock])
+    except OperationalError:
+        return False
+    return True
+
+
+def release_lock(lock):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_unlock(%s)", [lock])
+
+
+class IdempotencyMixin:
+    """Replay the stored response to POSTs retried with the same key.
+
+    A POST carrying an ``Idempotency-Key`` header holds a PostgreSQL
+    advisory lock on (user, key) while it runs, and its response is
+    stored for ``IDEMPOTENCY_KEY_TTL`` seconds. A duplicate arriving in
+    the meantime waits on that lock instead of running the action again,
+    then gets the stored response with ``Idempotent-Replayed: true``.
+    Server errors and "come back later" answers (those with
+    ``Retry-After``) are not stored, so the client may retry those.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        self.idempotency_lock = None
+        super().initial(request, *args, **kwargs)
+        key = request.headers.get(HEADER)
+        if (
+            request.method != "POST"
+            or not key
+            or not request.user.is_authenticated
+        ):
+            return
+        if len(key) > MAX_KEY_LENGTH:
+            raise ValidationError(
+                {HEADER: f"Must be at most {MAX_KEY_LENGTH} characters."}
+            )
+
+        fingerprint = request_fingerprint(request)
+        lock = lock_id(request.user, key)
+        if not acquire_lock(lock, settings.IDEMPOTENCY_WAIT_TIMEOUT):
+            raise IdempotencyKeyInUse()
+
+        record = IdempotencyKey.objects.filter(
+            user=request.user, key=key, expires_at__gt=timezone.now()
+        ).first()
+        if record is not None:
+            release_lock(lock)
+            if record.request_fingerprint != fingerprint:
+                raise IdempotencyKeyMismatch()
+            raise IdempotentReplay(record)
+
+        self.idempotency_lock = lock
+        self.idempotency_key = key
+        self.idempotency_fingerprint = fingerprint
+
+    def handle_exception(self, exc):
+        if isinstance(exc, IdempotentReplay):
+            return Response(
+                exc.record.response_body,
+                status=exc.record.status_code,
+                headers={"Idempotent-Replayed": "true"},
+            )
+        try:
+            return super().handle_exception(exc)
+        except Exception:
+            # Unhandled errors skip finalize_response; free the key.
+            self.release_idempotency_lock()
+            raise
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if getattr(self, "idempotency_lock", None) is None:
+            return response
+        try:
+            if (
+                response.status_code < 500
+                and not response.has_header("Retry-After")
+            ):
+                self.store_response(request, response)
+        finally:
+            self.release_idempotency_lock()
+        return response
+
+    def release_idempotency_lock(self):
+        if getattr(self, "idempotency_lock", None) is not None:
+            release_lock(self.idempotency_lock)
+            self.idempotency_lock = None
+
+    def store_response(self, request, response):
+        now = timezone.now()
+        IdempotencyKey.objects.update_or_create(
+            user=request.user,
+            key=self.idempotency_key,
+            defaults={
+                "request_fingerprint": self.idempotency_fingerprint,
+                "status_code": response.status_code,
+                "response_body": json.loads(
+                    json.dumps(response.data, cls=JSONEncoder)
+                ),
+                "expires_at": now + timedelta(
+                    seconds=settings.IDEMPOTENCY_KEY_TTL
+                ),
+            },
+        )
+        if random.random() < PURGE_PROBABILITY:
+            IdempotencyKey.objects.filter(expires_at__lte=now).delete()
@@ -0,0 +1,89 @@
+import hashlib
+import io
+import os
+
+from PIL import Image, ImageOps
+from django.core.files.base import ContentFile
+
+from planetarium.caching import invalidate_catalog
+from planetarium.jobs import task
+from planetarium.models import AstronomyShow
+
+RENDITION_WIDTHS = {
+    "small": 320,
+    "medium": 800,
+    "large": 1600,
+}
+
+RENDITION_FORMATS = {
+    "jpeg": ("JPEG", "jpg", {"quality": 85, "optimize": True}),
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+}
+
+
+def _encode(image, image_format, options):
+    if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    # Pillow only writes EXIF/XMP when asked to, so re-encoding drops
+    # the camera, GPS and editing metadata of the upload.
+    image.save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+@task(max_attempts=3)
+def process_show_image(show_id):
+    """Render resized JPEG and WebP copies of a show's image.
+
+    Records the original dimensions and the renditions on the show,
+    unless the image has been replaced while they were being built.
+    """
+    show = AstronomyShow.objects.filter(pk=show_id).first()
+    if show is None or not show.image:
+        return
+
+    original_name = show.image.name
+    storage = show.image.storage
+    with show.image.open("rb") as image_file:
+        image = Image.open(image_file)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    width, height = image.size
+    stem, _ = os.path.splitext(os.path.basename(original_name))
+    stem = stem.rstrip(".")
+
+    renditions = {}
+    for size, max_width in RENDITION_WIDTHS.items():
+        resized = image
+        if width > max_width:
+            resized = image.resize(
+                (max_width, round(height * max_width / width)),
+                Image.LANCZOS,
+            )
+        renditions[size] = {}
+        for key, (image_format, extension, options) in (
+            RENDITION_FORMATS.items()
+        ):
+            content = _encode(resized, image_format, options)
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            name = (
+                f"uploads/planetarium/renditions/"
+                f"{stem}-{size}-{digest}.{extension}"
+            )
+            if not storage.exists(name):
+                name = storage.save(name, ContentFile(content))
+            renditions[size][key] = {
+                "name": name,
+                "width": resized.width,
+                "height": resized.height,
+            }
+
+    updated = AstronomyShow.objects.filter(
+        pk=show_id, image=original_name
+    ).update(
+        image_width=width,
+        image_height=height,
+        image_renditions=renditions,
+    )
+    if updated:
+        invalidate_catalog()
@@ -0,0 +1,201 @@
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from planetarium.models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def task(max_attempts=None):
+    """Mark a module-level function as runnable by the job workers.
+
+    The task is identified by its dotted path, and the decorated function
+    gains ``enqueue(*args, **kwargs)`` and
+    ``enqueue_at(run_at, *args, **kwargs)`` helpers.
+    """
+
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+        func.is_task = True
+
+        def enqueue_at(run_at, *args, **kwargs):
+            return enqueue(
+                name,
+                args=args,
+                kwargs=kwargs,
+                run_at=run_at,
+                max_attempts=max_attempts,
+            )
+
+        func.enqueue = lambda *args, **kwargs: enqueue_at(
+            None, *args, **kwargs
+        )
+        func.enqueue_at = enqueue_at
+        return func
+
+    return decorator
+
+
+def enqueue(name, args=(), kwargs=None, run_at=None, max_attempts=None):
+    """Store a job that commits or rolls back with the caller."""
+    return Job.objects.create(
+        task=name,
+        args=list(args),
+        kwargs=kwargs or {},
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def claim_job(worker=None):
+    """Lock and return the next due job, or ``None`` if there is none.
+
+    ``SKIP LOCKED`` lets concurrent workers pass over rows another worker
+    is claiming instead of waiting for it.
+    """
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.Status.QUEUED, run_at__lte=timezone.now())
+            .order_by("run_at", "id")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = Job.Status.RUNNING
+        job.attempts += 1
+        job.locked_at = timezone.now()
+        job.locked_by = worker or worker_name()
+        job.save(
+            update_fields=["status", "attempts", "locked_at", "locked_by"]
+        )
+    return job
+
+
+def retry_delay(attempts):
+    base = settings.JOB_RETRY_BACKOFF
+    delay = min(base * 2 ** (attempts - 1), settings.JOB_RETRY_BACKOFF_MAX)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def renew_lock(job):
+    """Tell ``requeue_stale_jobs`` that the job's worker is still alive."""
+    return Job.objects.filter(
+        id=job.id, status=Job.Status.RUNNING, locked_by=job.locked_by
+    ).update(locked_at=timezone.now())
+
+
+@contextmanager
+def heartbeat(job):
+    """Renew the job's lock while the block runs.
+
+    The lock is renewed every ``JOB_HEARTBEAT_INTERVAL`` seconds, so a
+    job running for longer than ``JOB_LOCK_TIMEOUT`` is not taken for
+    one whose worker died.
+    """
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(settings.JOB_HEARTBEAT_INTERVAL):
+                renew_lock(job)
+        except Exception:
+            logger.exception("Could not renew the lock of job %s", job.id)
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(
+        target=beat, name=f"job-heartbeat-{job.id}", daemon=True
+    )
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job):
+    try:
+        func = import_string(job.task)
+        if not getattr(func, "is_task", False):
+            raise ValueError(f"{job.task} is not a registered task")
+        with heartbeat(job):
+            func(*job.args, **job.kwargs)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        job.locked_at = None
+        if job.attempts < job.max_attempts:
+            job.status = Job.Status.QUEUED
+            job.run_at = timezone.now() + retry_delay(job.attempts)
+            logger.warning(
+                "Job %s (%s) failed, retrying at %s",
+                job.id, job.task, job.run_at,
+            )
+        else:
+            job.status = Job.Status.FAILED
+            job.finished_at = timezone.now()
+            logger.error("Job %s (%s) failed permanently", job.id, job.task)
+    else:
+        job.status = Job.Status.SUCCEEDED
+        job.finished_at = timezone.now()
+        job.locked_at = None
+    job.save()
+    return job
+
+
+def requeue_stale_jobs():
+    """Put back jobs whose worker died while running them.
+
+    Jobs that have used up their attempts are marked failed instead.
+    Returns how many jobs were put back.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.Status.RUNNING,
+        locked_at__lt=now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT),
+    )
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.Status.FAILED,
+        locked_at=None,
+        finished_at=now,
+        last_error="The worker stopped while running the job.",
+    )
+    if failed:
+        logger.error("%s stale jobs failed permanently", failed)
+    return stale.filter(attempts__lt=F("max_attempts")).update(
+        status=Job.Status.QUEUED, locked_at=None, run_at=now
+    )
+
+
+def purge_finished_jobs():
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_RETENTION)
+    return Job.objects.filter(
+        status__in=(Job.Status.SUCCEEDED, Job.Status.FAILED),
+        finished_at__lt=cutoff,
+    ).delete()[0]
+
+
+def run_pending(worker=None):
+    """Run due jobs until the queue is drained; return how many ran."""
+    count = 0
+    while (job := claim_job(worker)) is not None:
+        run_job(job)
+        count += 1
+    return count
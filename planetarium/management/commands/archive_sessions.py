@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from planetarium import archive
+from planetarium.models import ShowSession
+
+
+class Command(BaseCommand):
+    help = (
+        "Move show sessions that ended before a cutoff, with their "
+        "tickets and reservations, into gzipped JSON Lines files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=365,
+            help="Archive sessions that ended more than this many days ago.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Sessions written to each file and deleted per transaction.",
+        )
+        parser.add_argument(
+            "--directory",
+            default=None,
+            help="Where to write the files (default: ARCHIVE_DIR).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many sessions would be archived.",
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options["older_than"])
+        if options["dry_run"]:
+            count = ShowSession.objects.filter(end_time__lt=before).count()
+            self.stdout.write(
+                f"{count} sessions ended before {before:%Y-%m-%d %H:%M}"
+            )
+            return
+
+        directory = options["directory"] or str(settings.ARCHIVE_DIR)
+        sessions = tickets = 0
+        for name, session_count, ticket_count in archive.archive_sessions(
+            before, directory, options["batch_size"]
+        ):
+            sessions += session_count
+            tickets += ticket_count
+            self.stdout.write(
+                f"Wrote {name}: {session_count} sessions, "
+                f"{ticket_count} tickets"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {sessions} sessions and {tickets} tickets "
+            f"to {directory}"
+        ))
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from planetarium import schema
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema files served by the schema view."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=str(settings.SCHEMA_ARTIFACT_DIR),
+            help="Directory to write the schema and its manifest to.",
+        )
+
+    def handle(self, *args, **options):
+        manifest = schema.build(options["output"])
+        for name, entry in manifest["formats"].items():
+            self.stdout.write(f"{name}: {entry['file']} {entry['etag']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Schema {manifest['version']} written to {options['output']}"
+        ))
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.base import DeserializationError
+from django.db import DEFAULT_DB_ALIAS
+
+from planetarium.fixtures import load_fixture
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a JSON or JSON Lines fixture (optionally gzipped) like "
+        "loaddata, streaming it and inserting rows in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("fixture", help="Path to the fixture file.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows of a model inserted per query.",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to load the fixture into.",
+        )
+        parser.add_argument(
+            "--ignorenonexistent",
+            "-i",
+            action="store_true",
+            help="Ignore fields and models that no longer exist.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["fixture"]
+        try:
+            counts = load_fixture(
+                path,
+                using=options["database"],
+                batch_size=options["batch_size"],
+                ignorenonexistent=options["ignorenonexistent"],
+            )
+        except (OSError, DeserializationError) as error:
+            raise CommandError(
+                f"Problem installing fixture '{path}': {error}"
+            )
+        for model, count in counts.items():
+            self.stdout.write(f"{model._meta.label}: {count}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Installed {sum(counts.values())} object(s) from {path}"
+        ))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from planetarium import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Partition the ticket table by show month, or create the monthly "
+        "partitions it is missing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="Rebuild the ticket table as a partitioned table. Copies "
+                 "every ticket under an exclusive lock.",
+        )
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=3,
+            help="Months after the current one to create partitions for.",
+        )
+        parser.add_argument(
+            "--keep-old",
+            action="store_true",
+            help="Keep the unpartitioned table as "
+                 "planetarium_ticket_unpartitioned.",
+        )
+
+    def handle(self, *args, **options):
+        if options["convert"]:
+            if partitions.convert(
+                options["months_ahead"], keep_old=options["keep_old"]
+            ):
+                self.stdout.write(self.style.SUCCESS(
+                    "Tickets are now partitioned by show month"
+                ))
+            else:
+                self.stdout.write("Tickets are already partitioned")
+            return
+
+        created = partitions.ensure_partitions(options["months_ahead"])
+        for name in created:
+            self.stdout.write(f"Created {name}")
+        if not created:
+            self.stdout.write("No partitions to create")
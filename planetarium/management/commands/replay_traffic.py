@@ -0,0 +1,342 @@
+import asyncio
+import json
+import math
+import ssl
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from planetarium.middleware import MASK
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+HISTOGRAM_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Connection:
+    """Minimal keep-alive HTTP/1.1 client connection."""
+
+    def __init__(self, host, port, ssl_context=None):
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self.reader = self.writer = None
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(
+            self.host, self.port, ssl=self.ssl_context
+        )
+
+    async def send(self, method, target, headers, body):
+        """Write the request and return the response's status line."""
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {self.host}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        lines.append(f"Content-Length: {len(body)}")
+        self.writer.write(
+            ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+        )
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by server")
+        return status_line
+
+    async def request(self, method, target, headers, body):
+        reused = self.writer is not None
+        if not reused:
+            await self.open()
+        try:
+            status_line = await self.send(method, target, headers, body)
+        except OSError:
+            if not reused:
+                raise
+            # The server closed the idle keep-alive connection before it
+            # answered, so try once more on a fresh one.
+            self.close()
+            await self.open()
+            status_line = await self.send(method, target, headers, body)
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while (line := await self.reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if method == "HEAD" or status in (204, 304) or status < 200:
+            pass
+        elif response_headers.get("transfer-encoding") == "chunked":
+            while size := int((await self.reader.readline()).strip(), 16):
+                await self.reader.readexactly(size + 2)
+            await self.reader.readline()
+        elif "content-length" in response_headers:
+            await self.reader.readexactly(
+                int(response_headers["content-length"])
+            )
+        else:
+            await self.reader.read()
+            self.close()
+        if response_headers.get("connection") == "close":
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.statuses = defaultdict(int)
+        self.failures = 0
+
+    def record(self, latency, status):
+        self.latencies.append(latency)
+        if status is None:
+            self.failures += 1
+        else:
+            self.statuses[status] += 1
+
+    @property
+    def errors(self):
+        return self.failures + sum(
+            count for status, count in self.statuses.items() if status >= 500
+        )
+
+    def percentile(self, fraction):
+        ordered = sorted(self.latencies)
+        index = max(math.ceil(fraction * len(ordered)) - 1, 0)
+        return ordered[index]
+
+    def histogram(self):
+        counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        for latency in self.latencies:
+            for number, bound in enumerate(HISTOGRAM_BUCKETS):
+                if latency <= bound:
+                    counts[number] += 1
+                    break
+            else:
+                counts[-1] += 1
+        labels = [f"<={bound}ms" for bound in HISTOGRAM_BUCKETS]
+        labels.append(f">{HISTOGRAM_BUCKETS[-1]}ms")
+        return zip(labels, counts)
+
+
+def is_masked(data):
+    """Whether a captured payload holds values masked at capture time."""
+    if isinstance(data, dict):
+        return any(map(is_masked, data.values()))
+    if isinstance(data, list):
+        return any(map(is_masked, data))
+    return data == MASK
+
+
+def load_requests(path, limit):
+    entries = []
+    with open(path, encoding="utf-8") as capture:
+        for line in capture:
+            if line.strip():
+                entries.append(json.loads(line))
+            if limit and len(entries) >= limit:
+                break
+    return entries
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay captured API traffic against a running server and report "
+        "latency, errors and throughput per endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "capture",
+            nargs="?",
+            default=str(settings.TRAFFIC_CAPTURE_PATH),
+            help="JSON Lines file written by TrafficCaptureMiddleware.",
+        )
+        parser.add_argument(
+            "--base-url", default="http://127.0.0.1:8000"
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=10,
+            help="Connections, and so requests in flight, at most.",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            help="Start this many requests per second (open loop) instead "
+                 "of sending the next one as soon as a connection is free.",
+        )
+        parser.add_argument(
+            "--speed",
+            type=float,
+            help="Replay with the captured arrival times, sped up by this "
+                 "factor.",
+        )
+        parser.add_argument(
+            "--limit", type=int, help="Replay at most this many requests."
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=1, help="Replay the capture N times."
+        )
+        parser.add_argument(
+            "--token",
+            help="JWT access token used for requests captured with a user.",
+        )
+        parser.add_argument(
+            "--admin-token",
+            help="JWT access token used for requests captured from staff.",
+        )
+        parser.add_argument(
+            "--include-masked",
+            action="store_true",
+            help="Also replay requests whose bodies had credentials or "
+                 "personal data masked; they are sent with the masks and "
+                 "usually fail.",
+        )
+
+    def handle(self, *args, **options):
+        if options["rate"] and options["speed"]:
+            raise CommandError("Use either --rate or --speed, not both.")
+        try:
+            entries = load_requests(options["capture"], options["limit"])
+        except OSError as error:
+            raise CommandError(error)
+        masked = 0
+        if not options["include_masked"]:
+            replayable = [
+                entry for entry in entries if not is_masked(entry.get("body"))
+            ]
+            masked = len(entries) - len(replayable)
+            entries = replayable
+        entries *= options["repeat"]
+        if not entries:
+            raise CommandError("The capture holds no replayable requests.")
+
+        url = urlsplit(options["base_url"])
+        if url.scheme not in DEFAULT_PORTS or not url.hostname:
+            raise CommandError(
+                "--base-url must be an http:// or https:// URL."
+            )
+        self.host = url.hostname
+        self.port = url.port or DEFAULT_PORTS[url.scheme]
+        self.ssl_context = (
+            ssl.create_default_context() if url.scheme == "https" else None
+        )
+        self.prefix = url.path.rstrip("/")
+        self.options = options
+
+        if masked:
+            self.stdout.write(
+                f"Skipping {masked} requests with masked credentials or "
+                f"personal data (use --include-masked to send them)"
+            )
+        self.stdout.write(
+            f"Replaying {len(entries)} requests against "
+            f"{options['base_url']}"
+        )
+        started = time.monotonic()
+        stats = asyncio.run(self.replay(entries))
+        self.report(stats, time.monotonic() - started)
+
+    def build_request(self, entry):
+        target = self.prefix + entry["path"]
+        if entry.get("query"):
+            target += "?" + entry["query"]
+        headers = {"Connection": "keep-alive", "Accept": "application/json"}
+        token = None
+        if entry.get("staff"):
+            token = self.options["admin_token"] or self.options["token"]
+        elif entry.get("user"):
+            token = self.options["token"]
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        body = b""
+        if entry.get("body") is not None:
+            body = json.dumps(entry["body"]).encode()
+            headers["Content-Type"] = "application/json"
+        return entry["method"], target, headers, body
+
+    async def replay(self, entries):
+        stats = defaultdict(Stats)
+        connections = asyncio.Queue()
+        for _ in range(self.options["concurrency"]):
+            connections.put_nowait(
+                Connection(self.host, self.port, self.ssl_context)
+            )
+
+        async def send(entry, scheduled=None):
+            connection = await connections.get()
+            # Open-loop latency counts from the scheduled start, so time
+            # spent waiting for a connection is not hidden.
+            started = scheduled or time.monotonic()
+            try:
+                status = await connection.request(*self.build_request(entry))
+            except (OSError, ValueError, asyncio.IncompleteReadError):
+                connection.close()
+                status = None
+            finally:
+                connections.put_nowait(connection)
+            endpoint = entry.get("route") or entry["path"]
+            stats[f"{entry['method']} {endpoint}"].record(
+                (time.monotonic() - started) * 1000, status
+            )
+
+        tasks = []
+        start = time.monotonic()
+        first = entries[0].get("timestamp", 0)
+        for number, entry in enumerate(entries):
+            if self.options["rate"]:
+                due = start + number / self.options["rate"]
+            elif self.options["speed"]:
+                offset = entry.get("timestamp", first) - first
+                due = start + max(offset, 0) / self.options["speed"]
+            else:
+                # Closed loop: the connection pool bounds the requests
+                # in flight.
+                tasks.append(asyncio.create_task(send(entry)))
+                continue
+            await asyncio.sleep(max(due - time.monotonic(), 0))
+            tasks.append(asyncio.create_task(send(entry, due)))
+        await asyncio.gather(*tasks)
+
+        while not connections.empty():
+            connections.get_nowait().close()
+        return stats
+
+    def report(self, stats, elapsed):
+        total = sum(len(endpoint.latencies) for endpoint in stats.values())
+        errors = sum(endpoint.errors for endpoint in stats.values())
+        self.stdout.write(
+            f"\n{total} requests in {elapsed:.2f}s "
+            f"({total / elapsed:.1f} req/s), {errors} errors\n"
+        )
+        for name, endpoint in sorted(stats.items()):
+            count = len(endpoint.latencies)
+            statuses = ", ".join(
+                f"{status}: {number}"
+                for status, number in sorted(endpoint.statuses.items())
+            )
+            if endpoint.failures:
+                statuses += f", failed: {endpoint.failures}"
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(
+                f"  {count} requests, {count / elapsed:.1f} req/s, "
+                f"error rate {endpoint.errors / count:.1%} ({statuses})"
+            )
+            self.stdout.write(
+                f"  p50 {endpoint.percentile(0.5):.1f}ms  "
+                f"p90 {endpoint.percentile(0.9):.1f}ms  "
+                f"p99 {endpoint.percentile(0.99):.1f}ms  "
+                f"max {max(endpoint.latencies):.1f}ms"
+            )
+            for label, number in endpoint.histogram():
+                if number:
+                    bar = "#" * max(round(40 * number / count), 1)
+                    self.stdout.write(f"  {label:>9} {number:>7} {bar}")
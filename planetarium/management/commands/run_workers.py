@@ -0,0 +1,134 @@
+import multiprocessing
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from planetarium import jobs, partitions
+
+HOUSEKEEPING_INTERVAL = 60
+
+
+def work(stop, poll_interval, burst):
+    """Claim and run jobs until ``stop`` is set."""
+    try:
+        while not stop.is_set():
+            close_old_connections()
+            job = jobs.claim_job()
+            if job is None:
+                if burst:
+                    return
+                stop.wait(poll_interval)
+                continue
+            jobs.run_job(job)
+    finally:
+        connections.close_all()
+
+
+def work_in_process(poll_interval, burst):
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    work(stop, poll_interval, burst)
+
+
+class Command(BaseCommand):
+    help = "Run background jobs from the database queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.JOB_WORKER_CONCURRENCY,
+            help="Number of worker threads or processes.",
+        )
+        parser.add_argument(
+            "--mode",
+            choices=("thread", "process"),
+            default=settings.JOB_WORKER_MODE,
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.JOB_POLL_INTERVAL,
+            help="Seconds an idle worker waits before polling again.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once the queue has no due jobs left.",
+        )
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: self.stop.set())
+        signal.signal(signal.SIGINT, lambda *_: self.stop.set())
+
+        jobs.requeue_stale_jobs()
+        self.stdout.write(
+            f"Starting {options['concurrency']} job worker "
+            f"{options['mode']}(s)"
+        )
+        if options["mode"] == "process":
+            self.run_processes(options)
+        else:
+            self.run_threads(options)
+        self.stdout.write(self.style.SUCCESS("Job workers stopped"))
+
+    def supervise(self, alive, tick=None):
+        """Wait for the workers, doing housekeeping every so often."""
+        last_housekeeping = time.monotonic()
+        while alive() and not self.stop.wait(1):
+            if time.monotonic() - last_housekeeping < HOUSEKEEPING_INTERVAL:
+                continue
+            jobs.requeue_stale_jobs()
+            jobs.purge_finished_jobs()
+            partitions.ensure_partitions()
+            connections.close_all()
+            last_housekeeping = time.monotonic()
+            if tick is not None:
+                tick()
+
+    def run_threads(self, options):
+        threads = [
+            threading.Thread(
+                target=work,
+                args=(self.stop, options["poll_interval"], options["burst"]),
+                name=f"job-worker-{number}",
+            )
+            for number in range(options["concurrency"])
+        ]
+        for thread in threads:
+            thread.start()
+        self.supervise(lambda: any(thread.is_alive() for thread in threads))
+        for thread in threads:
+            thread.join()
+
+    def run_processes(self, options):
+        context = multiprocessing.get_context("fork")
+        arguments = (options["poll_interval"], options["burst"])
+
+        def start():
+            # Children must not share the parent's database socket.
+            connections.close_all()
+            process = context.Process(target=work_in_process, args=arguments)
+            process.start()
+            return process
+
+        def restart_dead():
+            for number, process in enumerate(processes):
+                if not process.is_alive():
+                    processes[number] = start()
+
+        processes = [start() for _ in range(options["concurrency"])]
+        self.supervise(
+            lambda: any(process.is_alive() for process in processes),
+            None if options["burst"] else restart_dead,
+        )
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
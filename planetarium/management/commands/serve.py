@@ -0,0 +1,190 @@
+import logging
+import multiprocessing
+import os
+import resource
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from planetarium import startup
+from planetarium.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+WORKER_CLASSES = {
+    "sync": "gthread",
+    "async": "uvicorn.workers.UvicornWorker",
+}
+RSS_CHECK_INTERVAL = 5
+
+
+def rss_megabytes():
+    """Resident memory of this process, in MiB."""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        # Peak rather than current RSS, in KiB on Linux.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def watch_memory(worker, limit):
+    """Stop ``worker`` gracefully once it uses more than ``limit`` MiB."""
+    def watch():
+        while not stop.wait(RSS_CHECK_INTERVAL):
+            rss = rss_megabytes()
+            if rss > limit:
+                logger.warning(
+                    "Worker %s uses %.0f MiB (limit %s), recycling",
+                    worker.pid, rss, limit,
+                )
+                # The arbiter starts a replacement once this one exits.
+                os.kill(worker.pid, signal.SIGTERM)
+                return
+
+    stop = threading.Event()
+    threading.Thread(target=watch, name="rss-watch", daemon=True).start()
+    return stop
+
+
+def post_fork(server, worker):
+    # The catalog and seat maps cached while warming up are inherited;
+    # database connections and the metrics flusher are not.
+    connections.close_all()
+
+
+def worker_exit(server, worker):
+    if hasattr(worker, "rss_watch"):
+        worker.rss_watch.set()
+    try:
+        registry.flush()
+    except Exception:
+        logger.exception("Could not flush metrics")
+    connections.close_all()
+
+
+def make_application(interface, options):
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for name, value in options.items():
+                self.cfg.set(name, value)
+
+        def load(self):
+            if interface == "async":
+                from django.core.asgi import get_asgi_application
+
+                application = get_asgi_application()
+            else:
+                from django.core.wsgi import get_wsgi_application
+
+                application = get_wsgi_application()
+            if not startup.warm_up():
+                logger.warning("Serving without a complete warm-up")
+                startup.warm_up_in_background()
+            # Workers must open their own connections after the fork.
+            connections.close_all()
+            return application
+
+    return Application()
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve the project with pre-forked gunicorn workers, warmed up "
+        "once before forking."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--bind",
+            default=settings.SERVER_BIND,
+            help="Address to listen on, e.g. 0.0.0.0:8000.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.SERVER_WORKERS,
+            help="Worker processes (0: two per CPU, plus one).",
+        )
+        parser.add_argument(
+            "--worker-class",
+            choices=sorted(WORKER_CLASSES),
+            default=settings.SERVER_WORKER_CLASS,
+            help="Threaded WSGI workers or uvicorn ASGI workers.",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=settings.SERVER_THREADS,
+            help="Threads per sync worker.",
+        )
+        parser.add_argument(
+            "--max-requests",
+            type=int,
+            default=settings.SERVER_MAX_REQUESTS,
+            help="Recycle a worker after this many requests (0: never).",
+        )
+        parser.add_argument(
+            "--max-rss",
+            type=int,
+            default=settings.SERVER_MAX_RSS,
+            help="Recycle a worker above this many MiB of memory "
+                 "(0: never).",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            default=settings.SERVER_TIMEOUT,
+            help="Seconds before a stuck worker is killed.",
+        )
+        parser.add_argument(
+            "--graceful-timeout",
+            type=int,
+            default=settings.SERVER_GRACEFUL_TIMEOUT,
+            help="Seconds workers get to finish requests on shutdown.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import gunicorn  # noqa: F401
+            if options["worker_class"] == "async":
+                import uvicorn  # noqa: F401
+        except ImportError as error:
+            raise CommandError(f"serve needs {error.name} installed")
+
+        workers = options["workers"] or multiprocessing.cpu_count() * 2 + 1
+        max_requests = options["max_requests"]
+        max_rss = options["max_rss"]
+
+        def post_worker_init(worker):
+            if max_rss:
+                worker.rss_watch = watch_memory(worker, max_rss)
+
+        config = {
+            "bind": [options["bind"]],
+            "workers": workers,
+            "worker_class": WORKER_CLASSES[options["worker_class"]],
+            "threads": options["threads"],
+            "preload_app": True,
+            "max_requests": max_requests,
+            # Spread recycling out so workers do not restart together.
+            "max_requests_jitter": max_requests // 10,
+            "timeout": options["timeout"],
+            "graceful_timeout": options["graceful_timeout"],
+            "keepalive": 5,
+            "accesslog": "-",
+            "post_fork": post_fork,
+            "post_worker_init": post_worker_init,
+            "worker_exit": worker_exit,
+        }
+        self.stdout.write(
+            f"Serving on {options['bind']} with {workers} "
+            f"{options['worker_class']} workers"
+        )
+        make_application(options["worker_class"], config).run()
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from planetarium import querylog
+
+
+class Command(BaseCommand):
+    help = "Show the slowest logged queries, grouped by normalized SQL."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--order",
+            choices=("total", "max", "count", "mean"),
+            default="total",
+            help="Rank by total, worst or mean time, or by count.",
+        )
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Forget the queries logged so far.",
+        )
+
+    def handle(self, *args, **options):
+        if options["reset"]:
+            querylog.reset()
+            self.stdout.write(self.style.SUCCESS("Slow query log cleared"))
+            return
+
+        rows = querylog.top_queries(options["order"], options["limit"])
+        if not rows:
+            self.stdout.write("No slow queries logged")
+            return
+        for rank, row in enumerate(rows, start=1):
+            fingerprint, sql, count, total, worst, path, view, site = row
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{rank}. {total:.0f} ms total, {count} calls, "
+                f"{total / count:.1f} ms mean, {worst:.1f} ms max "
+                f"[{fingerprint}]"
+            ))
+            self.stdout.write(f"   {sql}")
+            self.stdout.write(f"   last seen on {path} ({view})")
+            if site:
+                self.stdout.write(f"   issued from {site}")
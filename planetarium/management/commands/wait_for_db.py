@@ -1,18 +1,59 @@
-from django.core.management.base import BaseCommand
-from django.db import connections, OperationalError
 import time
 
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError
+
+from planetarium.startup import check_database, pending_migrations
+
 
 class Command(BaseCommand):
+    help = "Wait until the database accepts queries (and is migrated)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=60.0,
+            help="Seconds to wait before giving up.",
+        )
+        parser.add_argument(
+            "--max-delay",
+            type=float,
+            default=5.0,
+            help="Longest pause between two attempts, in seconds.",
+        )
+        parser.add_argument(
+            "--wait-for-migrations",
+            action="store_true",
+            help="Also wait until no migration is left to apply.",
+        )
 
     def handle(self, *args, **options):
         self.stdout.write("Waiting for database")
-        db = None
-        while not db:
-            try:
-                db = connections["default"]
-            except OperationalError:
-                self.stdout.write("Database unavailable, waiting 1 second")
-                time.sleep(1)
+        deadline = time.monotonic() + options["timeout"]
+        delay = 0.1
+        while True:
+            reason = self.check(options["wait_for_migrations"])
+            if reason is None:
+                break
+            if time.monotonic() + delay > deadline:
+                raise CommandError(
+                    f"Gave up after {options['timeout']:g} s: {reason}"
+                )
+            self.stdout.write(f"{reason}, waiting {delay:.1f} s")
+            time.sleep(delay)
+            delay = min(delay * 2, options["max_delay"])
 
         self.stdout.write(self.style.SUCCESS("Database available!"))
+
+    @staticmethod
+    def check(wait_for_migrations):
+        try:
+            check_database()
+            if wait_for_migrations:
+                pending = pending_migrations()
+                if pending:
+                    return f"{len(pending)} migrations pending"
+        except OperationalError as error:
+            return f"Database unavailable ({str(error).strip()})"
+        return None
@@ -0,0 +1,245 @@
+import hmac
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.renderers import BaseRenderer
+
+from planetarium.store import get_store
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metric_sample (
+    family TEXT NOT NULL,
+    name TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (name, labels)
+);
+"""
+
+LE_LABEL = re.compile(r'le="([^"]*)"')
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+FAMILIES = {
+    "planetarium_request_duration_seconds": (
+        "histogram", "Time spent serving requests."
+    ),
+    "planetarium_db_queries_total": (
+        "counter", "Database queries run while serving requests."
+    ),
+    "planetarium_db_query_duration_seconds_total": (
+        "counter", "Time spent in database queries while serving requests."
+    ),
+    "planetarium_cache_requests_total": (
+        "counter", "Cache lookups by cache and result (hit or miss)."
+    ),
+    "planetarium_throttle_rejections_total": (
+        "counter", "Requests turned away by throttles or waiting rooms."
+    ),
+}
+
+
+def format_labels(labels):
+    pairs = []
+    for name, value in sorted(labels.items()):
+        value = (
+            str(value)
+            .replace("\\", "\\\\")
+            .replace("\n", "\\n")
+            .replace('"', '\\"')
+        )
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+def sample_order(row):
+    """Group a histogram's series together, buckets in ascending order."""
+    family, name, labels, _ = row
+    match = LE_LABEL.search(labels)
+    bound = float(match.group(1).replace("+Inf", "inf")) if match else 0
+    return family, LE_LABEL.sub("", labels), name, bound
+
+
+class Registry:
+    """Metrics of this process, added to the shared store every second.
+
+    Requests only touch an in-memory dict; a daemon thread per process
+    flushes the increments into one SQLite table, which every worker on
+    the host adds to and the metrics endpoint reads.
+    """
+
+    def __init__(self):
+        self._pending = defaultdict(float)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher_pid = None
+
+    def add(self, family, name, labels, amount):
+        if self._flusher_pid != os.getpid():
+            self._start_flusher()
+        key = (family, name, format_labels(labels))
+        with self._lock:
+            self._pending[key] += amount
+
+    def _start_flusher(self):
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+            # Increments inherited from a parent process are not ours.
+            self._pending.clear()
+        thread = threading.Thread(
+            target=self._flush_periodically, name="metrics-flush", daemon=True
+        )
+        thread.start()
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(settings.METRICS_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Could not flush metrics")
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, defaultdict(float)
+            if pending:
+                self._write(pending)
+
+    def _write(self, pending):
+        store = get_store()
+        store.ensure_schema("metrics", SCHEMA)
+        with store.transaction() as connection:
+            connection.executemany(
+                "INSERT INTO metric_sample (family, name, labels, value) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT (name, labels) "
+                "DO UPDATE SET value = value + excluded.value",
+                [
+                    (family, name, labels, value)
+                    for (family, name, labels), value in pending.items()
+                ],
+            )
+
+    def increment(self, family, amount=1, **labels):
+        self.add(family, family, labels, amount)
+
+    def observe(self, family, value, buckets=LATENCY_BUCKETS, **labels):
+        for bound in buckets:
+            self.add(
+                family,
+                f"{family}_bucket",
+                {**labels, "le": bound},
+                int(value <= bound),
+            )
+        self.add(family, f"{family}_bucket", {**labels, "le": "+Inf"}, 1)
+        self.add(family, f"{family}_sum", labels, value)
+        self.add(family, f"{family}_count", labels, 1)
+
+    def render(self):
+        """Return every worker's metrics in Prometheus text format."""
+        self.flush()
+        store = get_store()
+        store.ensure_schema("metrics", SCHEMA)
+        rows = store.connection.execute(
+            "SELECT family, name, labels, value FROM metric_sample"
+        ).fetchall()
+        samples = defaultdict(list)
+        for family, name, labels, value in sorted(rows, key=sample_order):
+            samples[family].append((name, labels, value))
+
+        lines = []
+        for family, (kind, description) in FAMILIES.items():
+            lines.append(f"# HELP {family} {description}")
+            lines.append(f"# TYPE {family} {kind}")
+            for name, labels, value in samples[family]:
+                lines.append(f"{name}{labels} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def view_label(view):
+    """Name a DRF view ``<basename>-<action>``, e.g. ``showsession-list``."""
+    basename = getattr(view, "basename", None)
+    action = getattr(view, "action", None)
+    if basename and action:
+        return f"{basename}-{action}"
+    return type(view).__name__
+
+
+def request_view_label(request):
+    """Name the view a request was routed to, before or after it ran."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    initkwargs = getattr(match.func, "initkwargs", {})
+    actions = getattr(match.func, "actions", None) or {}
+    action = actions.get(request.method.lower())
+    if initkwargs.get("basename") and action:
+        return f"{initkwargs['basename']}-{action}"
+    return match.view_name
+
+
+def count_cache(cache, hit):
+    registry.increment(
+        "planetarium_cache_requests_total",
+        cache=cache,
+        result="hit" if hit else "miss",
+    )
+
+
+def count_rejection(view, reason):
+    registry.increment(
+        "planetarium_throttle_rejections_total",
+        view=view_label(view),
+        reason=reason,
+    )
+
+
+class MetricsTokenAuthentication(BaseAuthentication):
+    """Accept ``Authorization: Bearer <METRICS_TOKEN>`` from scrapers."""
+
+    def authenticate(self, request):
+        header = request.headers.get("Authorization", "")
+        scheme, _, token = header.partition(" ")
+        if (
+            settings.METRICS_TOKEN
+            and scheme.lower() == "bearer"
+            and hmac.compare_digest(token.strip(), settings.METRICS_TOKEN)
+        ):
+            return AnonymousUser(), "metrics"
+        return None
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="metrics"'
+
+
+class PrometheusRenderer(BaseRenderer):
+    media_type = "text/plain"
+    format = "prometheus"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        return f"{data}\n".encode(self.charset)
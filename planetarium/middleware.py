@@ -0,0 +1,243 @@
+import cProfile
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import ExitStack
+from urllib.parse import parse_qsl, urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from planetarium import profiling
+from planetarium.metrics import registry, request_view_label
+from planetarium.querylog import SlowQueryRecorder
+from planetarium.models import RequestProfile
+
+logger = logging.getLogger(__name__)
+
+SENSITIVE_FIELDS = {
+    "access",
+    "email",
+    "first_name",
+    "last_name",
+    "password",
+    "refresh",
+    "token",
+}
+MASK = "***"
+MAX_CAPTURED_BODY = 64 * 1024
+
+
+def scrub(data):
+    """Mask personal data and credentials in a decoded JSON payload."""
+    if isinstance(data, dict):
+        return {
+            key: MASK if key.lower() in SENSITIVE_FIELDS else scrub(value)
+            for key, value in data.items()
+        }
+    if isinstance(data, list):
+        return [scrub(item) for item in data]
+    return data
+
+
+def pseudonym(user):
+    """Stable, non-reversible stand-in for a user id."""
+    if not user.is_authenticated:
+        return None
+    digest = hmac.new(
+        settings.SECRET_KEY.encode(), str(user.pk).encode(), hashlib.sha256
+    )
+    return digest.hexdigest()[:12]
+
+
+class TrafficCaptureMiddleware:
+    """Append a sample of API requests to a JSON Lines file.
+
+    Enabled by a non-zero ``TRAFFIC_CAPTURE_RATE``. Credentials and
+    personal fields are masked, users are reduced to pseudonyms and only
+    JSON bodies are kept, so captures can be shared to replay traffic
+    with ``manage.py replay_traffic``.
+    """
+
+    lock = threading.Lock()
+
+    def __init__(self, get_response):
+        if not settings.TRAFFIC_CAPTURE_RATE:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.path = str(settings.TRAFFIC_CAPTURE_PATH)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+    def __call__(self, request):
+        if (
+            not request.path.startswith(settings.TRAFFIC_CAPTURE_PREFIX)
+            or random.random() >= settings.TRAFFIC_CAPTURE_RATE
+        ):
+            return self.get_response(request)
+
+        # Read before the view does: DRF consumes the stream.
+        body = None
+        if (
+            request.content_type == "application/json"
+            and int(request.META.get("CONTENT_LENGTH") or 0)
+            <= MAX_CAPTURED_BODY
+        ):
+            try:
+                body = scrub(json.loads(request.body or b"null"))
+            except ValueError:
+                pass
+
+        started = time.time()
+        response = self.get_response(request)
+        duration = time.time() - started
+
+        match = request.resolver_match
+        record = {
+            "timestamp": round(started, 3),
+            "method": request.method,
+            "path": request.path,
+            "query": urlencode(
+                scrub(dict(parse_qsl(request.META.get("QUERY_STRING", ""))))
+            ),
+            "route": match.view_name if match else None,
+            "content_type": request.content_type,
+            "body": body,
+            "user": pseudonym(request.user),
+            "staff": request.user.is_staff,
+            "status": response.status_code,
+            "duration_ms": round(duration * 1000, 2),
+        }
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self.lock, open(self.path, "a", encoding="utf-8") as capture:
+            capture.write(line)
+        return response
+
+
+class RequestProfilingMiddleware:
+    """Run a request under cProfile and store the result.
+
+    A request is profiled when it carries an ``X-Profile`` header signed
+    for a staff member (see ``/api/planetarium/profiles/token/``), or at
+    random for a ``PROFILING_SAMPLE_RATE`` share of requests. Profiles
+    are listed and downloaded through ``/api/planetarium/profiles/``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def trigger(self, request):
+        token = request.headers.get(profiling.HEADER)
+        if token:
+            user_id = profiling.token_user_id(token)
+            if user_id is not None and get_user_model().objects.filter(
+                pk=user_id, is_staff=True, is_active=True
+            ).exists():
+                return RequestProfile.Trigger.HEADER, user_id
+        if (
+            settings.PROFILING_SAMPLE_RATE
+            and random.random() < settings.PROFILING_SAMPLE_RATE
+        ):
+            return RequestProfile.Trigger.SAMPLE, None
+        return None, None
+
+    def __call__(self, request):
+        trigger, user_id = self.trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another request in this process is being profiled already.
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - started
+
+        try:
+            profile = profiling.save_profile(
+                profiler, request, response, duration, trigger, user_id
+            )
+        except Exception:
+            logger.exception("Could not store the profile of %s", request.path)
+        else:
+            response["X-Profile-Id"] = str(profile.id)
+        return response
+
+
+class MetricsMiddleware:
+    """Record latency and database work per view for ``/metrics``."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = {"count": 0, "duration": 0.0}
+
+        def count_query(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries["count"] += 1
+                queries["duration"] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count_query))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        view = request_view_label(request)
+        registry.observe(
+            "planetarium_request_duration_seconds",
+            duration,
+            view=view,
+            method=request.method,
+            status=response.status_code,
+        )
+        registry.increment(
+            "planetarium_db_queries_total", queries["count"], view=view
+        )
+        registry.increment(
+            "planetarium_db_query_duration_seconds_total",
+            queries["duration"],
+            view=view,
+        )
+        return response
+
+
+class SlowQueryLogMiddleware:
+    """Log queries over ``SLOW_QUERY_THRESHOLD`` ms with their call site.
+
+    Entries are aggregated in the shared store for
+    ``manage.py slow_queries``.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_THRESHOLD:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = SlowQueryRecorder(
+            request.path,
+            lambda: request_view_label(request),
+            settings.SLOW_QUERY_THRESHOLD,
+        )
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            return self.get_response(request)
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.6 on 2026-10-19 04:59
+
+import django.contrib.postgres.constraints
+from django.contrib.postgres.operations import BtreeGistExtension
+import planetarium.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planetarium', '0004_job'),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.AddField(
+            model_name='astronomyshow',
+            name='duration',
+            field=models.PositiveIntegerField(default=60, help_text='Length of the show in minutes'),
+        ),
+        migrations.AddField(
+            model_name='showsession',
+            name='end_time',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE planetarium_showsession AS session
+            SET end_time = session.show_time
+                + make_interval(mins => show.duration)
+            FROM planetarium_astronomyshow AS show
+            WHERE show.id = session.astronomy_show_id
+            """,
+            migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name='showsession',
+            name='end_time',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AddConstraint(
+            model_name='showsession',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(expressions=[(planetarium.models.TsTzRange('show_time', 'end_time'), '&&'), ('planetarium_dome', '=')], name='exclude_overlapping_show_sessions', violation_error_message='The dome already has a session at this time.'),
+        ),
+    ]
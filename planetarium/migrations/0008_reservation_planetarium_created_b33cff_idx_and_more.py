@@ -0,0 +1,26 @@
+# Generated by Django 5.0.6 on 2026-10-19 05:37
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Building the indexes must not lock these large tables.
+    atomic = False
+
+    dependencies = [
+        ('planetarium', '0007_requestprofile'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='reservation',
+            index=models.Index(fields=['created_at'], name='planetarium_created_b33cff_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='showsession',
+            index=models.Index(fields=['show_time'], name='planetarium_show_ti_2d077a_idx'),
+        ),
+    ]
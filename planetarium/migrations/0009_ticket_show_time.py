@@ -0,0 +1,54 @@
+# Generated by Django 5.0.6 on 2026-10-19 05:46
+
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 10000
+
+
+def copy_show_times(apps, schema_editor):
+    # One short transaction per batch, so the ticket table is never
+    # locked for the whole backfill. Tickets booked meanwhile are
+    # picked up by a later batch.
+    connection = schema_editor.connection
+    while True:
+        with transaction.atomic(using=connection.alias), \
+                connection.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE planetarium_ticket AS ticket
+                SET show_time = session.show_time
+                FROM planetarium_showsession AS session
+                WHERE session.id = ticket.show_session_id
+                AND ticket.id IN (
+                    SELECT id FROM planetarium_ticket
+                    WHERE show_time IS NULL
+                    LIMIT %s
+                )
+                """,
+                [BATCH_SIZE],
+            )
+            if cursor.rowcount < BATCH_SIZE:
+                return
+
+
+class Migration(migrations.Migration):
+    # The backfill commits batch by batch.
+    atomic = False
+
+    dependencies = [
+        ('planetarium', '0008_reservation_planetarium_created_b33cff_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='show_time',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(copy_show_times, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='ticket',
+            name='show_time',
+            field=models.DateTimeField(editable=False),
+        ),
+    ]
@@ -1,11 +1,25 @@
 import os
 import uuid
+from datetime import timedelta
+
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import (
+    DateTimeRangeField,
+    RangeOperators,
+)
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.conf import settings
+from django.utils import timezone
 from django.utils.text import slugify
 
 
+class TsTzRange(models.Func):
+    function = "TSTZRANGE"
+    output_field = DateTimeRangeField()
+
+
 def planetarium_image_file_path(instance, filename):
     _, extension = os.path.splitext(filename)
     filename = f"{slugify(instance.title)}-{uuid.uuid4()}.{extension}"
@@ -35,10 +49,16 @@ class ShowTheme(models.Model):
 class AstronomyShow(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
+    duration = models.PositiveIntegerField(
+        default=60, help_text="Length of the show in minutes"
+    )
     theme = models.ManyToManyField(ShowTheme, blank=True)
     image = models.ImageField(
         null=True, upload_to=planetarium_image_file_path
     )
+    image_width = models.PositiveIntegerField(null=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, editable=False)
+    image_renditions = models.JSONField(default=dict, editable=False)
 
     class Meta:
         ordering = ["title"]
@@ -46,9 +66,42 @@ class AstronomyShow(models.Model):
     def __str__(self):
         return self.title
 
+    def clean(self):
+        if self.pk is None:
+            return
+        # Lengthening the show only moves the ends of its sessions, so
+        # they can only run into sessions starting after them.
+        later_session = ShowSession.objects.filter(
+            planetarium_dome=models.OuterRef("planetarium_dome"),
+            show_time__gt=models.OuterRef("show_time"),
+            show_time__lt=models.OuterRef("show_time")
+            + timedelta(minutes=self.duration),
+        )
+        if self.showsession_set.filter(models.Exists(later_session)).exists():
+            raise ValidationError({
+                "duration": "Sessions of this show would overlap the next "
+                            "sessions in their domes."
+            })
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if not adding and (
+                update_fields is None or "duration" in update_fields
+            ):
+                end_time = models.F("show_time") + timedelta(
+                    minutes=self.duration
+                )
+                self.showsession_set.exclude(end_time=end_time).update(
+                    end_time=end_time
+                )
+
 
 class ShowSession(models.Model):
     show_time = models.DateTimeField()
+    end_time = models.DateTimeField(editable=False)
     astronomy_show = models.ForeignKey(
         AstronomyShow, on_delete=models.CASCADE
     )
@@ -58,6 +111,64 @@ class ShowSession(models.Model):
 
     class Meta:
         ordering = ["-show_time"]
+        indexes = [models.Index(fields=["show_time"])]
+        constraints = [
+            ExclusionConstraint(
+                name="exclude_overlapping_show_sessions",
+                expressions=[
+                    (
+                        TsTzRange("show_time", "end_time"),
+                        RangeOperators.OVERLAPS,
+                    ),
+                    ("planetarium_dome", RangeOperators.EQUAL),
+                ],
+                violation_error_message=(
+                    "The dome already has a session at this time."
+                ),
+            ),
+        ]
+
+    @staticmethod
+    def end_time_for(show_time, astronomy_show):
+        return show_time + timedelta(minutes=astronomy_show.duration)
+
+    @staticmethod
+    def tickets_available_expression():
+        """Seats left in each session, to annotate sessions with."""
+        return (
+            models.F("planetarium_dome__rows")
+            * models.F("planetarium_dome__seats_in_row")
+            - Coalesce(models.Subquery(
+                # Matching show_time lets PostgreSQL scan only the
+                # session's partition when tickets are partitioned.
+                Ticket.objects.filter(
+                    show_session=models.OuterRef("pk"),
+                    show_time=models.OuterRef("show_time"),
+                )
+                .order_by()
+                .values("show_session")
+                .annotate(count=models.Count("*"))
+                .values("count")
+            ), models.Value(0))
+        )
+
+    def save(self, *args, **kwargs):
+        self.show_time = self._meta.get_field("show_time").to_python(
+            self.show_time
+        )
+        self.end_time = ShowSession.end_time_for(
+            self.show_time, self.astronomy_show
+        )
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "show_time" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "end_time"}
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if not adding:
+            # Keeps tickets in the partition of the session's new month.
+            self.tickets.exclude(show_time=self.show_time).update(
+                show_time=self.show_time
+            )
 
     def __str__(self):
         return f"{self.astronomy_show.title} {self.show_time}"
@@ -74,6 +185,7 @@ class Reservation(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["created_at"])]
 
 
 class Ticket(models.Model):
@@ -85,6 +197,9 @@ class Ticket(models.Model):
     )
     row = models.IntegerField()
     seat = models.IntegerField()
+    # Copy of show_session.show_time, the key the table can be
+    # partitioned by (see manage.py partition_tickets).
+    show_time = models.DateTimeField(editable=False)
 
     @staticmethod
     def validate_ticket(row, seat, planetarium_dome, error_to_raise):
@@ -123,6 +238,7 @@ class Ticket(models.Model):
             using=None,
             update_fields=None,
     ):
+        self.show_time = self.show_session.show_time
         self.full_clean()
         return super(Ticket, self).save(
             force_insert, force_update, using, update_fields
@@ -136,3 +252,90 @@ class Ticket(models.Model):
     class Meta:
         unique_together = ("show_session", "row", "seat")
         ordering = ["row", "seat"]
+
+
+class Job(models.Model):
+    class Status(models.TextChoices):
+        QUEUED = "queued"
+        RUNNING = "running"
+        SUCCEEDED = "succeeded"
+        FAILED = "failed"
+
+    task = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.QUEUED
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=255, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["run_at"]
+        indexes = [
+            models.Index(
+                fields=["run_at"],
+                name="job_queued_run_at_idx",
+                condition=models.Q(status="queued"),
+            ),
+            models.Index(
+                fields=["locked_at"],
+                name="job_running_locked_at_idx",
+                condition=models.Q(status="running"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} ({self.status})"
+
+
+class IdempotencyKey(models.Model):
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE
+    )
+    key = models.CharField(max_length=255)
+    request_fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    response_body = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ("user", "key")
+
+    def __str__(self):
+        return self.key
+
+
+class RequestProfile(models.Model):
+    class Trigger(models.TextChoices):
+        HEADER = "header"
+        SAMPLE = "sample"
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2048)
+    view_name = models.CharField(max_length=255, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    duration = models.FloatField(help_text="Wall time in milliseconds")
+    trigger = models.CharField(max_length=16, choices=Trigger.choices)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+    )
+    summary = models.TextField()
+    stats = models.BinaryField()
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration:.0f} ms)"
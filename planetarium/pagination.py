@@ -0,0 +1,140 @@
+import json
+
+from django.conf import settings
+from django.core.paginator import (
+    EmptyPage,
+    Page,
+    PageNotAnInteger,
+    Paginator,
+)
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+
+def estimated_count(queryset):
+    """Return the planner's row estimate for a queryset, or ``None``.
+
+    The estimate comes from EXPLAIN, which scales the table statistics
+    (``pg_class.reltuples``) to the table's current size and applies the
+    query's filters; it is only available on PostgreSQL.
+    """
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_rows(queryset, threshold=None):
+    """Count a queryset, estimating when that is cheaper.
+
+    Returns ``(count, is_estimate)``. Exact counts are used up to
+    ``threshold`` estimated rows, where COUNT(*) is still fast and the
+    estimate is least reliable.
+    """
+    if threshold is None:
+        threshold = settings.ESTIMATED_COUNT_THRESHOLD
+    if hasattr(queryset, "explain"):
+        estimate = estimated_count(queryset)
+        if estimate is not None and estimate > threshold:
+            return estimate, True
+    try:
+        return queryset.count(), False
+    except (AttributeError, TypeError):
+        return len(queryset), False
+
+
+class EstimatedPage(Page):
+    """A page that knows whether more rows follow without the total."""
+
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+    def start_index(self):
+        if not self.object_list:
+            return 0
+        return self.paginator.per_page * (self.number - 1) + 1
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator counting large querysets from planner estimates.
+
+    When the total is an estimate it is never used to bound pages:
+    every page fetches one row more than it shows to find out whether
+    another page follows, and only an empty page past the first is
+    out of range.
+    """
+
+    @cached_property
+    def _count(self):
+        return count_rows(self.object_list)
+
+    @property
+    def count(self):
+        return self._count[0]
+
+    @property
+    def count_is_estimate(self):
+        return self._count[1]
+
+    def validate_number(self, number):
+        if not self.count_is_estimate:
+            return super().validate_number(number)
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages["invalid_page"])
+        if number < 1:
+            raise EmptyPage(self.error_messages["min_page"])
+        return number
+
+    def page(self, number):
+        if not self.count_is_estimate:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(self.error_messages["no_results"])
+        return EstimatedPage(
+            rows[:self.per_page], number, self, len(rows) > self.per_page
+        )
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """Page number pagination that estimates the total of large lists.
+
+    Responses say whether ``count`` is exact in ``count_is_estimate``;
+    ``next`` links follow the rows that are actually there, so every
+    row stays reachable when the estimate is too low.
+    """
+
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        return Response({
+            "count": self.page.paginator.count,
+            "count_is_estimate": self.page.paginator.count_is_estimate,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["required"].append("count_is_estimate")
+        response_schema["properties"]["count_is_estimate"] = {
+            "type": "boolean",
+            "example": False,
+        }
+        return response_schema
@@ -0,0 +1,175 @@
+import logging
+from datetime import UTC, datetime
+
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+TABLE = "planetarium_ticket"
+DEFAULT_PARTITION = f"{TABLE}_default"
+SEQUENCE = f"{TABLE}_partitioned_id_seq"
+COLUMNS = (
+    "id", "row", "seat", "reservation_id", "show_session_id", "show_time"
+)
+
+
+def month_start(moment):
+    return datetime(moment.year, moment.month, 1, tzinfo=UTC)
+
+
+def next_month(moment):
+    if moment.month == 12:
+        return moment.replace(year=moment.year + 1, month=1)
+    return moment.replace(month=moment.month + 1)
+
+
+def partition_name(month):
+    return f"{TABLE}_y{month.year}m{month.month:02d}"
+
+
+def is_partitioned(cursor):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table "
+        "WHERE partrelid = to_regclass(%s)",
+        [TABLE],
+    )
+    return cursor.fetchone() is not None
+
+
+def existing_partitions(cursor):
+    cursor.execute(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass(%s)",
+        [TABLE],
+    )
+    return {name for name, in cursor.fetchall()}
+
+
+def create_partition(cursor, month):
+    """Attach the partition of one show month.
+
+    Tickets of that month already in the default partition are moved
+    into the new table before it is attached, as PostgreSQL requires.
+    """
+    name = partition_name(month)
+    start, end = month_start(month), next_month(month_start(month))
+    columns = ", ".join(f'"{column}"' for column in COLUMNS)
+    cursor.execute(
+        f'CREATE TABLE "{name}" '
+        f'(LIKE "{TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+    )
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" '
+        f"WHERE show_time >= %s AND show_time < %s RETURNING {columns}) "
+        f'INSERT INTO "{name}" ({columns}) SELECT {columns} FROM moved',
+        [start, end],
+    )
+    cursor.execute(
+        f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" '
+        f"FOR VALUES FROM (%s) TO (%s)",
+        [start, end],
+    )
+    return name
+
+
+def ensure_partitions(months_ahead=3, since=None):
+    """Create the monthly partitions missing up to ``months_ahead``.
+
+    Does nothing (and returns ``[]``) unless the ticket table has been
+    partitioned with ``manage.py partition_tickets``.
+    """
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return created
+        existing = existing_partitions(cursor)
+        month = month_start(since or datetime.now(UTC))
+        last = month_start(datetime.now(UTC))
+        for _ in range(months_ahead):
+            last = next_month(last)
+        last = max(last, month)
+        while month <= last:
+            if partition_name(month) not in existing:
+                created.append(create_partition(cursor, month))
+            month = next_month(month)
+    if created:
+        logger.info("Created ticket partitions %s", ", ".join(created))
+    return created
+
+
+def convert(months_ahead=3, keep_old=False):
+    """Turn the ticket table into one partitioned by show month.
+
+    Copies every ticket under an exclusive lock in one transaction, so
+    it is meant for a maintenance window. Ids carry on from the old
+    table. The primary key and the seat constraint include show_time,
+    as PostgreSQL requires of partitioned tables; a session has a single
+    show_time, so seats stay unique per session.
+
+    The new constraints are made here, not by migrations, so Django's
+    migration state still describes the old table. Later migrations
+    that change the ticket's primary key, ``unique_together`` or
+    foreign keys must do so in ``RunSQL`` wrapped in
+    ``SeparateDatabaseAndState``.
+
+    Listing a reservation's tickets filters on ``reservation_id``
+    alone, so it probes that index in every partition; pruning those
+    lookups would need the show times on the reservation and is left
+    out.
+    """
+    old = f"{TABLE}_unpartitioned"
+    columns = ", ".join(f'"{column}"' for column in COLUMNS)
+    with transaction.atomic(), connection.cursor() as cursor:
+        if is_partitioned(cursor):
+            return False
+        # Pending foreign key checks would keep the old table in use.
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(f'LOCK TABLE "{TABLE}" IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{old}"')
+        cursor.execute(
+            f'ALTER TABLE "{old}" '
+            f'RENAME CONSTRAINT "{TABLE}_pkey" TO "{old}_pkey"'
+        )
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{old}" INCLUDING DEFAULTS) '
+            f"PARTITION BY RANGE (show_time)"
+        )
+        cursor.execute(f'CREATE SEQUENCE "{SEQUENCE}" OWNED BY "{TABLE}".id')
+        cursor.execute(
+            f"SELECT setval(%s, COALESCE((SELECT MAX(id) FROM \"{old}\"), 0)"
+            f" + 1, false)",
+            [SEQUENCE],
+        )
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" '
+            f"ALTER COLUMN id SET DEFAULT nextval('\"{SEQUENCE}\"'), "
+            f'ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY (id, show_time), '
+            f'ADD CONSTRAINT "{TABLE}_seat_uniq" '
+            f'UNIQUE (show_session_id, "row", seat, show_time), '
+            f'ADD CONSTRAINT "{TABLE}_reservation_id_fk" '
+            f"FOREIGN KEY (reservation_id) "
+            f"REFERENCES planetarium_reservation (id) "
+            f"DEFERRABLE INITIALLY DEFERRED, "
+            f'ADD CONSTRAINT "{TABLE}_show_session_id_fk" '
+            f"FOREIGN KEY (show_session_id) "
+            f"REFERENCES planetarium_showsession (id) "
+            f"DEFERRABLE INITIALLY DEFERRED"
+        )
+        cursor.execute(
+            f'CREATE INDEX "{TABLE}_reservation_id_part_idx" '
+            f'ON "{TABLE}" (reservation_id)'
+        )
+        cursor.execute(
+            f'CREATE TABLE "{DEFAULT_PARTITION}" '
+            f'PARTITION OF "{TABLE}" DEFAULT'
+        )
+        cursor.execute(f'SELECT MIN(show_time) FROM "{old}"')
+        (oldest,) = cursor.fetchone()
+        ensure_partitions(months_ahead, since=oldest)
+        cursor.execute(
+            f'INSERT INTO "{TABLE}" ({columns}) SELECT {columns} FROM "{old}"'
+        )
+        if not keep_old:
+            cursor.execute(f'DROP TABLE "{old}"')
+    return True
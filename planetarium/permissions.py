@@ -11,3 +11,11 @@ class IsAdminOrIfAuthenticatedReadOnly(BasePermission):
             )
             or (request.user and request.user.is_staff)
         )
+
+
+class CanViewMetrics(BasePermission):
+    def has_permission(self, request, view):
+        return bool(
+            request.auth == "metrics"
+            or (request.user and request.user.is_staff)
+        )
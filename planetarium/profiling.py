@@ -0,0 +1,55 @@
+import io
+import marshal
+import pstats
+
+from django.conf import settings
+from django.core import signing
+
+from planetarium.models import RequestProfile
+
+HEADER = "X-Profile"
+SALT = "planetarium.profiling"
+SUMMARY_LINES = 40
+
+
+def make_token(user):
+    """Sign a profiling header value for a staff member."""
+    return signing.TimestampSigner(salt=SALT).sign(str(user.pk))
+
+
+def token_user_id(token):
+    """Return the id of the staff member a valid token was issued to."""
+    try:
+        return int(
+            signing.TimestampSigner(salt=SALT).unsign(
+                token, max_age=settings.PROFILING_TOKEN_MAX_AGE
+            )
+        )
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def save_profile(profiler, request, response, duration, trigger, user_id):
+    profiler.create_stats()
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats(
+        "cumulative"
+    ).print_stats(SUMMARY_LINES)
+    match = request.resolver_match
+    profile = RequestProfile.objects.create(
+        method=request.method,
+        path=request.path,
+        view_name=match.view_name if match else "",
+        status_code=response.status_code,
+        duration=duration * 1000,
+        trigger=trigger,
+        requested_by_id=user_id,
+        summary=summary.getvalue(),
+        # The format of pstats.dump_stats(), readable by snakeviz etc.
+        stats=marshal.dumps(profiler.stats),
+    )
+    stale = RequestProfile.objects.order_by("-created_at").values_list(
+        "id", flat=True
+    )[settings.PROFILING_MAX_PROFILES:]
+    RequestProfile.objects.filter(id__in=list(stale)).delete()
+    return profile
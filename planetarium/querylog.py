@@ -0,0 +1,158 @@
+import hashlib
+import logging
+import os
+import re
+import sys
+import time
+
+from django.conf import settings
+
+from planetarium.store import get_store
+
+logger = logging.getLogger("planetarium.slow_queries")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS slow_query (
+    fingerprint TEXT PRIMARY KEY,
+    sql TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    total_ms REAL NOT NULL,
+    max_ms REAL NOT NULL,
+    path TEXT,
+    view TEXT,
+    call_site TEXT,
+    last_seen REAL NOT NULL
+);
+"""
+
+PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)")
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+WHITESPACE = re.compile(r"\s+")
+
+PROJECT_DIR = str(settings.BASE_DIR) + os.sep
+# Frames of this module and of the other execute wrappers.
+IGNORED_FILES = {
+    __file__,
+    os.path.join(os.path.dirname(__file__), "middleware.py"),
+}
+LIBRARY_DIRS = tuple(
+    path for path in sys.path if "site-packages" in path
+) + (os.path.dirname(os.__file__),)
+
+
+def normalize_sql(sql):
+    """Strip values out of a statement so its variants group together."""
+    sql = STRING_LITERAL.sub("?", sql)
+    sql = NUMBER.sub("?", sql)
+    sql = PLACEHOLDER_LIST.sub("(...)", sql)
+    return WHITESPACE.sub(" ", sql).strip()
+
+
+def call_site(frame):
+    """Describe where in the project a query was issued from.
+
+    Returns the innermost project frame outside this module and, if the
+    query ran while a serializer was rendering a field, that field.
+    """
+    location = field = None
+    while frame is not None:
+        code = frame.f_code
+        filename = code.co_filename
+        if (
+            field is None
+            and code.co_name == "to_representation"
+            and "field" in frame.f_locals
+            and "rest_framework" in filename
+        ):
+            serializer = frame.f_locals.get("self")
+            field_name = getattr(frame.f_locals["field"], "field_name", None)
+            field = f"{type(serializer).__name__}.{field_name}"
+        if (
+            location is None
+            and filename.startswith(PROJECT_DIR)
+            and not filename.startswith(LIBRARY_DIRS)
+            and filename not in IGNORED_FILES
+        ):
+            relative = os.path.relpath(filename, settings.BASE_DIR)
+            location = f"{relative}:{frame.f_lineno} in {code.co_name}"
+        if location is not None and field is not None:
+            break
+        frame = frame.f_back
+    return " / ".join(part for part in (location, field) if part) or None
+
+
+def record(sql, duration_ms, path, view, site):
+    normalized = normalize_sql(sql)
+    fingerprint = hashlib.sha1(normalized.encode()).hexdigest()[:16]
+    logger.warning(
+        "Slow query (%.1f ms) on %s [%s] from %s: %s",
+        duration_ms, path, view, site, normalized,
+    )
+    store = get_store()
+    store.ensure_schema("slow_queries", SCHEMA)
+    with store.transaction() as connection:
+        connection.execute(
+            "INSERT INTO slow_query (fingerprint, sql, count, total_ms, "
+            "max_ms, path, view, call_site, last_seen) "
+            "VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (fingerprint) DO UPDATE SET "
+            "count = count + 1, total_ms = total_ms + excluded.total_ms, "
+            "max_ms = MAX(max_ms, excluded.max_ms), path = excluded.path, "
+            "view = excluded.view, call_site = excluded.call_site, "
+            "last_seen = excluded.last_seen",
+            (
+                fingerprint, normalized, duration_ms, duration_ms,
+                path, view, site, time.time(),
+            ),
+        )
+
+
+class SlowQueryRecorder:
+    """``execute_wrapper`` logging queries slower than the threshold."""
+
+    def __init__(self, path, view, threshold_ms):
+        self.path = path
+        self.view = view
+        self.threshold_ms = threshold_ms
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            if duration_ms >= self.threshold_ms:
+                try:
+                    record(
+                        sql,
+                        duration_ms,
+                        self.path,
+                        self.view(),
+                        call_site(sys._getframe(1)),
+                    )
+                except Exception:
+                    logger.exception("Could not record a slow query")
+
+
+def top_queries(order="total", limit=20):
+    store = get_store()
+    store.ensure_schema("slow_queries", SCHEMA)
+    order_by = {
+        "total": "total_ms",
+        "max": "max_ms",
+        "count": "count",
+        "mean": "total_ms / count",
+    }[order]
+    return store.connection.execute(
+        "SELECT fingerprint, sql, count, total_ms, max_ms, path, view, "
+        f"call_site FROM slow_query ORDER BY {order_by} DESC LIMIT ?",
+        (limit,),
+    ).fetchall()
+
+
+def reset():
+    store = get_store()
+    store.ensure_schema("slow_queries", SCHEMA)
+    with store.transaction() as connection:
+        connection.execute("DELETE FROM slow_query")
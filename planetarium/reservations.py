@@ -0,0 +1,211 @@
+from django.db import IntegrityError, transaction
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException, ValidationError
+
+from planetarium.caching import invalidate_calendars, invalidate_seat_maps
+from planetarium.models import Reservation, ShowSession, Ticket
+from planetarium.serializers import ReservationSerializer
+
+MAX_BATCH_RESERVATIONS = 100
+
+
+class BatchConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = (
+        "Some seats were booked by another request meanwhile; "
+        "nothing was created, retry the batch."
+    )
+    default_code = "conflict"
+
+
+class BatchTicketSerializer(serializers.Serializer):
+    row = serializers.IntegerField()
+    seat = serializers.IntegerField()
+    show_session = serializers.IntegerField()
+
+
+class BatchReservationSerializer(serializers.Serializer):
+    tickets = BatchTicketSerializer(many=True, allow_empty=False)
+
+
+class ReservationBatchSerializer(serializers.Serializer):
+    atomic = serializers.BooleanField(
+        default=True,
+        help_text="Create all reservations or none of them; "
+                  "with false, the valid ones are created.",
+    )
+    reservations = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=MAX_BATCH_RESERVATIONS,
+    )
+
+
+def _ticket_errors(tickets, sessions, taken):
+    """Return DRF-style errors for a reservation's tickets, or ``None``."""
+    errors = []
+    seats = set()
+    for ticket in tickets:
+        session = sessions.get(ticket["show_session"])
+        seat = (ticket["show_session"], ticket["row"], ticket["seat"])
+        error = {}
+        if session is None:
+            error["show_session"] = [
+                f'Invalid pk "{ticket["show_session"]}" '
+                f"- object does not exist."
+            ]
+        else:
+            try:
+                Ticket.validate_ticket(
+                    ticket["row"],
+                    ticket["seat"],
+                    session.planetarium_dome,
+                    ValidationError,
+                )
+            except ValidationError as exc:
+                error.update(exc.detail)
+            if not error and (seat in taken or seat in seats):
+                error["non_field_errors"] = ["The seat is already taken."]
+        seats.add(seat)
+        errors.append(error)
+    if any(errors):
+        return {"tickets": errors}
+    return None
+
+
+def _create(user, accepted, sessions):
+    """Insert the ``accepted`` reservations, mapped by their index."""
+    reservations = Reservation.objects.bulk_create(
+        Reservation(user=user) for _ in accepted
+    )
+    Ticket.objects.bulk_create(
+        Ticket(
+            reservation=reservation,
+            show_session=sessions[ticket["show_session"]],
+            show_time=sessions[ticket["show_session"]].show_time,
+            row=ticket["row"],
+            seat=ticket["seat"],
+        )
+        for reservation, tickets in zip(reservations, accepted.values())
+        for ticket in tickets
+    )
+    return dict(zip(accepted, reservations))
+
+
+def _create_each(user, accepted, sessions, results):
+    """Insert reservations one by one, each in its own savepoint.
+
+    Items whose seats were booked meanwhile get a 409 result.
+    """
+    created = {}
+    for index, tickets in accepted.items():
+        try:
+            with transaction.atomic():
+                created.update(_create(user, {index: tickets}, sessions))
+        except IntegrityError:
+            results[index].update(
+                status=409, errors={"detail": BatchConflict.default_detail}
+            )
+    return created
+
+
+def book_reservations(user, items, atomic=True):
+    """Validate and book many reservations with a few bulk queries.
+
+    Returns one result per item, in order, each with an HTTP-like
+    ``status``: 201 with the reservation, 400 with its errors, or (when
+    ``atomic`` and another item failed) 424 for items that were valid
+    but not created. Without ``atomic``, an item whose seats another
+    request booked meanwhile gets 409 and the others are still created.
+    """
+    results = [{"index": index} for index in range(len(items))]
+    parsed = {}
+    for index, item in enumerate(items):
+        serializer = BatchReservationSerializer(data=item)
+        if serializer.is_valid():
+            parsed[index] = serializer.validated_data["tickets"]
+        else:
+            results[index].update(status=400, errors=serializer.errors)
+
+    session_ids = {
+        ticket["show_session"]
+        for tickets in parsed.values()
+        for ticket in tickets
+    }
+    try:
+        with transaction.atomic():
+            # Locking the sessions makes concurrent batches for the same
+            # shows queue up, so the taken-seat check below stays true
+            # until the tickets are inserted.
+            sessions = (
+                ShowSession.objects.select_for_update(of=("self",))
+                .select_related("planetarium_dome")
+                .in_bulk(session_ids)
+            )
+            taken = set(
+                Ticket.objects.filter(
+                    show_session__in=session_ids,
+                    show_time__in={
+                        session.show_time for session in sessions.values()
+                    },
+                ).values_list("show_session_id", "row", "seat")
+            )
+
+            accepted = {}
+            for index, tickets in parsed.items():
+                errors = _ticket_errors(tickets, sessions, taken)
+                if errors:
+                    results[index].update(status=400, errors=errors)
+                    continue
+                accepted[index] = tickets
+                taken.update(
+                    (ticket["show_session"], ticket["row"], ticket["seat"])
+                    for ticket in tickets
+                )
+
+            if atomic and len(accepted) < len(items):
+                for index in accepted:
+                    results[index].update(
+                        status=424,
+                        errors={
+                            "detail": "Not created because another "
+                                      "reservation in the batch failed."
+                        },
+                    )
+                return results
+
+            if atomic:
+                created = _create(user, accepted, sessions)
+            else:
+                try:
+                    with transaction.atomic():
+                        created = _create(user, accepted, sessions)
+                except IntegrityError:
+                    created = _create_each(user, accepted, sessions, results)
+            booked = {
+                ticket["show_session"]
+                for index in created
+                for ticket in accepted[index]
+            }
+            invalidate_seat_maps(booked)
+            invalidate_calendars(
+                {sessions[session_id].astronomy_show_id
+                 for session_id in booked}
+            )
+    except IntegrityError:
+        raise BatchConflict()
+
+    reservations = list(
+        Reservation.objects.filter(
+            pk__in=[reservation.pk for reservation in created.values()]
+        ).prefetch_related("tickets")
+    )
+    data = {
+        reservation.pk: reservation_data
+        for reservation, reservation_data in zip(
+            reservations, ReservationSerializer(reservations, many=True).data
+        )
+    }
+    for index, reservation in created.items():
+        results[index].update(status=201, reservation=data[reservation.pk])
+    return results
@@ -0,0 +1,88 @@
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+from planetarium.models import ShowSession
+
+MAX_SCHEDULED_SESSIONS = 5000
+
+
+class IntervalIndex:
+    """Non-overlapping half-open time intervals, kept sorted per dome.
+
+    Because intervals in one dome never overlap, sorting them by start
+    also sorts them by end, so an overlap check only has to look at the
+    last interval starting before the candidate ends. Lookups bisect in
+    O(log n); inserts find their place the same way but shift the rest
+    of the dome's list, which is O(n) though only a memmove.
+    """
+
+    def __init__(self):
+        self._intervals = defaultdict(list)
+
+    def overlaps(self, dome_id, start, end):
+        intervals = self._intervals[dome_id]
+        position = bisect_left(intervals, (end,))
+        return position > 0 and intervals[position - 1][1] > start
+
+    def add(self, dome_id, start, end):
+        insort(self._intervals[dome_id], (start, end))
+
+    @classmethod
+    def for_sessions(cls, dome_ids, start, end):
+        """Index the existing sessions of some domes within a period."""
+        index = cls()
+        sessions = ShowSession.objects.filter(
+            planetarium_dome__in=dome_ids,
+            show_time__lt=end,
+            end_time__gt=start,
+        ).values_list("planetarium_dome_id", "show_time", "end_time")
+        for dome_id, show_time, end_time in sessions:
+            index.add(dome_id, show_time, end_time)
+        return index
+
+
+def expand_schedule(start_date, end_date, weekdays, times, domes, duration):
+    """Return ``(dome, show_time, end_time)`` for every occurrence.
+
+    Weekdays use ``date.weekday()`` numbering (0 is Monday); times are
+    wall-clock times in the current time zone and ``duration`` is in
+    minutes.
+    """
+    weekdays = set(weekdays)
+    times = sorted(set(times))
+    length = timedelta(minutes=duration)
+    current_timezone = timezone.get_current_timezone()
+    occurrences = []
+    day = start_date
+    while day <= end_date:
+        if day.weekday() in weekdays:
+            for time in times:
+                show_time = timezone.make_aware(
+                    datetime.combine(day, time), current_timezone
+                )
+                occurrences.extend(
+                    (dome, show_time, show_time + length) for dome in domes
+                )
+        day += timedelta(days=1)
+    return occurrences
+
+
+def find_clashes(occurrences):
+    """Return the occurrences that overlap a session or each other."""
+    if not occurrences:
+        return []
+    index = IntervalIndex.for_sessions(
+        {dome.id for dome, _, _ in occurrences},
+        min(show_time for _, show_time, _ in occurrences),
+        max(end_time for _, _, end_time in occurrences),
+    )
+    clashes = []
+    for dome, show_time, end_time in occurrences:
+        if index.overlaps(dome.id, show_time, end_time):
+            clashes.append((dome, show_time, end_time))
+        else:
+            index.add(dome.id, show_time, end_time)
+    return clashes
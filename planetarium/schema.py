@@ -0,0 +1,148 @@
+import gzip
+import hashlib
+import json
+import os
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from drf_spectacular.generators import SchemaGenerator
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SpectacularAPIView
+from rest_framework import status
+from rest_framework.response import Response
+
+MANIFEST = "manifest.json"
+RENDERERS = {"yaml": OpenApiYamlRenderer, "json": OpenApiJsonRenderer}
+
+
+def build(directory):
+    """Write the schema in every format, plain and gzipped, with ETags.
+
+    File names carry the API version and a content hash, and the
+    manifest is replaced last, so a running server never sees a half
+    written schema.
+    """
+    os.makedirs(directory, exist_ok=True)
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    version = spectacular_settings.VERSION or "0"
+    manifest = {"version": version, "formats": {}}
+    for name, renderer in RENDERERS.items():
+        content = renderer().render(schema, renderer_context={})
+        digest = hashlib.sha256(content).hexdigest()
+        filename = f"schema-{version}-{digest[:12]}.{name}"
+        with open(os.path.join(directory, filename), "wb") as output:
+            output.write(content)
+        with open(os.path.join(directory, filename + ".gz"), "wb") as output:
+            output.write(gzip.compress(content, mtime=0))
+        manifest["formats"][name] = {
+            "file": filename,
+            "etag": f'"{digest[:32]}"',
+        }
+
+    temporary = os.path.join(directory, MANIFEST + ".tmp")
+    with open(temporary, "w") as output:
+        json.dump(manifest, output, indent=2)
+    os.replace(temporary, os.path.join(directory, MANIFEST))
+
+    current = {
+        entry["file"] + suffix
+        for entry in manifest["formats"].values()
+        for suffix in ("", ".gz")
+    }
+    for filename in os.listdir(directory):
+        if filename.startswith("schema-") and filename not in current:
+            os.remove(os.path.join(directory, filename))
+    return manifest
+
+
+def accepts_gzip(accept_encoding):
+    """Whether an ``Accept-Encoding`` header allows a gzip response.
+
+    Codings given ``q=0`` are refused; ``*`` stands for any coding not
+    listed by name.
+    """
+    qualities = {}
+    for coding in accept_encoding.split(","):
+        name, *params = [part.strip() for part in coding.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            qualities[name.lower()] = quality
+    quality = qualities.get("gzip", qualities.get("x-gzip"))
+    if quality is None:
+        quality = qualities.get("*", 0.0)
+    return quality > 0
+
+
+class SchemaArtifact:
+    def __init__(self, directory, entry):
+        path = os.path.join(directory, entry["file"])
+        with open(path, "rb") as content:
+            self.content = content.read()
+        with open(path + ".gz", "rb") as gzipped:
+            self.gzipped = gzipped.read()
+        self.etag = entry["etag"]
+
+    def response(self, request, media_type):
+        if self.etag in request.headers.get("If-None-Match", ""):
+            response = HttpResponseNotModified()
+        elif accepts_gzip(request.headers.get("Accept-Encoding", "")):
+            response = HttpResponse(self.gzipped, content_type=media_type)
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(self.content, content_type=media_type)
+        response["ETag"] = self.etag
+        response["Cache-Control"] = "public, no-cache"
+        patch_vary_headers(response, ("Accept", "Accept-Encoding"))
+        return response
+
+
+_artifacts = {}
+
+
+def load(directory, name):
+    """Return the built schema in one format, re-read when rebuilt."""
+    try:
+        mtime = os.stat(os.path.join(directory, MANIFEST)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    key = (directory, name)
+    cached = _artifacts.get(key)
+    if cached is None or cached[0] != mtime:
+        with open(os.path.join(directory, MANIFEST)) as manifest:
+            entry = json.load(manifest)["formats"].get(name)
+        if entry is None:
+            return None
+        cached = _artifacts[key] = (mtime, SchemaArtifact(directory, entry))
+    return cached[1]
+
+
+class PrecomputedSchemaView(SpectacularAPIView):
+    """Serve the schema written by ``manage.py build_schema``.
+
+    Only in DEBUG is the schema generated on each request, so it follows
+    code changes during development.
+    """
+
+    @extend_schema(exclude=True)
+    def get(self, request, *args, **kwargs):
+        if settings.DEBUG:
+            return super().get(request, *args, **kwargs)
+        artifact = load(
+            str(settings.SCHEMA_ARTIFACT_DIR), request.accepted_renderer.format
+        )
+        if artifact is None:
+            return Response(
+                {"detail": "The API schema has not been built."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        return artifact.response(request, request.accepted_media_type)
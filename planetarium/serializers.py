@@ -1,7 +1,9 @@
 from django.db import transaction
-from rest_framework import serializers
-from rest_framework.exceptions import ValidationError
+from drf_spectacular.utils import extend_schema_field
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException, ValidationError
 
+from planetarium.caching import invalidate_calendars, seat_map
 from planetarium.models import (
     ShowTheme,
     AstronomyShow,
@@ -9,10 +11,46 @@ from planetarium.models import (
     ShowSession,
     Ticket,
     Reservation,
+    RequestProfile,
+)
+from planetarium.scheduling import (
+    MAX_SCHEDULED_SESSIONS,
+    expand_schedule,
+    find_clashes,
 )
 from user.serializers import UserSerializer
 
 
+class RenditionImageField(serializers.ImageField):
+    """Image field represented by one of the image's renditions.
+
+    Falls back to the original file until the renditions are built.
+    Clients that accept WebP can ask for it with ``?image_format=webp``.
+    """
+
+    def __init__(self, rendition, **kwargs):
+        self.rendition = rendition
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+
+        request = self.context.get("request", None)
+        image_format = "jpeg"
+        if request is not None and request.GET.get("image_format") == "webp":
+            image_format = "webp"
+
+        renditions = value.instance.image_renditions.get(self.rendition, {})
+        if image_format not in renditions:
+            return super().to_representation(value)
+
+        url = value.storage.url(renditions[image_format]["name"])
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+
 class ShowThemeSerializer(serializers.ModelSerializer):
     class Meta:
         model = ShowTheme
@@ -23,18 +61,56 @@ class AstronomyShowSerializer(serializers.ModelSerializer):
     theme = serializers.SlugRelatedField(
         many=True, read_only=True, slug_field="name"
     )
+    image = RenditionImageField(
+        rendition="medium", required=False, allow_null=True
+    )
 
     class Meta:
         model = AstronomyShow
-        fields = ("id", "title", "theme", "description", "image")
+        fields = (
+            "id",
+            "title",
+            "theme",
+            "description",
+            "duration",
+            "image",
+        )
 
 
 class AstronomyShowDetailSerializer(serializers.ModelSerializer):
     theme = ShowThemeSerializer(many=True, read_only=True)
+    image_renditions = serializers.SerializerMethodField()
 
     class Meta:
         model = AstronomyShow
-        fields = ("id", "title", "description", "image", "theme")
+        fields = (
+            "id",
+            "title",
+            "description",
+            "duration",
+            "image",
+            "image_width",
+            "image_height",
+            "image_renditions",
+            "theme",
+        )
+
+    def get_image_renditions(self, astronomy_show) -> dict:
+        request = self.context.get("request", None)
+        storage = astronomy_show.image.storage
+        renditions = {}
+        for size, formats in astronomy_show.image_renditions.items():
+            renditions[size] = {}
+            for image_format, rendition in formats.items():
+                url = storage.url(rendition["name"])
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                renditions[size][image_format] = {
+                    "url": url,
+                    "width": rendition["width"],
+                    "height": rendition["height"],
+                }
+        return renditions
 
 
 class AstronomyShowImageSerializer(serializers.ModelSerializer):
@@ -52,15 +128,49 @@ class PlanetariumDomeSerializer(serializers.ModelSerializer):
 class ShowSessionSerializer(serializers.ModelSerializer):
     class Meta:
         model = ShowSession
-        fields = ("id", "show_time", "astronomy_show", "planetarium_dome")
+        fields = (
+            "id",
+            "show_time",
+            "end_time",
+            "astronomy_show",
+            "planetarium_dome",
+        )
+
+    def validate(self, attrs):
+        data = super(ShowSessionSerializer, self).validate(attrs=attrs)
+        instance = self.instance
+        show_time = attrs.get(
+            "show_time", getattr(instance, "show_time", None)
+        )
+        astronomy_show = attrs.get(
+            "astronomy_show", getattr(instance, "astronomy_show", None)
+        )
+        planetarium_dome = attrs.get(
+            "planetarium_dome", getattr(instance, "planetarium_dome", None)
+        )
+        overlapping = ShowSession.objects.filter(
+            planetarium_dome=planetarium_dome,
+            show_time__lt=ShowSession.end_time_for(show_time, astronomy_show),
+            end_time__gt=show_time,
+        )
+        if instance is not None:
+            overlapping = overlapping.exclude(pk=instance.pk)
+        if overlapping.exists():
+            raise ValidationError(
+                {
+                    "show_time": "The dome already has a session "
+                                 "at this time."
+                }
+            )
+        return data
 
 
 class ShowSessionListSerializer(ShowSessionSerializer):
     astronomy_show_title = serializers.CharField(
         source="astronomy_show.title", read_only=True
     )
-    astronomy_show_image = serializers.ImageField(
-        source="astronomy_show.image", read_only=True
+    astronomy_show_image = RenditionImageField(
+        source="astronomy_show.image", rendition="small", read_only=True
     )
     planetarium_dome_name = serializers.CharField(
         source="planetarium_dome.name", read_only=True
@@ -83,6 +193,122 @@ class ShowSessionListSerializer(ShowSessionSerializer):
         )
 
 
+class CalendarSessionSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    show_time = serializers.DateTimeField()
+    planetarium_dome = serializers.IntegerField()
+    tickets_available = serializers.IntegerField()
+
+
+class CalendarDaySerializer(serializers.Serializer):
+    date = serializers.DateField()
+    tickets_available = serializers.IntegerField()
+    sessions = CalendarSessionSerializer(many=True)
+
+
+class AstronomyShowCalendarSerializer(serializers.Serializer):
+    astronomy_show = serializers.IntegerField()
+    month = serializers.CharField()
+    days = CalendarDaySerializer(many=True)
+
+
+class ScheduleClash(APIException):
+    """Sessions of a schedule overlap each other or existing ones.
+
+    Unlike a ValidationError, the detail keeps dome ids as numbers.
+    """
+
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_code = "clashes"
+
+    def __init__(self, clashes):
+        super().__init__()
+        self.detail = {
+            "clashes": [
+                {
+                    "planetarium_dome": dome.id,
+                    "show_time": show_time.isoformat(),
+                }
+                for dome, show_time, _ in clashes
+            ]
+        }
+
+
+class ShowSessionScheduleSerializer(serializers.Serializer):
+    astronomy_show = serializers.PrimaryKeyRelatedField(
+        queryset=AstronomyShow.objects.all()
+    )
+    planetarium_domes = serializers.PrimaryKeyRelatedField(
+        queryset=PlanetariumDome.objects.all(), many=True, allow_empty=False
+    )
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    weekdays = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6),
+        allow_empty=False,
+        default=list(range(7)),
+        help_text="Days of the week to schedule, 0 is Monday.",
+    )
+    times = serializers.ListField(
+        child=serializers.TimeField(), allow_empty=False
+    )
+
+    def validate(self, attrs):
+        if attrs["end_date"] < attrs["start_date"]:
+            raise ValidationError(
+                {"end_date": "end_date must not be before start_date."}
+            )
+
+        occurrences = expand_schedule(
+            attrs["start_date"],
+            attrs["end_date"],
+            attrs["weekdays"],
+            attrs["times"],
+            set(attrs["planetarium_domes"]),
+            attrs["astronomy_show"].duration,
+        )
+        if not occurrences:
+            raise ValidationError("The schedule has no occurrences.")
+        if len(occurrences) > MAX_SCHEDULED_SESSIONS:
+            raise ValidationError(
+                f"The schedule expands to {len(occurrences)} sessions; "
+                f"at most {MAX_SCHEDULED_SESSIONS} can be created at once."
+            )
+
+        clashes = find_clashes(occurrences)
+        if clashes:
+            raise ScheduleClash(clashes)
+
+        attrs["occurrences"] = occurrences
+        return attrs
+
+    def create(self, validated_data):
+        occurrences = validated_data["occurrences"]
+        with transaction.atomic():
+            # Serialise schedulers of the same domes, then re-check
+            # clashes now that nobody else can add sessions to them.
+            list(
+                PlanetariumDome.objects.select_for_update().filter(
+                    pk__in={dome.id for dome, _, _ in occurrences}
+                )
+            )
+            clashes = find_clashes(occurrences)
+            if clashes:
+                raise ScheduleClash(clashes)
+
+            show_sessions = ShowSession.objects.bulk_create(
+                ShowSession(
+                    show_time=show_time,
+                    end_time=end_time,
+                    astronomy_show=validated_data["astronomy_show"],
+                    planetarium_dome=dome,
+                )
+                for dome, show_time, end_time in occurrences
+            )
+            invalidate_calendars([validated_data["astronomy_show"].id])
+            return show_sessions
+
+
 class TicketSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
@@ -112,9 +338,7 @@ class TicketSeatsSerializer(TicketSerializer):
 class ShowSessionDetailSerializer(ShowSessionSerializer):
     astronomy_show = AstronomyShowSerializer(many=False, read_only=True)
     planetarium_dome = PlanetariumDomeSerializer(many=False, read_only=True)
-    taken_places = TicketSeatsSerializer(
-        source="tickets", many=True, read_only=True
-    )
+    taken_places = serializers.SerializerMethodField()
 
     class Meta:
         model = ShowSession
@@ -126,6 +350,13 @@ class ShowSessionDetailSerializer(ShowSessionSerializer):
             "taken_places"
         )
 
+    @extend_schema_field(TicketSeatsSerializer(many=True))
+    def get_taken_places(self, show_session):
+        return [
+            {"row": row, "seat": seat}
+            for row, seat in seat_map(show_session.id, show_session.show_time)
+        ]
+
 
 class ReservationSerializer(serializers.ModelSerializer):
     tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
@@ -153,3 +384,28 @@ class ReservationListSerializer(ReservationSerializer):
     class Meta:
         model = Reservation
         fields = ("id", "user", "tickets", "created_at")
+
+
+class RequestProfileListSerializer(serializers.ModelSerializer):
+    requested_by = serializers.EmailField(
+        source="requested_by.email", read_only=True, default=None
+    )
+
+    class Meta:
+        model = RequestProfile
+        fields = (
+            "id",
+            "created_at",
+            "method",
+            "path",
+            "view_name",
+            "status_code",
+            "duration",
+            "trigger",
+            "requested_by",
+        )
+
+
+class RequestProfileDetailSerializer(RequestProfileListSerializer):
+    class Meta(RequestProfileListSerializer.Meta):
+        fields = RequestProfileListSerializer.Meta.fields + ("summary",)
@@ -0,0 +1,30 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from planetarium import caching
+from planetarium.models import AstronomyShow, ShowSession, ShowTheme, Ticket
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def ticket_changed(sender, instance, **kwargs):
+    caching.invalidate_seat_maps([instance.show_session_id])
+    if Ticket.show_session.is_cached(instance):
+        caching.invalidate_calendars([instance.show_session.astronomy_show_id])
+    else:
+        caching.invalidate_session_calendars([instance.show_session_id])
+
+
+@receiver(post_save, sender=ShowSession)
+@receiver(post_delete, sender=ShowSession)
+def show_session_changed(sender, instance, **kwargs):
+    caching.invalidate_calendars([instance.astronomy_show_id])
+
+
+@receiver(post_save, sender=AstronomyShow)
+@receiver(post_delete, sender=AstronomyShow)
+@receiver(post_save, sender=ShowTheme)
+@receiver(post_delete, sender=ShowTheme)
+@receiver(m2m_changed, sender=AstronomyShow.theme.through)
+def catalog_changed(sender, **kwargs):
+    caching.invalidate_catalog()
@@ -0,0 +1,84 @@
+from drf_spectacular.openapi import AutoSchema
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework.exceptions import ValidationError
+
+FIELDS = "fields"
+OMIT = "omit"
+READ_METHODS = ("GET", "HEAD")
+
+
+def field_names(value):
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+class SparseFieldsSchema(AutoSchema):
+    def get_override_parameters(self):
+        parameters = super().get_override_parameters()
+        if self.method != "GET" or self.view.action not in (
+            "list", "retrieve"
+        ):
+            return parameters
+        return [
+            *parameters,
+            OpenApiParameter(
+                name=FIELDS,
+                description="Only include these fields "
+                            "(e.g., ?fields=id,title)",
+                required=False,
+                type=str,
+            ),
+            OpenApiParameter(
+                name=OMIT,
+                description="Leave these fields out "
+                            "(e.g., ?omit=description)",
+                required=False,
+                type=str,
+            ),
+        ]
+
+
+class SparseFieldsMixin:
+    """Let GET requests choose the fields of the response.
+
+    ``?fields=id,title`` keeps only the given top-level fields and
+    ``?omit=description`` drops some. Views call ``wants()`` in
+    ``get_queryset`` to skip the joins, annotations and columns that
+    only unrequested fields need.
+    """
+
+    schema = SparseFieldsSchema()
+
+    def requested_fields(self):
+        params = self.request.query_params
+        return (
+            field_names(params.get(FIELDS, "")),
+            field_names(params.get(OMIT, "")),
+        )
+
+    def wants(self, *names):
+        """Whether the response includes any of the fields ``names``."""
+        if self.request.method not in READ_METHODS:
+            return True
+        fields, omit = self.requested_fields()
+        return any(
+            (not fields or name in fields) and name not in omit
+            for name in names
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if self.request.method in READ_METHODS:
+            self.trim_fields(getattr(serializer, "child", serializer))
+        return serializer
+
+    def trim_fields(self, serializer):
+        fields, omit = self.requested_fields()
+        unknown = (fields | omit) - set(serializer.fields)
+        if unknown:
+            raise ValidationError({
+                FIELDS if unknown & fields else OMIT:
+                    f"Unknown fields: {', '.join(sorted(unknown))}."
+            })
+        for name in list(serializer.fields):
+            if not self.wants(name):
+                serializer.fields.pop(name)
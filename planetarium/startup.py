@@ -0,0 +1,144 @@
+import logging
+import os
+import threading
+import time
+
+from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
+from django.urls import get_resolver
+from django.utils import timezone
+
+from planetarium import caching
+from planetarium.models import ShowSession
+
+logger = logging.getLogger(__name__)
+
+state = {"warm": False, "error": None, "migrated": False}
+_warm_lock = threading.Lock()
+_warming_in_background = False
+WARM_UP_RETRY_INTERVAL = 5
+
+
+def check_database(alias="default"):
+    """Run a real query, raising ``OperationalError`` if it fails."""
+    connection = connections[alias]
+    connection.ensure_connection()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+
+
+def pending_migrations(alias="default"):
+    """Names of the migrations not yet applied to the database."""
+    executor = MigrationExecutor(connections[alias])
+    targets = executor.loader.graph.leaf_nodes()
+    return [
+        f"{migration.app_label}.{migration.name}"
+        for migration, _ in executor.migration_plan(targets)
+    ]
+
+
+def _build_serializers():
+    from planetarium import reservations, serializers  # noqa: F401
+    from rest_framework.serializers import Serializer
+
+    pending = list(Serializer.__subclasses__())
+    while pending:
+        serializer_class = pending.pop()
+        pending.extend(serializer_class.__subclasses__())
+        if serializer_class.__module__.startswith(("planetarium", "user")):
+            try:
+                serializer_class().fields
+            except Exception:
+                # Serializers needing a context or arguments warm on use.
+                pass
+
+
+def warm_up():
+    """Do once the work a worker would otherwise do on its first requests.
+
+    Resolves every URL pattern, builds the fields of the project's
+    serializers and fills today's seat maps. Safe to
+    call repeatedly and from several threads; only the first successful
+    call does anything.
+    """
+    with _warm_lock:
+        if state["warm"]:
+            return True
+        started = time.monotonic()
+        try:
+            get_resolver().reverse_dict
+            _build_serializers()
+            today = timezone.localdate()
+            for show_session_id, show_time in ShowSession.objects.filter(
+                show_time__date=today
+            ).values_list("id", "show_time"):
+                caching.seat_map(show_session_id, show_time)
+        except Exception as error:
+            logger.exception("Warm-up failed")
+            state["error"] = str(error)
+            return False
+        state.update(warm=True, error=None)
+        logger.info("Warmed up in %.2f s", time.monotonic() - started)
+        return True
+
+
+def warm_up_in_background():
+    """Start warming up without holding up the server's start.
+
+    A failed warm-up is retried until it succeeds.
+    """
+    global _warming_in_background
+
+    def run():
+        try:
+            while not warm_up():
+                time.sleep(WARM_UP_RETRY_INTERVAL)
+        finally:
+            connections.close_all()
+
+    _warming_in_background = True
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def _after_fork_in_child():
+    # A process forked while the warm-up thread held the lock (e.g. by
+    # gunicorn --preload) would inherit it locked, without the thread.
+    global _warm_lock
+    _warm_lock = threading.Lock()
+    if _warming_in_background and not state["warm"]:
+        warm_up_in_background()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def readiness():
+    """Check whether this worker should receive traffic.
+
+    Returns ``(ready, checks)``, ``checks`` naming the result of each of
+    the database, migration and warm-up checks. Probes only report the
+    warm-up; once no migration is pending, they stop checking.
+    """
+    checks = {}
+    try:
+        check_database()
+        checks["database"] = "ok"
+    except Exception as error:
+        checks["database"] = f"unavailable: {error}"
+        return False, checks
+
+    if not state["migrated"]:
+        pending = pending_migrations()
+        state["migrated"] = not pending
+    checks["migrations"] = (
+        "ok" if state["migrated"] else f"{len(pending)} pending"
+    )
+    if state["warm"]:
+        checks["warm_up"] = "ok"
+    elif state["error"]:
+        checks["warm_up"] = f"failed: {state['error']}"
+    else:
+        checks["warm_up"] = "in progress"
+    return all(check == "ok" for check in checks.values()), checks
@@ -0,0 +1,129 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+class SharedStore:
+    """SQLite database shared by every worker process on the host.
+
+    Each thread of each process keeps its own connection. Writes made
+    inside ``transaction()`` take SQLite's write lock up front, so
+    read-modify-write sequences are atomic across workers.
+    """
+
+    def __init__(self, path, timeout=5.0):
+        self.path = str(path)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._schemas = set()
+        self._schemas_lock = threading.Lock()
+
+    @property
+    def connection(self):
+        pid = os.getpid()
+        if getattr(self._local, "pid", None) != pid:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = pid
+        return self._local.connection
+
+    def ensure_schema(self, name, sql):
+        """Create the tables of a store client once per process."""
+        if name in self._schemas:
+            return
+        with self._schemas_lock:
+            if name not in self._schemas:
+                self.connection.executescript(sql)
+                self._schemas.add(name)
+
+    @contextmanager
+    def transaction(self):
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store():
+    path = str(settings.SHARED_STORE_PATH)
+    store = _stores.get(path)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(path, SharedStore(path))
+    return store
+
+
+SEMAPHORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS semaphore_lease (
+    token TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS semaphore_lease_name
+    ON semaphore_lease (name, expires);
+"""
+
+
+class SharedSemaphore:
+    """Counting semaphore shared by all workers on the host.
+
+    Leases expire after ``lease`` seconds, so a worker that dies while
+    holding a slot cannot keep it forever.
+    """
+
+    def __init__(self, name, limit, lease=60):
+        self.name = name
+        self.limit = limit
+        self.lease = lease
+
+    def acquire(self):
+        """Return a lease token, or ``None`` if every slot is taken."""
+        store = get_store()
+        store.ensure_schema("semaphore", SEMAPHORE_SCHEMA)
+        now = time.time()
+        with store.transaction() as connection:
+            connection.execute(
+                "DELETE FROM semaphore_lease WHERE name = ? AND expires < ?",
+                (self.name, now),
+            )
+            (taken,) = connection.execute(
+                "SELECT COUNT(*) FROM semaphore_lease WHERE name = ?",
+                (self.name,),
+            ).fetchone()
+            if taken >= self.limit:
+                return None
+            token = uuid.uuid4().hex
+            connection.execute(
+                "INSERT INTO semaphore_lease (token, name, expires) "
+                "VALUES (?, ?, ?)",
+                (token, self.name, now + self.lease),
+            )
+        return token
+
+    def release(self, token):
+        store = get_store()
+        store.ensure_schema("semaphore", SEMAPHORE_SCHEMA)
+        with store.transaction() as connection:
+            connection.execute(
+                "DELETE FROM semaphore_lease WHERE token = ?", (token,)
+            )
@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+
+from planetarium.models import Ticket
+from planetarium.tests.test_api import (
+    sample_astronomy_show,
+    sample_planetarium_dome,
+    sample_reservation,
+    sample_show_session,
+)
+
+
+def sample_user(email="user@example.com", password="password123", **extra):
+    return get_user_model().objects.create_user(
+        email=email, password=password, **extra
+    )
+
+
+def sample_ticket(show_session, reservation=None, row=1, seat=1):
+    if reservation is None:
+        reservation = sample_reservation()
+    return Ticket.objects.create(
+        show_session=show_session, reservation=reservation, row=row, seat=seat
+    )
+
+
+class SessionsTestMixin:
+    """A user, a show and a dome for tests that schedule and book.
+
+    Set ``dome_rows`` and ``dome_seats_in_row`` to change the dome.
+    """
+
+    dome_rows = 5
+    dome_seats_in_row = 5
+
+    def setUp(self):
+        super().setUp()
+        self.user = sample_user()
+        self.show = sample_astronomy_show()
+        self.dome = sample_planetarium_dome(
+            rows=self.dome_rows, seats_in_row=self.dome_seats_in_row
+        )
+
+    def create_session(self, show_time, show=None):
+        return sample_show_session(show_time, show or self.show, self.dome)
+
+    def create_ticket(self, session, reservation=None, row=1, seat=1):
+        return sample_ticket(
+            session,
+            reservation or sample_reservation(self.user),
+            row=row,
+            seat=seat,
+        )
@@ -0,0 +1,153 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.paginator import EmptyPage
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    Ticket,
+)
+from planetarium.pagination import EstimatedCountPaginator
+
+
+class LargeTableAdminTests(TestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@example.com", password="password123"
+        )
+        self.client.force_login(self.admin)
+        show = AstronomyShow.objects.create(
+            title="Black Holes", description="A show about black holes"
+        )
+        dome = PlanetariumDome.objects.create(
+            name="Main Dome", rows=10, seats_in_row=10
+        )
+        self.session = ShowSession.objects.create(
+            show_time="2024-06-01T20:00:00Z",
+            astronomy_show=show,
+            planetarium_dome=dome,
+        )
+
+    def add_tickets(self, count):
+        reservation = Reservation.objects.create(user=self.admin)
+        start = Ticket.objects.count()
+        Ticket.objects.bulk_create(
+            Ticket(
+                show_session=self.session,
+                show_time=self.session.show_time,
+                reservation=reservation,
+                row=number // 10 + 1,
+                seat=number % 10 + 1,
+            )
+            for number in range(start, start + count)
+        )
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_ticket_changelist_query_count_does_not_grow(self):
+        url = reverse("admin:planetarium_ticket_changelist")
+        self.add_tickets(2)
+        few = self.changelist_queries(url)
+
+        self.add_tickets(20)
+
+        self.assertEqual(self.changelist_queries(url), few)
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=0)
+    def test_large_changelist_is_not_counted(self):
+        self.add_tickets(3)
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse("admin:planetarium_ticket_changelist"))
+
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in context.captured_queries)
+        )
+
+    def test_changelists_render(self):
+        self.add_tickets(3)
+        for name in ("ticket", "reservation", "showsession"):
+            response = self.client.get(
+                reverse(f"admin:planetarium_{name}_changelist"),
+                {"q": "not-a-number"},
+            )
+
+            self.assertEqual(response.status_code, 200, name)
+
+    def test_show_session_autocomplete(self):
+        response = self.client.get(
+            reverse("admin:autocomplete"),
+            {
+                "app_label": "planetarium",
+                "model_name": "ticket",
+                "field_name": "show_session",
+                "term": "black",
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result["id"] for result in response.json()["results"]],
+            [str(self.session.id)],
+        )
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def setUp(self):
+        for number in range(5):
+            PlanetariumDome.objects.create(
+                name=f"Dome {number}", rows=1, seats_in_row=1
+            )
+        self.domes = PlanetariumDome.objects.order_by("id")
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=10000)
+    def test_small_results_are_counted_exactly(self):
+        paginator = EstimatedCountPaginator(self.domes, 2)
+
+        self.assertEqual(paginator.count, 5)
+        self.assertFalse(paginator.count_is_estimate)
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=0)
+    def test_large_results_are_estimated(self):
+        paginator = EstimatedCountPaginator(self.domes, 2)
+
+        self.assertTrue(paginator.count_is_estimate)
+        self.assertEqual(
+            list(paginator.page(1).object_list), list(self.domes[:2])
+        )
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=0)
+    def test_pages_go_past_a_low_estimate(self):
+        paginator = EstimatedCountPaginator(self.domes, 2)
+
+        with mock.patch(
+            "planetarium.pagination.estimated_count", return_value=1
+        ):
+            self.assertEqual(paginator.num_pages, 1)
+            pages = [paginator.page(number) for number in (1, 2, 3)]
+
+        self.assertEqual(
+            [list(page.object_list) for page in pages],
+            [list(self.domes[:2]), list(self.domes[2:4]),
+             list(self.domes[4:])],
+        )
+        self.assertEqual(
+            [page.has_next() for page in pages], [True, True, False]
+        )
+        self.assertEqual((pages[2].start_index(), pages[2].end_index()),
+                         (5, 5))
+        with self.assertRaises(EmptyPage):
+            paginator.page(4)
+        with self.assertRaises(EmptyPage):
+            paginator.page(0)
@@ -0,0 +1,193 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.admission import (
+    Queued,
+    WaitingRoom,
+    parse_tokens,
+    requested_session_ids,
+)
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+)
+
+RESERVATION_URL = reverse("planetarium:reservation-list")
+
+
+@override_settings(ADMISSION_SESSION_CONCURRENCY=1, ADMISSION_QUEUE_LIMIT=1)
+class AdmissionControlTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="fan@example.com", password="password123"
+        )
+        self.client.force_authenticate(self.user)
+        show = AstronomyShow.objects.create(
+            title="Black Holes", description="A show about black holes"
+        )
+        dome = PlanetariumDome.objects.create(
+            name="Main Dome", rows=5, seats_in_row=5
+        )
+        self.session = ShowSession.objects.create(
+            show_time="2024-06-01T20:00:00Z",
+            astronomy_show=show,
+            planetarium_dome=dome,
+        )
+        self.room = WaitingRoom.for_session(self.session.id)
+
+    def reserve(self, seat=1, token=None, sessions=None):
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": seat, "show_session": session.id}
+                for session in sessions or [self.session]
+            ]
+        }
+        headers = {"X-Queue-Token": token} if token else {}
+        return self.client.post(
+            RESERVATION_URL, payload, format="json", headers=headers
+        )
+
+    def test_request_within_budget_is_served(self):
+        response = self.reserve()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # The slot is given back once the request is done.
+        self.assertEqual(self.reserve(seat=2).status_code,
+                         status.HTTP_201_CREATED)
+
+    def test_excess_request_is_queued_then_admitted(self):
+        lease = self.room.enter()
+
+        queued = self.reserve()
+
+        self.assertEqual(queued.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(queued.data["position"], 1)
+        self.assertIn("Retry-After", queued)
+        self.assertEqual(Reservation.objects.count(), 0)
+
+        self.room.leave(lease)
+        admitted = self.reserve(token=queued.data["queue_token"])
+
+        self.assertEqual(admitted.status_code, status.HTTP_201_CREATED)
+
+    def test_queued_client_keeps_its_turn(self):
+        self.room.enter()
+        first = self.reserve()
+        other = get_user_model().objects.create_user(
+            email="other@example.com", password="password123"
+        )
+        self.client.force_authenticate(other)
+
+        response = self.reserve(seat=2)
+
+        self.assertEqual(response.status_code,
+                         status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", response)
+
+        self.client.force_authenticate(self.user)
+        again = self.reserve(token=first.data["queue_token"])
+        self.assertEqual(again.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(again.data["queue_token"],
+                         first.data["queue_token"])
+
+    def test_polling_is_not_throttled(self):
+        lease = self.room.enter()
+        token = self.reserve().data["queue_token"]
+
+        for _ in range(10):
+            response = self.reserve(token=token)
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        self.room.leave(lease)
+        admitted = self.reserve(token=token)
+
+        self.assertEqual(admitted.status_code, status.HTTP_201_CREATED)
+
+    def test_token_keeps_a_place_in_every_room(self):
+        other = ShowSession.objects.create(
+            show_time="2024-06-02T20:00:00Z",
+            astronomy_show=self.session.astronomy_show,
+            planetarium_dome=self.session.planetarium_dome,
+        )
+        other_room = WaitingRoom.for_session(other.id)
+        lease = self.room.enter()
+        other_lease = other_room.enter()
+        sessions = [self.session, other]
+
+        first = self.reserve(sessions=sessions)
+        self.room.leave(lease)
+        second = self.reserve(
+            sessions=sessions, token=first.data["queue_token"]
+        )
+
+        self.assertEqual(second.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(
+            parse_tokens(second.data["queue_token"])[self.session.id],
+            parse_tokens(first.data["queue_token"])[self.session.id],
+        )
+        self.assertIn(other.id, parse_tokens(second.data["queue_token"]))
+
+        other_room.leave(other_lease)
+        admitted = self.reserve(
+            sessions=sessions, token=second.data["queue_token"]
+        )
+
+        self.assertEqual(admitted.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(ADMISSION_QUEUE_LIMIT=2)
+    def test_place_is_kept_until_every_room_admits(self):
+        other = ShowSession.objects.create(
+            show_time="2024-06-02T20:00:00Z",
+            astronomy_show=self.session.astronomy_show,
+            planetarium_dome=self.session.planetarium_dome,
+        )
+        room = WaitingRoom.for_session(self.session.id)
+        other_room = WaitingRoom.for_session(other.id)
+        lease = room.enter()
+        other_lease = other_room.enter()
+        sessions = [self.session, other]
+        first = self.reserve(sessions=sessions)
+        room.leave(lease)
+
+        second = self.reserve(
+            sessions=sessions, token=first.data["queue_token"]
+        )
+
+        # Admitted to the first room but queued in the other: the first
+        # room's slot is given back, but not the place in its queue.
+        self.assertEqual(second.status_code, status.HTTP_202_ACCEPTED)
+        with self.assertRaises(Queued) as newcomer:
+            room.enter()
+        self.assertEqual(newcomer.exception.position, 2)
+
+        other_room.leave(other_lease)
+        admitted = self.reserve(
+            sessions=sessions, token=second.data["queue_token"]
+        )
+
+        self.assertEqual(admitted.status_code, status.HTTP_201_CREATED)
+        # Once the booking ran, its place goes to the next in line.
+        self.assertTrue(room.enter(newcomer.exception.token))
+
+    def test_browsing_is_not_gated(self):
+        self.room.enter()
+
+        response = self.client.get(RESERVATION_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_requested_session_ids(self):
+        data = {
+            "reservations": [
+                {"tickets": [{"show_session": 3}, {"show_session": "4"}]},
+                {"tickets": [{"show_session": "x"}]},
+            ]
+        }
+
+        self.assertEqual(requested_session_ids(data), {3, 4})
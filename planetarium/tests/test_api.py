@@ -236,6 +236,7 @@ class ReservationApiTests(TestCase):
 
         expected_response = {
             'count': reservations.count(),
+            'count_is_estimate': False,
             'next': None,
             'previous': None,
             'results': serializer.data
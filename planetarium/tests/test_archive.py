@@ -0,0 +1,204 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import UTC, datetime
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from planetarium import archive
+from planetarium.models import Reservation, ShowSession, Ticket
+from planetarium.tests.samples import (
+    SessionsTestMixin,
+    sample_astronomy_show,
+    sample_user,
+)
+
+ARCHIVED_SESSIONS_URL = reverse("planetarium:archivedsession-list")
+
+
+class ArchiveTestCase(SessionsTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.old = self.create_session("2020-06-01T20:00:00Z")
+        self.older = self.create_session("2020-03-01T20:00:00Z")
+        self.recent = self.create_session("2099-06-01T20:00:00Z")
+
+    def archive(self, batch_size=500):
+        return list(archive.archive_sessions(
+            datetime(2021, 1, 1, tzinfo=UTC), self.directory, batch_size
+        ))
+
+    def read(self, **filters):
+        return [
+            json.loads(line)
+            for line in archive.archived_sessions(
+                directory=self.directory, **filters
+            )
+        ]
+
+
+class ArchiveSessionsTests(ArchiveTestCase):
+    def test_past_sessions_move_to_files(self):
+        ticket = self.create_ticket(self.old)
+        self.create_ticket(self.old, ticket.reservation, seat=2)
+
+        self.assertEqual(self.archive(batch_size=1), [
+            ("sessions-20200601-20200601-%d.jsonl.gz" % self.old.id, 1, 2),
+            ("sessions-20200301-20200301-%d.jsonl.gz" % self.older.id, 1, 0),
+        ])
+
+        self.assertEqual(
+            list(ShowSession.objects.values_list("id", flat=True)),
+            [self.recent.id],
+        )
+        self.assertFalse(Ticket.objects.exists())
+        self.assertFalse(Reservation.objects.exists())
+        name = "sessions-20200601-20200601-%d.jsonl.gz" % self.old.id
+        with gzip.open(os.path.join(self.directory, name), "rt") as lines:
+            (record,) = [json.loads(line) for line in lines]
+        self.assertEqual(record["astronomy_show"]["title"], "Black Holes")
+        self.assertEqual(record["tickets"]["seat"], [1, 2])
+        self.assertEqual(
+            record["reservations"]["id"], [ticket.reservation_id]
+        )
+
+    def test_file_and_its_directory_are_synced(self):
+        with mock.patch.object(
+            archive.os, "fsync", wraps=os.fsync
+        ) as fsync, mock.patch.object(
+            archive.os, "open", wraps=os.open
+        ) as open_directory:
+            self.archive()
+
+        open_directory.assert_called_once_with(self.directory, os.O_RDONLY)
+        self.assertEqual(fsync.call_count, 2)
+
+    def test_file_of_a_failed_batch_is_removed(self):
+        write_chunk = archive.write_chunk
+
+        def fail_once():
+            cursor.side_effect = None
+            raise DatabaseError("lost connection")
+
+        def write_then_fail(directory, records):
+            name = write_chunk(directory, records)
+            self.assertEqual(os.listdir(directory), [name])
+            # Fail the delete that follows.
+            cursor.side_effect = fail_once
+            return name
+
+        with mock.patch.object(
+            archive, "write_chunk", side_effect=write_then_fail
+        ), mock.patch.object(
+            archive.connection, "cursor", wraps=archive.connection.cursor
+        ) as cursor, self.assertRaises(DatabaseError):
+            self.archive()
+
+        self.assertEqual(os.listdir(self.directory), [])
+        self.assertEqual(ShowSession.objects.count(), 3)
+
+    def test_reservation_with_later_tickets_is_kept(self):
+        ticket = self.create_ticket(self.old)
+        later = self.create_ticket(self.recent, ticket.reservation)
+
+        self.archive()
+
+        self.assertEqual(
+            list(Ticket.objects.values_list("id", flat=True)), [later.id]
+        )
+        self.assertTrue(
+            Reservation.objects.filter(id=ticket.reservation_id).exists()
+        )
+
+    def test_read_filters_by_date_and_show(self):
+        other_show = sample_astronomy_show(
+            title="Nebulae", description="A show about nebulae"
+        )
+        other = self.create_session("2020-09-01T20:00:00Z", other_show)
+        self.archive()
+
+        self.assertEqual(
+            [record["id"] for record in self.read()],
+            [self.old.id, self.older.id, other.id],
+        )
+        self.assertEqual(
+            [record["id"] for record in self.read(
+                date_from=datetime(2020, 5, 1).date(),
+                date_to=datetime(2020, 6, 1).date(),
+            )],
+            [self.old.id],
+        )
+        self.assertEqual(
+            [record["id"] for record in self.read(show_id=other_show.id)],
+            [other.id],
+        )
+
+    def test_command_dry_run_keeps_sessions(self):
+        out = StringIO()
+
+        call_command(
+            "archive_sessions",
+            "--dry-run",
+            "--directory", self.directory,
+            stdout=out,
+        )
+
+        self.assertIn("2 sessions", out.getvalue())
+        self.assertEqual(ShowSession.objects.count(), 3)
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+class ArchivedSessionApiTests(ArchiveTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.archive()
+        self.settings_override = override_settings(
+            ARCHIVE_DIR=self.directory
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def test_staff_only(self):
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get(ARCHIVED_SESSIONS_URL)
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_streams_json_lines(self):
+        self.client.force_authenticate(
+            sample_user(email="admin@example.com", is_staff=True)
+        )
+
+        response = self.client.get(
+            ARCHIVED_SESSIONS_URL, {"date_from": "2020-05-01"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line)["id"] for line in lines], [self.old.id]
+        )
+
+    def test_invalid_date_is_rejected(self):
+        self.client.force_authenticate(
+            sample_user(email="admin@example.com", is_staff=True)
+        )
+
+        response = self.client.get(
+            ARCHIVED_SESSIONS_URL, {"date_to": "last year"}
+        )
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,177 @@
+import json
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from planetarium import throttling
+from planetarium.metrics import registry
+from planetarium.models import PlanetariumDome, ShowTheme
+from planetarium.schema import SchemaArtifact
+
+BATCH_URL = reverse("batch")
+THEMES_URL = reverse("planetarium:showtheme-list")
+DOMES_URL = reverse("planetarium:planetariumdome-list")
+ME_URL = reverse("user:manage")
+SCHEMA_URL = reverse("schema")
+
+
+class BatchApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="password123"
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+        ShowTheme.objects.create(name="Space")
+        PlanetariumDome.objects.create(
+            name="Main Dome", rows=5, seats_in_row=5
+        )
+
+    def batch(self, requests, **options):
+        response = self.client.post(
+            BATCH_URL, {"requests": requests, **options}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data["responses"]
+
+    def test_responses_match_single_requests(self):
+        paths = [THEMES_URL, f"{DOMES_URL}?unused=1", ME_URL]
+
+        responses = self.batch(paths)
+
+        self.assertEqual([item["path"] for item in responses], paths)
+        for item, path in zip(responses, paths):
+            single = self.client.get(path)
+            self.assertEqual(item["status"], single.status_code, path)
+            self.assertEqual(item["body"], single.json(), path)
+
+    def test_each_request_has_its_own_status(self):
+        responses = self.batch([
+            reverse("planetarium:requestprofile-list"),
+            "/api/planetarium/nothing-here/",
+            "/admin/",
+            "https://example.com/api/user/me/",
+            BATCH_URL,
+            ME_URL,
+        ])
+
+        self.assertEqual(
+            [item["status"] for item in responses],
+            [403, 404, 400, 400, 400, 200],
+        )
+
+    def test_token_is_decoded_once(self):
+        with mock.patch.object(
+            JWTAuthentication,
+            "get_validated_token",
+            autospec=True,
+            side_effect=JWTAuthentication.get_validated_token,
+        ) as get_validated_token:
+            self.batch([THEMES_URL, DOMES_URL, ME_URL])
+
+        self.assertEqual(get_validated_token.call_count, 1)
+
+    def test_throttled_once_for_every_request(self):
+        with mock.patch.object(
+            throttling, "hit", wraps=throttling.hit
+        ) as hit:
+            self.batch([THEMES_URL, DOMES_URL, ME_URL])
+
+        self.assertEqual(
+            [call.args[3] for call in hit.call_args_list], [3]
+        )
+
+    def test_items_are_recorded_in_metrics(self):
+        with mock.patch.object(
+            registry, "observe", wraps=registry.observe
+        ) as observe:
+            self.batch([THEMES_URL, ME_URL])
+
+        self.assertEqual(
+            [call.kwargs["view"] for call in observe.call_args_list],
+            ["showtheme-list", "user:manage", "batch"],
+        )
+
+    def test_concurrent_requests(self):
+        responses = self.batch([ME_URL, ME_URL, ME_URL], concurrent=True)
+
+        self.assertEqual(
+            [item["body"]["email"] for item in responses],
+            ["user@example.com"] * 3,
+        )
+
+    @override_settings(BATCH_MAX_REQUESTS=2)
+    def test_batch_size_is_limited(self):
+        response = self.client.post(
+            BATCH_URL,
+            {"requests": [THEMES_URL, DOMES_URL, ME_URL]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+
+class BatchNonApiResponseTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        schema_dir = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(schema_dir.cleanup)
+        cls.enterClassContext(
+            override_settings(SCHEMA_ARTIFACT_DIR=schema_dir.name)
+        )
+        call_command("build_schema", stdout=StringIO())
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="user@example.com", password="password123"
+            )
+        )
+
+    def batch(self, requests, **headers):
+        response = self.client.post(
+            BATCH_URL, {"requests": requests}, format="json", **headers
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data["responses"]
+
+    def test_encoding_and_conditional_headers_are_not_forwarded(self):
+        path = f"{SCHEMA_URL}?format=json"
+        etag = self.client.get(path)["ETag"]
+
+        (response,) = self.batch(
+            [path], HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(response["status"], 200)
+        self.assertIn(
+            "/api/planetarium/reservations/",
+            json.loads(response["body"])["paths"],
+        )
+
+    def test_undecodable_item_fails_alone(self):
+        with mock.patch.object(
+            SchemaArtifact,
+            "response",
+            return_value=HttpResponse(
+                b"\xff\xfe", content_type="application/json"
+            ),
+        ):
+            responses = self.batch([SCHEMA_URL, THEMES_URL])
+
+        self.assertEqual(
+            [item["status"] for item in responses], [500, 200]
+        )
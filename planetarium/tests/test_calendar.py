@@ -0,0 +1,148 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from planetarium.models import Reservation
+from planetarium.reservations import book_reservations
+from planetarium.tests.samples import (
+    SessionsTestMixin,
+    sample_astronomy_show,
+    sample_user,
+)
+
+
+def calendar_url(astronomy_show_id):
+    return reverse(
+        "planetarium:astronomyshow-calendar", args=[astronomy_show_id]
+    )
+
+
+class AstronomyShowCalendarTests(SessionsTestMixin, TestCase):
+    dome_rows = 2
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.morning = self.create_session("2024-06-10T10:00:00Z")
+        self.evening = self.create_session("2024-06-10T20:00:00Z")
+        self.later = self.create_session("2024-06-12T20:00:00Z")
+        self.create_session("2024-07-01T20:00:00Z")
+        self.create_ticket(self.evening)
+
+    def get_calendar(self, month="2024-06"):
+        response = self.client.get(
+            calendar_url(self.show.id), {"month": month}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_days_with_seats_left(self):
+        other_show = sample_astronomy_show(
+            title="Nebulae", description="A show about nebulae"
+        )
+        self.create_session("2024-06-11T20:00:00Z", other_show)
+
+        data = self.get_calendar()
+
+        self.assertEqual(data["astronomy_show"], self.show.id)
+        self.assertEqual(data["month"], "2024-06")
+        self.assertEqual(
+            [(day["date"], day["tickets_available"]) for day in data["days"]],
+            [("2024-06-10", 19), ("2024-06-12", 10)],
+        )
+        self.assertEqual(
+            [
+                (session["id"], session["tickets_available"])
+                for session in data["days"][0]["sessions"]
+            ],
+            [(self.morning.id, 10), (self.evening.id, 9)],
+        )
+
+    def test_query_count_does_not_grow_with_sessions(self):
+        with CaptureQueriesContext(connection) as few:
+            self.get_calendar("2024-07")
+        with self.captureOnCommitCallbacks(execute=True):
+            for day in range(2, 6):
+                self.create_session(f"2024-07-0{day}T20:00:00Z")
+
+        with CaptureQueriesContext(connection) as many:
+            self.get_calendar("2024-07")
+
+        self.assertEqual(len(many), len(few))
+
+    def test_cached_until_tickets_are_booked(self):
+        self.get_calendar()
+        with CaptureQueriesContext(connection) as context:
+            self.get_calendar()
+        self.assertFalse(
+            any("planetarium_ticket" in query["sql"]
+                for query in context.captured_queries)
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_ticket(self.later)
+
+        days = self.get_calendar()["days"]
+        self.assertEqual(days[1]["tickets_available"], 9)
+
+    def test_batch_booking_invalidates(self):
+        self.get_calendar()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            book_reservations(self.user, [
+                {"tickets": [
+                    {"show_session": self.later.id, "row": 1, "seat": 1},
+                    {"show_session": self.later.id, "row": 1, "seat": 2},
+                ]},
+            ])
+
+        days = self.get_calendar()["days"]
+        self.assertEqual(days[1]["tickets_available"], 8)
+
+    def test_deleting_tickets_does_not_load_each_session(self):
+        self.get_calendar()
+        reservation = Reservation.objects.create(user=self.user)
+        for seat in range(1, 6):
+            self.create_ticket(self.later, reservation, row=2, seat=seat)
+        reservation = Reservation.objects.get(id=reservation.id)
+
+        with CaptureQueriesContext(connection) as context:
+            with self.captureOnCommitCallbacks(execute=True):
+                reservation.delete()
+
+        self.assertEqual(
+            sum("FROM \"planetarium_showsession\"" in query["sql"]
+                for query in context.captured_queries),
+            1,
+        )
+        days = self.get_calendar()["days"]
+        self.assertEqual(days[1]["tickets_available"], 10)
+
+    def test_rescheduled_session_leaves_its_month(self):
+        admin = sample_user(email="admin@example.com", is_staff=True)
+        self.get_calendar()
+        self.client.force_authenticate(admin)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse(
+                    "planetarium:showsession-detail", args=[self.later.id]
+                ),
+                {"show_time": "2024-07-12T20:00:00Z"},
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [day["date"] for day in self.get_calendar()["days"]],
+            ["2024-06-10"],
+        )
+
+    def test_invalid_month(self):
+        response = self.client.get(
+            calendar_url(self.show.id), {"month": "June"}
+        )
+
+        self.assertEqual(response.status_code, 400)
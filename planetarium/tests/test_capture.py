@@ -0,0 +1,59 @@
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from planetarium.middleware import MASK, scrub
+
+
+class TrafficCaptureTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.capture_path = os.path.join(directory.name, "traffic.jsonl")
+        self.settings_override = override_settings(
+            TRAFFIC_CAPTURE_RATE=1, TRAFFIC_CAPTURE_PATH=self.capture_path
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.client = APIClient()
+
+    def captured(self):
+        with open(self.capture_path) as capture:
+            return [json.loads(line) for line in capture]
+
+    def test_request_is_captured_anonymised(self):
+        user = get_user_model().objects.create_user(
+            email="stargazer@example.com", password="password123"
+        )
+        self.client.force_authenticate(user)
+
+        self.client.patch(
+            reverse("user:manage"),
+            {"email": "new@example.com", "password": "secret123"},
+            format="json",
+        )
+
+        (record,) = self.captured()
+        self.assertEqual(record["method"], "PATCH")
+        self.assertEqual(record["route"], "user:manage")
+        self.assertEqual(record["body"], {"email": MASK, "password": MASK})
+        self.assertNotIn("stargazer", json.dumps(record))
+        self.assertNotEqual(record["user"], str(user.pk))
+        self.assertEqual(record["status"], 200)
+
+    def test_only_api_requests_are_captured(self):
+        self.client.get("/admin/login/")
+
+        self.assertFalse(os.path.exists(self.capture_path))
+
+    def test_scrub_nested_payload(self):
+        data = {"tickets": [{"row": 1}], "user": {"Email": "a@b.c"}}
+
+        self.assertEqual(
+            scrub(data), {"tickets": [{"row": 1}], "user": {"Email": MASK}}
+        )
@@ -0,0 +1,158 @@
+import io
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.core.serializers.base import DeserializationError
+from django.db import IntegrityError
+from django.test import TestCase
+
+from planetarium.fixtures import iter_json_array, load_fixture
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+
+FIXTURE = os.path.join(settings.BASE_DIR, "planetarium_db_data.json")
+MODELS = (
+    get_user_model(),
+    PlanetariumDome,
+    ShowTheme,
+    AstronomyShow,
+    AstronomyShow.theme.through,
+    ShowSession,
+    Reservation,
+    Ticket,
+)
+
+
+def snapshot():
+    return {
+        model._meta.label: list(model.objects.order_by("pk").values())
+        for model in MODELS
+    }
+
+
+class StreamingJsonArrayTests(TestCase):
+    def test_items_across_chunks(self):
+        items = [{"pk": number, "text": "x" * number} for number in range(50)]
+        stream = io.StringIO(json.dumps(items, indent=4))
+
+        self.assertEqual(list(iter_json_array(stream, chunk_size=7)), items)
+
+    def test_truncated_array_is_an_error(self):
+        with self.assertRaises(DeserializationError):
+            list(iter_json_array(io.StringIO('[{"pk": 1}, {"pk"')))
+
+    def test_syntax_error_stops_reading(self):
+        stream = io.StringIO(
+            '[{"pk": 1}, {"pk" 2}, ' + '{"pk": 3}, ' * 10000 + "]"
+        )
+
+        with self.assertRaises(DeserializationError):
+            list(iter_json_array(stream, chunk_size=16))
+        self.assertLess(stream.tell(), 64)
+
+    def test_item_longer_than_the_limit_is_an_error(self):
+        stream = io.StringIO('[{"text": "' + "x" * 10000 + '"}]')
+
+        with self.assertRaises(DeserializationError):
+            list(iter_json_array(stream, chunk_size=16, max_item_size=100))
+        self.assertLess(stream.tell(), 200)
+
+    def test_empty_items_are_errors(self):
+        for content in (
+            '[{"pk": 1},, {"pk": 2}]',
+            '[, {"pk": 1}]',
+            '[{"pk": 1},]',
+            '[{"pk": 1} {"pk": 2}]',
+            "[,]",
+        ):
+            with self.subTest(content=content):
+                with self.assertRaises(DeserializationError):
+                    list(iter_json_array(io.StringIO(content), chunk_size=4))
+
+    def test_empty_array(self):
+        self.assertEqual(list(iter_json_array(io.StringIO(" [ ] "))), [])
+
+
+class LoadFixtureTests(TestCase):
+    def write(self, name, content):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, name)
+        with open(path, "w") as fixture:
+            fixture.write(content)
+        return path
+
+    def test_same_rows_as_loaddata(self):
+        call_command("load_fixture", FIXTURE, "--batch-size", "2",
+                     stdout=io.StringIO())
+        loaded = snapshot()
+
+        call_command("loaddata", FIXTURE, verbosity=0)
+
+        self.assertEqual(snapshot(), loaded)
+        self.assertEqual(len(loaded["planetarium.Ticket"]), 4)
+        self.assertTrue(loaded["planetarium.AstronomyShow_theme"])
+
+    def test_loading_twice_replaces_rows(self):
+        load_fixture(FIXTURE)
+        Ticket.objects.filter(pk=1).update(seat=9)
+
+        load_fixture(FIXTURE)
+
+        self.assertEqual(Ticket.objects.count(), 4)
+        self.assertNotEqual(Ticket.objects.get(pk=1).seat, 9)
+
+    def test_sequences_continue_after_loaded_ids(self):
+        load_fixture(FIXTURE)
+
+        dome = PlanetariumDome.objects.create(
+            name="New Dome", rows=1, seats_in_row=1
+        )
+
+        self.assertGreater(
+            dome.pk,
+            max(PlanetariumDome.objects.exclude(pk=dome.pk)
+                .values_list("pk", flat=True)),
+        )
+
+    def test_json_lines(self):
+        with open(FIXTURE) as fixture:
+            rows = json.load(fixture)
+        path = self.write(
+            "data.jsonl", "\n".join(json.dumps(row) for row in rows)
+        )
+
+        counts = load_fixture(path, batch_size=3)
+
+        self.assertEqual(sum(counts.values()), len(rows))
+        self.assertEqual(ShowSession.objects.count(), 2)
+
+    def test_missing_reference_is_rejected(self):
+        path = self.write("broken.json", json.dumps([{
+            "model": "planetarium.reservation",
+            "pk": 1,
+            "fields": {
+                "created_at": "2024-06-01T12:00:00Z",
+                "user": 999,
+            },
+        }]))
+
+        with self.assertRaises(IntegrityError):
+            load_fixture(path)
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_malformed_fixture(self):
+        path = self.write("broken.json", "[{")
+
+        with self.assertRaisesMessage(CommandError, "broken.json"):
+            call_command("load_fixture", path, stdout=io.StringIO())
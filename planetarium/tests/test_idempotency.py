@@ -0,0 +1,106 @@
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.idempotency import lock_id
+from planetarium.models import (
+    AstronomyShow,
+    IdempotencyKey,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+)
+
+RESERVATION_URL = reverse("planetarium:reservation-list")
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="mobile@example.com", password="password123"
+        )
+        self.client.force_authenticate(self.user)
+        show = AstronomyShow.objects.create(
+            title="Black Holes", description="A show about black holes"
+        )
+        dome = PlanetariumDome.objects.create(
+            name="Main Dome", rows=5, seats_in_row=5
+        )
+        self.session = ShowSession.objects.create(
+            show_time="2024-06-01T20:00:00Z",
+            astronomy_show=show,
+            planetarium_dome=dome,
+        )
+
+    def reserve(self, seat=1, key="retry-1"):
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": seat, "show_session": self.session.id}
+            ]
+        }
+        return self.client.post(
+            RESERVATION_URL,
+            payload,
+            format="json",
+            headers={"Idempotency-Key": key},
+        )
+
+    def test_retry_replays_first_response(self):
+        first = self.reserve()
+        retry = self.reserve()
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_different_keys_are_separate_requests(self):
+        self.reserve(seat=1, key="a")
+        response = self.reserve(seat=2, key="b")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(Reservation.objects.count(), 2)
+
+    def test_key_reused_for_other_request_is_rejected(self):
+        self.reserve(seat=1)
+        response = self.reserve(seat=2)
+
+        self.assertEqual(
+            response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_keys_are_per_user(self):
+        self.reserve(seat=1)
+        other = get_user_model().objects.create_user(
+            email="other@example.com", password="password123"
+        )
+        self.client.force_authenticate(other)
+
+        response = self.reserve(seat=2)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(IdempotencyKey.objects.count(), 2)
+
+    @override_settings(IDEMPOTENCY_WAIT_TIMEOUT=0.1)
+    def test_duplicate_of_in_flight_request_is_not_run(self):
+        other = connections.create_connection("default")
+        try:
+            with other.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_advisory_lock(%s)",
+                    [lock_id(self.user, "retry-1")],
+                )
+            response = self.reserve()
+        finally:
+            other.close()
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertIn("Retry-After", response)
+        self.assertEqual(Reservation.objects.count(), 0)
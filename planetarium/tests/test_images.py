@@ -0,0 +1,74 @@
+import io
+import tempfile
+
+from PIL import Image
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from planetarium.images import process_show_image
+from planetarium.models import AstronomyShow, PlanetariumDome, ShowSession
+from planetarium.serializers import ShowSessionListSerializer
+
+
+def sample_upload(size=(1000, 500)):
+    image = Image.new("RGB", size, color="navy")
+    exif = Image.Exif()
+    exif[0x010F] = "Telescope Co."
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", exif=exif)
+    return SimpleUploadedFile(
+        "nebula.jpg", buffer.getvalue(), content_type="image/jpeg"
+    )
+
+
+class ShowImageRenditionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        media_root = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(media_root.cleanup)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root.name))
+
+    def setUp(self):
+        self.show = AstronomyShow.objects.create(
+            title="Nebulae", description="Clouds", image=sample_upload()
+        )
+
+    def test_renditions_are_resized_and_recorded(self):
+        process_show_image(self.show.id)
+        self.show.refresh_from_db()
+
+        self.assertEqual(
+            (self.show.image_width, self.show.image_height), (1000, 500)
+        )
+        small = self.show.image_renditions["small"]
+        self.assertEqual((small["jpeg"]["width"], small["jpeg"]["height"]),
+                         (320, 160))
+        self.assertTrue(small["webp"]["name"].endswith(".webp"))
+        large = self.show.image_renditions["large"]["jpeg"]
+        self.assertEqual(large["width"], 1000)
+
+    def test_renditions_have_no_metadata(self):
+        process_show_image(self.show.id)
+        self.show.refresh_from_db()
+
+        name = self.show.image_renditions["medium"]["jpeg"]["name"]
+        with self.show.image.storage.open(name) as rendition:
+            self.assertEqual(len(Image.open(rendition).getexif()), 0)
+
+    def test_list_serializer_uses_small_rendition(self):
+        process_show_image(self.show.id)
+        dome = PlanetariumDome.objects.create(
+            name="Main Dome", rows=10, seats_in_row=10
+        )
+        session = ShowSession.objects.create(
+            show_time="2024-06-01T20:00:00Z",
+            astronomy_show=self.show,
+            planetarium_dome=dome,
+        )
+        self.show.refresh_from_db()
+
+        data = ShowSessionListSerializer(session).data
+
+        self.assertIn("-small-", data["astronomy_show_image"])
+        self.assertTrue(data["astronomy_show_image"].endswith(".jpg"))
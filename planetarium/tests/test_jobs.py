@@ -0,0 +1,132 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from planetarium import jobs
+from planetarium.jobs import (
+    task,
+    claim_job,
+    renew_lock,
+    requeue_stale_jobs,
+    run_job,
+    run_pending,
+)
+from planetarium.models import Job
+
+CALLS = []
+
+
+@task()
+def record(value):
+    CALLS.append(value)
+
+
+@task(max_attempts=2)
+def explode():
+    raise RuntimeError("boom")
+
+
+@task()
+def linger():
+    time.sleep(0.2)
+
+
+def not_a_task():
+    pass
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_enqueued_job_runs(self):
+        record.enqueue("hello")
+
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(CALLS, ["hello"])
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.Status.SUCCEEDED)
+        self.assertEqual(job.attempts, 1)
+
+    def test_scheduled_job_waits_until_due(self):
+        record.enqueue_at(timezone.now() + timedelta(hours=1), "later")
+
+        self.assertIsNone(claim_job())
+        self.assertEqual(CALLS, [])
+
+    def test_failed_job_is_retried_with_backoff(self):
+        explode.enqueue()
+
+        job = run_job(claim_job())
+
+        self.assertEqual(job.status, Job.Status.QUEUED)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn("RuntimeError: boom", job.last_error)
+
+    def test_job_fails_after_max_attempts(self):
+        explode.enqueue()
+
+        run_job(claim_job())
+        Job.objects.update(run_at=timezone.now())
+        job = run_job(claim_job())
+
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_unregistered_callable_is_refused(self):
+        Job.objects.create(
+            task="planetarium.tests.test_jobs.not_a_task", max_attempts=1
+        )
+
+        job = run_job(claim_job())
+
+        self.assertEqual(job.status, Job.Status.FAILED)
+
+    def test_stale_job_is_requeued(self):
+        record.enqueue("again")
+        job = claim_job()
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(requeue_stale_jobs(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.QUEUED)
+        self.assertIsNone(job.locked_at)
+
+    def test_stale_job_without_attempts_left_fails(self):
+        explode.enqueue()
+        run_job(claim_job())
+        Job.objects.update(run_at=timezone.now())
+        job = claim_job()
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(requeue_stale_jobs(), 0)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_renewed_lock_is_not_stale(self):
+        record.enqueue("long")
+        job = claim_job()
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(renew_lock(job), 1)
+
+        self.assertEqual(requeue_stale_jobs(), 0)
+        self.assertEqual(Job.objects.get().status, Job.Status.RUNNING)
+
+    @override_settings(JOB_HEARTBEAT_INTERVAL=0.05)
+    def test_lock_is_renewed_while_job_runs(self):
+        linger.enqueue()
+
+        with mock.patch.object(jobs, "renew_lock") as renew:
+            job = run_job(claim_job())
+
+        self.assertEqual(job.status, Job.Status.SUCCEEDED)
+        self.assertGreaterEqual(renew.call_count, 2)
+        renew.assert_called_with(job)
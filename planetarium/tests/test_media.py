@@ -0,0 +1,98 @@
+import os
+import tempfile
+
+from django.test import TestCase, override_settings
+from rest_framework import status
+
+CONTENT = bytes(range(256)) * 4
+HASHED_NAME = "uploads/planetarium/renditions/nebula-small-0123456789ab.jpg"
+
+
+@override_settings(MEDIA_ACCEL_REDIRECT_PREFIX="", MEDIA_X_SENDFILE=False)
+class MediaTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        media_root = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(media_root.cleanup)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root.name))
+        for name in ("poster.jpg", HASHED_NAME):
+            path = os.path.join(media_root.name, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as file:
+                file.write(CONTENT)
+
+    def test_whole_file(self):
+        response = self.client.get("/media/poster.jpg")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["Cache-Control"], "public, max-age=3600")
+
+    def test_versioned_files_are_immutable(self):
+        response = self.client.get(f"/media/{HASHED_NAME}")
+
+        self.assertIn("immutable", response["Cache-Control"])
+
+    def test_byte_range(self):
+        response = self.client.get(
+            "/media/poster.jpg", HTTP_RANGE="bytes=10-19"
+        )
+
+        self.assertEqual(response.status_code,
+                         status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT[10:20])
+        self.assertEqual(response["Content-Length"], "10")
+        self.assertEqual(response["Content-Range"], "bytes 10-19/1024")
+
+    def test_suffix_range(self):
+        response = self.client.get("/media/poster.jpg", HTTP_RANGE="bytes=-4")
+
+        self.assertEqual(b"".join(response.streaming_content), CONTENT[-4:])
+        self.assertEqual(response["Content-Range"], "bytes 1020-1023/1024")
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(
+            "/media/poster.jpg", HTTP_RANGE="bytes=2000-"
+        )
+
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+        )
+        self.assertEqual(response["Content-Range"], "bytes */1024")
+
+    def test_stale_if_range_returns_whole_file(self):
+        response = self.client.get(
+            "/media/poster.jpg",
+            HTTP_RANGE="bytes=0-9",
+            HTTP_IF_RANGE='"stale"',
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT)
+
+    def test_not_modified(self):
+        etag = self.client.get("/media/poster.jpg")["ETag"]
+
+        response = self.client.get(
+            "/media/poster.jpg", HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_files_outside_media_root(self):
+        response = self.client.get("/media/../settings.py")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT_PREFIX="/protected-media/")
+    def test_accel_redirect(self):
+        response = self.client.get("/media/poster.jpg")
+
+        self.assertEqual(response["X-Accel-Redirect"],
+                         "/protected-media/poster.jpg")
+        self.assertEqual(response.content, b"")
+        self.assertIn("ETag", response)
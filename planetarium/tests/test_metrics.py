@@ -0,0 +1,93 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.metrics import Registry, count_cache
+
+METRICS_URL = reverse("metrics")
+SHOWS_URL = reverse("planetarium:astronomyshow-list")
+
+
+@override_settings(METRICS_TOKEN="scrape-me")
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def scrape(self):
+        response = self.client.get(
+            METRICS_URL, headers={"Authorization": "Bearer scrape-me"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.content.decode()
+
+    def test_requests_are_labelled_by_viewset_action(self):
+        user = get_user_model().objects.create_user(
+            email="user@example.com", password="password123"
+        )
+        self.client.force_authenticate(user)
+        self.client.get(SHOWS_URL)
+        self.client.force_authenticate(None)
+
+        metrics = self.scrape()
+
+        self.assertIn(
+            "planetarium_request_duration_seconds_count"
+            '{method="GET",status="200",view="astronomyshow-list"} 1.0',
+            metrics,
+        )
+        self.assertIn(
+            'planetarium_db_queries_total{view="astronomyshow-list"}',
+            metrics,
+        )
+        self.assertIn("# TYPE planetarium_request_duration_seconds "
+                      "histogram", metrics)
+
+    def test_cache_lookups_are_counted(self):
+        count_cache("seat_map", hit=True)
+        count_cache("seat_map", hit=False)
+        count_cache("seat_map", hit=True)
+
+        metrics = self.scrape()
+
+        self.assertIn(
+            'planetarium_cache_requests_total{cache="seat_map",'
+            'result="hit"} 2.0',
+            metrics,
+        )
+
+    def test_metrics_need_token_or_staff(self):
+        user = get_user_model().objects.create_user(
+            email="user@example.com", password="password123"
+        )
+
+        anonymous = self.client.get(METRICS_URL)
+        self.client.force_authenticate(user)
+        regular = self.client.get(METRICS_URL)
+
+        self.assertEqual(anonymous.status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(regular.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_histogram_buckets_are_cumulative_and_ordered(self):
+        registry = Registry()
+        registry.observe("planetarium_request_duration_seconds", 0.3,
+                         view="x")
+
+        lines = [
+            line for line in registry.render().splitlines()
+            if line.startswith("planetarium_request_duration_seconds_bucket")
+        ]
+
+        self.assertEqual(len(lines), 12)
+        self.assertEqual(lines[0],
+                         "planetarium_request_duration_seconds_bucket"
+                         '{le="0.005",view="x"} 0.0')
+        self.assertTrue(lines[6].startswith(
+            'planetarium_request_duration_seconds_bucket{le="0.5"'
+        ))
+        self.assertTrue(lines[6].endswith(" 1.0"))
+        self.assertEqual(lines[-1],
+                         "planetarium_request_duration_seconds_bucket"
+                         '{le="+Inf",view="x"} 1.0')
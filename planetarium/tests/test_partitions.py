@@ -0,0 +1,95 @@
+from datetime import UTC, datetime
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from io import StringIO
+
+from planetarium import partitions
+from planetarium.models import ShowSession, Ticket
+from planetarium.tests.samples import SessionsTestMixin
+
+
+class TicketPartitioningTests(SessionsTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.session = self.create_session("2024-06-01T20:00:00Z")
+        self.ticket = self.create_ticket(self.session)
+
+    def partition_of(self, ticket):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT tableoid::regclass::text FROM planetarium_ticket "
+                "WHERE id = %s",
+                [ticket.id],
+            )
+            return cursor.fetchone()[0]
+
+    def test_ticket_copies_session_show_time(self):
+        self.assertEqual(self.ticket.show_time, self.session.show_time)
+
+        self.session.show_time = datetime(2024, 7, 1, 20, tzinfo=UTC)
+        self.session.save()
+
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.show_time, self.session.show_time)
+
+    def test_convert_keeps_tickets_and_ids(self):
+        call_command("partition_tickets", "--convert", stdout=StringIO())
+
+        self.assertEqual(self.partition_of(self.ticket),
+                         "planetarium_ticket_y2024m06")
+        ticket = self.create_ticket(self.session, seat=2)
+        self.assertGreater(ticket.id, self.ticket.id)
+        self.assertEqual(Ticket.objects.count(), 2)
+
+    def test_sessions_query_one_partition(self):
+        partitions.convert()
+        later = self.create_session("2024-08-01T20:00:00Z")
+        self.create_ticket(later)
+
+        plan = self.executed(
+            ShowSession.objects.annotate(
+                tickets_available=ShowSession.tickets_available_expression()
+            )
+            .filter(pk=later.pk)
+            .explain(analyze=True)
+        )
+
+        self.assertIn("planetarium_ticket_y2024m08", plan)
+        self.assertNotIn("planetarium_ticket_y2024m06", plan)
+
+    @staticmethod
+    def executed(plan):
+        """The lines of an EXPLAIN ANALYZE plan that ran."""
+        return "\n".join(
+            line for line in plan.splitlines()
+            if "never executed" not in line
+        )
+
+    def test_rescheduled_session_moves_its_tickets(self):
+        partitions.convert()
+
+        self.session.show_time = datetime(2024, 7, 1, 20, tzinfo=UTC)
+        self.session.save()
+
+        self.assertEqual(self.partition_of(self.ticket),
+                         "planetarium_ticket_y2024m07")
+
+    def test_missing_partition_is_created_from_default(self):
+        partitions.convert()
+        far = self.create_session("2031-01-01T20:00:00Z")
+        ticket = self.create_ticket(far)
+        self.assertEqual(self.partition_of(ticket),
+                         partitions.DEFAULT_PARTITION)
+
+        created = partitions.ensure_partitions(
+            since=datetime(2031, 1, 1, tzinfo=UTC)
+        )
+
+        self.assertIn("planetarium_ticket_y2031m01", created)
+        self.assertEqual(self.partition_of(ticket),
+                         "planetarium_ticket_y2031m01")
+
+    def test_ensure_partitions_needs_a_partitioned_table(self):
+        self.assertEqual(partitions.ensure_partitions(), [])
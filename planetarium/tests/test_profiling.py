@@ -0,0 +1,86 @@
+import marshal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.models import RequestProfile
+from planetarium.profiling import make_token
+
+PROFILE_URL = reverse("planetarium:requestprofile-list")
+TOKEN_URL = reverse("planetarium:requestprofile-token")
+SHOWS_URL = reverse("planetarium:astronomyshow-list")
+
+
+class RequestProfilingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            email="admin@example.com", password="password123", is_staff=True
+        )
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="password123"
+        )
+
+    def test_signed_header_profiles_request(self):
+        self.client.force_authenticate(self.admin)
+        token = self.client.post(TOKEN_URL).data["value"]
+
+        response = self.client.get(SHOWS_URL, headers={"X-Profile": token})
+
+        profile = RequestProfile.objects.get(id=response["X-Profile-Id"])
+        self.assertEqual(profile.view_name, "planetarium:astronomyshow-list")
+        self.assertEqual(profile.trigger, RequestProfile.Trigger.HEADER)
+        self.assertEqual(profile.requested_by, self.admin)
+        self.assertIn("cumulative", profile.summary)
+
+    def test_token_of_non_staff_is_ignored(self):
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get(
+            SHOWS_URL, headers={"X-Profile": make_token(self.user)}
+        )
+
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_tampered_token_is_ignored(self):
+        token = make_token(self.admin)
+
+        self.client.get(SHOWS_URL, headers={"X-Profile": token + "x"})
+
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sampled_requests_are_profiled(self):
+        self.client.get(SHOWS_URL)
+
+        profile = RequestProfile.objects.get()
+        self.assertEqual(profile.trigger, RequestProfile.Trigger.SAMPLE)
+        self.assertIsNone(profile.requested_by)
+
+    def test_profiles_are_staff_only(self):
+        self.client.force_authenticate(self.user)
+
+        self.assertEqual(self.client.get(PROFILE_URL).status_code,
+                         status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.post(TOKEN_URL).status_code,
+                         status.HTTP_403_FORBIDDEN)
+
+    def test_download_profile(self):
+        self.client.force_authenticate(self.admin)
+        token = make_token(self.admin)
+        profile_id = self.client.get(
+            SHOWS_URL, headers={"X-Profile": token}
+        )["X-Profile-Id"]
+
+        listing = self.client.get(PROFILE_URL)
+        download = self.client.get(
+            reverse("planetarium:requestprofile-download", args=[profile_id])
+        )
+
+        self.assertEqual(listing.data[0]["id"], int(profile_id))
+        self.assertEqual(download.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(marshal.loads(download.content), dict)
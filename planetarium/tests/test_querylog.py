@@ -0,0 +1,80 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from planetarium import querylog
+from planetarium.models import AstronomyShow, PlanetariumDome, ShowSession
+from planetarium.serializers import ShowSessionListSerializer
+
+
+class NormalizeSqlTests(TestCase):
+    def test_values_are_replaced(self):
+        sql = (
+            "SELECT * FROM t WHERE id IN (%s, %s, %s) "
+            "AND name = 'x' LIMIT 21"
+        )
+
+        self.assertEqual(
+            querylog.normalize_sql(sql),
+            "SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?",
+        )
+
+
+@override_settings(SLOW_QUERY_THRESHOLD=0.000001)
+class SlowQueryLogTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        user = get_user_model().objects.create_user(
+            email="user@example.com", password="password123"
+        )
+        self.client.force_authenticate(user)
+        show = AstronomyShow.objects.create(
+            title="Black Holes", description="A show about black holes"
+        )
+        dome = PlanetariumDome.objects.create(
+            name="Main Dome", rows=5, seats_in_row=5
+        )
+        ShowSession.objects.create(
+            show_time="2024-06-01T20:00:00Z",
+            astronomy_show=show,
+            planetarium_dome=dome,
+        )
+
+    def test_queries_are_attributed_to_view(self):
+        with self.assertLogs("planetarium.slow_queries", "WARNING"):
+            self.client.get(reverse("planetarium:astronomyshow-list"))
+
+        views = {row[6] for row in querylog.top_queries()}
+        self.assertIn("astronomyshow-list", views)
+
+    def test_queries_are_attributed_to_serializer_field(self):
+        session = ShowSession.objects.get()
+        recorder = querylog.SlowQueryRecorder("/", lambda: "test", 0)
+
+        with self.assertLogs("planetarium.slow_queries", "WARNING"):
+            with connection.execute_wrapper(recorder):
+                ShowSessionListSerializer(session).data
+
+        sites = sorted(row[7] for row in querylog.top_queries())
+        self.assertEqual(len(sites), 2)
+        self.assertIn("ShowSessionListSerializer.astronomy_show_title",
+                      sites[0])
+        self.assertIn("ShowSessionListSerializer.planetarium_dome_name",
+                      sites[1])
+        self.assertIn("test_querylog.py", sites[0])
+
+    def test_report_command(self):
+        with self.assertLogs("planetarium.slow_queries", "WARNING"):
+            self.client.get(reverse("planetarium:showsession-list"))
+        out = StringIO()
+
+        call_command("slow_queries", "--order", "count", stdout=out)
+        call_command("slow_queries", "--reset", stdout=StringIO())
+
+        self.assertIn("showsession-list", out.getvalue())
+        self.assertEqual(querylog.top_queries(), [])
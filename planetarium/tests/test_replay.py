@@ -0,0 +1,227 @@
+import asyncio
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import LiveServerTestCase, SimpleTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from planetarium.management.commands.replay_traffic import (
+    Command,
+    Connection,
+    Stats,
+    is_masked,
+)
+from planetarium.middleware import MASK
+from planetarium.models import ShowTheme
+
+THEMES_PATH = "/api/planetarium/show_themes/"
+
+
+class StatsTests(SimpleTestCase):
+    def test_percentile(self):
+        stats = Stats()
+        for latency in range(1, 101):
+            stats.record(latency, 200)
+
+        self.assertEqual(stats.percentile(0.5), 50)
+        self.assertEqual(stats.percentile(0.99), 99)
+        self.assertEqual(stats.percentile(1), 100)
+        self.assertEqual(stats.percentile(0), 1)
+
+    def test_histogram(self):
+        stats = Stats()
+        for latency in (1, 5, 7, 300, 9000):
+            stats.record(latency, 200)
+
+        histogram = dict(stats.histogram())
+
+        self.assertEqual(histogram["<=5ms"], 2)
+        self.assertEqual(histogram["<=10ms"], 1)
+        self.assertEqual(histogram["<=500ms"], 1)
+        self.assertEqual(histogram[">5000ms"], 1)
+        self.assertEqual(sum(histogram.values()), 5)
+
+    def test_errors(self):
+        stats = Stats()
+        stats.record(1, 200)
+        stats.record(1, 503)
+        stats.record(1, None)
+
+        self.assertEqual(stats.errors, 2)
+        self.assertEqual(stats.failures, 1)
+
+
+class BuildRequestTests(SimpleTestCase):
+    def setUp(self):
+        self.command = Command()
+        self.command.prefix = "/base"
+        self.command.options = {"token": "user", "admin_token": "admin"}
+
+    def test_request_of_a_user(self):
+        method, target, headers, body = self.command.build_request({
+            "method": "POST",
+            "path": THEMES_PATH,
+            "query": "page=2",
+            "user": "a1b2",
+            "body": {"name": "Space"},
+        })
+
+        self.assertEqual(method, "POST")
+        self.assertEqual(target, f"/base{THEMES_PATH}?page=2")
+        self.assertEqual(headers["Authorization"], "Bearer user")
+        self.assertEqual(headers["Content-Type"], "application/json")
+        self.assertEqual(json.loads(body), {"name": "Space"})
+
+    def test_request_of_staff_and_anonymous(self):
+        _, _, staff, _ = self.command.build_request(
+            {"method": "GET", "path": THEMES_PATH, "user": "a", "staff": True}
+        )
+        _, _, anonymous, body = self.command.build_request(
+            {"method": "GET", "path": THEMES_PATH}
+        )
+
+        self.assertEqual(staff["Authorization"], "Bearer admin")
+        self.assertNotIn("Authorization", anonymous)
+        self.assertEqual(body, b"")
+
+    def test_masked_bodies(self):
+        self.assertTrue(is_masked({"email": "a@b.c", "password": MASK}))
+        self.assertTrue(is_masked([{"user": {"email": MASK}}]))
+        self.assertFalse(is_masked({"tickets": [{"row": 1}]}))
+        self.assertFalse(is_masked(None))
+
+
+class ConnectionTests(SimpleTestCase):
+    async def exchange(self, respond, requests):
+        """Send requests on one connection to a server that may drop it.
+
+        The server answers while ``respond`` says so and closes every
+        connection after at most one response.
+        """
+        accepted = 0
+
+        async def handle(reader, writer):
+            nonlocal accepted
+            accepted += 1
+            while await reader.readline() not in (b"\r\n", b""):
+                pass
+            if respond(accepted):
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n")
+                await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        async with server:
+            port = server.sockets[0].getsockname()[1]
+            connection = Connection("127.0.0.1", port)
+            try:
+                statuses = [
+                    await connection.request("GET", "/", {}, b"")
+                    for _ in range(requests)
+                ]
+            finally:
+                connection.close()
+        return statuses, accepted
+
+    def test_closed_keep_alive_connection_is_reopened(self):
+        statuses, accepted = asyncio.run(
+            self.exchange(lambda accepted: True, requests=2)
+        )
+
+        self.assertEqual(statuses, [200, 200])
+        self.assertEqual(accepted, 2)
+
+    def test_fresh_connection_is_not_retried(self):
+        with self.assertRaises(ConnectionError):
+            asyncio.run(self.exchange(lambda accepted: False, requests=1))
+
+    def test_retry_happens_once(self):
+        with self.assertRaises(ConnectionError):
+            asyncio.run(
+                self.exchange(lambda accepted: accepted == 1, requests=2)
+            )
+
+
+class ReplayTrafficTests(LiveServerTestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.capture = os.path.join(tmp_dir.name, "traffic.jsonl")
+        user = get_user_model().objects.create_user(
+            email="user@example.com", password="password123"
+        )
+        self.token = str(AccessToken.for_user(user))
+        ShowTheme.objects.create(name="Space")
+
+    def write_capture(self, *entries):
+        with open(self.capture, "w") as capture:
+            for entry in entries:
+                capture.write(json.dumps(entry) + "\n")
+
+    def replay(self, *args):
+        out = StringIO()
+        call_command(
+            "replay_traffic",
+            self.capture,
+            "--base-url",
+            self.live_server_url,
+            "--token",
+            self.token,
+            "--concurrency",
+            "2",
+            *args,
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def test_replay_reports_each_endpoint(self):
+        self.write_capture(
+            {"method": "GET", "path": THEMES_PATH, "user": "a1",
+             "route": "planetarium:showtheme-list"},
+            {"method": "GET", "path": THEMES_PATH, "user": "a1",
+             "route": "planetarium:showtheme-list"},
+            {"method": "GET", "path": THEMES_PATH,
+             "route": "planetarium:showtheme-list"},
+            {"method": "GET", "path": "/api/planetarium/nothing/"},
+            {"method": "POST", "path": "/api/user/login/",
+             "body": {"email": MASK, "password": MASK}},
+        )
+
+        output = self.replay("--repeat", "2")
+
+        self.assertIn("Skipping 1 requests with masked credentials", output)
+        self.assertIn("Replaying 8 requests", output)
+        self.assertIn("8 requests in", output)
+        self.assertIn("GET planetarium:showtheme-list", output)
+        self.assertIn("6 requests", output)
+        self.assertIn("200: 4, 401: 2", output)
+        self.assertIn("404: 2", output)
+        self.assertIn("0 errors", output)
+
+    def test_masked_requests_can_be_included(self):
+        self.write_capture(
+            {"method": "POST", "path": "/api/user/login/",
+             "body": {"email": MASK, "password": MASK}},
+        )
+
+        output = self.replay("--include-masked", "--rate", "100")
+
+        self.assertIn("POST /api/user/login/", output)
+        self.assertIn("401: 1", output)
+
+    def test_base_url_scheme_is_checked(self):
+        self.write_capture({"method": "GET", "path": THEMES_PATH})
+
+        with self.assertRaisesMessage(CommandError, "http:// or https://"):
+            call_command(
+                "replay_traffic",
+                self.capture,
+                "--base-url",
+                "ftp://localhost",
+                stdout=StringIO(),
+            )
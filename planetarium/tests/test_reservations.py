@@ -0,0 +1,203 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium import reservations
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    Ticket,
+)
+
+RESERVATION_URL = reverse("planetarium:reservation-list")
+RESERVATION_BATCH_URL = reverse("planetarium:reservation-batch")
+
+
+class ReservationBatchApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="agency@example.com", password="password123"
+        )
+        self.client.force_authenticate(self.user)
+        show = AstronomyShow.objects.create(
+            title="Black Holes", description="A show about black holes"
+        )
+        dome = PlanetariumDome.objects.create(
+            name="Main Dome", rows=5, seats_in_row=5
+        )
+        self.session = ShowSession.objects.create(
+            show_time="2024-06-01T20:00:00Z",
+            astronomy_show=show,
+            planetarium_dome=dome,
+        )
+
+    def reservation(self, *seats):
+        return {
+            "tickets": [
+                {"row": row, "seat": seat, "show_session": self.session.id}
+                for row, seat in seats
+            ]
+        }
+
+    def test_batch_creates_all_reservations(self):
+        payload = {
+            "reservations": [
+                self.reservation((1, 1), (1, 2)),
+                self.reservation((2, 1)),
+            ]
+        }
+
+        response = self.client.post(
+            RESERVATION_BATCH_URL, payload, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(Reservation.objects.filter(user=self.user).count(),
+                         2)
+        self.assertEqual(Ticket.objects.count(), 3)
+        self.assertEqual(
+            len(response.data["results"][0]["reservation"]["tickets"]), 2
+        )
+
+    def test_atomic_batch_creates_nothing_on_failure(self):
+        payload = {
+            "reservations": [
+                self.reservation((1, 1)),
+                self.reservation((1, 1)),
+            ]
+        }
+
+        response = self.client.post(
+            RESERVATION_BATCH_URL, payload, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        statuses = [result["status"] for result in response.data["results"]]
+        self.assertEqual(statuses, [424, 400])
+        self.assertEqual(Reservation.objects.count(), 0)
+
+    def test_best_effort_batch_reports_each_item(self):
+        Ticket.objects.create(
+            show_session=self.session,
+            reservation=Reservation.objects.create(user=self.user),
+            row=3,
+            seat=3,
+        )
+        payload = {
+            "atomic": False,
+            "reservations": [
+                self.reservation((1, 1)),
+                self.reservation((3, 3)),
+                self.reservation((9, 9)),
+                {"tickets": []},
+            ],
+        }
+
+        response = self.client.post(
+            RESERVATION_BATCH_URL, payload, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        statuses = [result["status"] for result in response.data["results"]]
+        self.assertEqual(statuses, [201, 400, 400, 400])
+        errors = response.data["results"][2]["errors"]
+        self.assertIn("row", errors["tickets"][0])
+        self.assertEqual(Reservation.objects.count(), 2)
+
+    def test_best_effort_batch_survives_a_concurrent_booking(self):
+        payload = {
+            "atomic": False,
+            "reservations": [
+                self.reservation((1, 1)),
+                self.reservation((3, 3)),
+                self.reservation((1, 2)),
+            ],
+        }
+        check = reservations._ticket_errors
+
+        def booked_meanwhile(tickets, sessions, taken):
+            # Another request books 3-3 after the seats were checked.
+            if not Ticket.objects.exists():
+                Ticket.objects.create(
+                    show_session=self.session,
+                    reservation=Reservation.objects.create(user=self.user),
+                    row=3,
+                    seat=3,
+                )
+            return check(tickets, sessions, taken)
+
+        with mock.patch.object(
+            reservations, "_ticket_errors", side_effect=booked_meanwhile
+        ):
+            response = self.client.post(
+                RESERVATION_BATCH_URL, payload, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        statuses = [result["status"] for result in response.data["results"]]
+        self.assertEqual(statuses, [201, 409, 201])
+        self.assertEqual(
+            sorted(Ticket.objects.values_list("row", "seat")),
+            [(1, 1), (1, 2), (3, 3)],
+        )
+
+
+class ReservationListPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="staff@example.com", password="password123", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        Reservation.objects.bulk_create(
+            Reservation(user=self.user) for _ in range(3)
+        )
+
+    def test_small_list_is_counted_exactly(self):
+        response = self.client.get(RESERVATION_URL)
+
+        self.assertEqual(response.data["count"], 3)
+        self.assertFalse(response.data["count_is_estimate"])
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=0)
+    def test_large_list_count_is_estimated(self):
+        response = self.client.get(RESERVATION_URL)
+
+        self.assertTrue(response.data["count_is_estimate"])
+        self.assertEqual(len(response.data["results"]), 3)
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=0)
+    def test_every_row_is_reachable_past_a_low_estimate(self):
+        Reservation.objects.bulk_create(
+            Reservation(user=self.user) for _ in range(22)
+        )
+        ids = []
+        url = RESERVATION_URL
+
+        with mock.patch(
+            "planetarium.pagination.estimated_count", return_value=4
+        ):
+            while url:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.data["count"], 4)
+                ids += [item["id"] for item in response.data["results"]]
+                url = response.data["next"]
+            last_page = self.client.get(RESERVATION_URL, {"page": 3})
+            past_the_end = self.client.get(RESERVATION_URL, {"page": 4})
+
+        self.assertCountEqual(
+            ids, Reservation.objects.values_list("id", flat=True)
+        )
+        self.assertEqual(len(last_page.data["results"]), 5)
+        self.assertIsNotNone(last_page.data["previous"])
+        self.assertEqual(past_the_end.status_code,
+                         status.HTTP_404_NOT_FOUND)
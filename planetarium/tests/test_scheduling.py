@@ -0,0 +1,224 @@
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.models import AstronomyShow, PlanetariumDome, ShowSession
+from planetarium.scheduling import IntervalIndex
+
+BULK_SCHEDULE_URL = reverse("planetarium:showsession-bulk-schedule")
+SHOW_SESSION_URL = reverse("planetarium:showsession-list")
+
+
+def at(hour, minute=0):
+    return datetime(2024, 6, 3, hour, minute, tzinfo=timezone.utc)
+
+
+class IntervalIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = IntervalIndex()
+        self.index.add(1, at(10), at(11))
+        self.index.add(1, at(14), at(15))
+
+    def test_overlapping_interval_detected(self):
+        self.assertTrue(self.index.overlaps(1, at(10, 30), at(11, 30)))
+        self.assertTrue(self.index.overlaps(1, at(13), at(16)))
+        self.assertTrue(self.index.overlaps(1, at(9), at(10, 1)))
+
+    def test_adjacent_interval_is_free(self):
+        self.assertFalse(self.index.overlaps(1, at(11), at(14)))
+        self.assertFalse(self.index.overlaps(1, at(15), at(16)))
+
+    def test_domes_are_independent(self):
+        self.assertFalse(self.index.overlaps(2, at(10), at(11)))
+
+
+class BulkScheduleApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="admin@example.com", password="password123", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.show = AstronomyShow.objects.create(
+            title="Black Holes",
+            description="A show about black holes",
+            duration=90,
+        )
+        self.domes = [
+            PlanetariumDome.objects.create(
+                name=f"Dome {number}", rows=10, seats_in_row=10
+            )
+            for number in range(2)
+        ]
+
+    def payload(self, **overrides):
+        payload = {
+            "astronomy_show": self.show.id,
+            "planetarium_domes": [dome.id for dome in self.domes],
+            "start_date": "2024-06-03",
+            "end_date": "2024-06-16",
+            "weekdays": [0, 2, 4],
+            "times": ["10:00", "14:30"],
+        }
+        payload.update(overrides)
+        return payload
+
+    def test_schedule_is_expanded_and_created(self):
+        response = self.client.post(
+            BULK_SCHEDULE_URL, self.payload(), format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # 2 weeks * 3 days * 2 times * 2 domes
+        self.assertEqual(len(response.data), 24)
+        self.assertEqual(ShowSession.objects.count(), 24)
+        self.assertTrue(
+            ShowSession.objects.filter(
+                show_time="2024-06-05T14:30:00Z",
+                planetarium_dome=self.domes[1],
+            ).exists()
+        )
+
+    def test_clash_with_existing_session_creates_nothing(self):
+        ShowSession.objects.create(
+            show_time="2024-06-07T09:00:00Z",
+            astronomy_show=self.show,
+            planetarium_dome=self.domes[0],
+        )
+
+        response = self.client.post(
+            BULK_SCHEDULE_URL, self.payload(), format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json()["clashes"],
+            [
+                {
+                    "planetarium_dome": self.domes[0].id,
+                    "show_time": "2024-06-07T10:00:00+00:00",
+                }
+            ],
+        )
+        self.assertEqual(ShowSession.objects.count(), 1)
+
+    def test_end_date_before_start_date_rejected(self):
+        response = self.client.post(
+            BULK_SCHEDULE_URL,
+            self.payload(start_date="2024-06-16", end_date="2024-06-03"),
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_non_admin_cannot_bulk_schedule(self):
+        self.user.is_staff = False
+        self.user.save()
+
+        response = self.client.post(
+            BULK_SCHEDULE_URL, self.payload(), format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_overlapping_times_in_rule_are_clashes(self):
+        response = self.client.post(
+            BULK_SCHEDULE_URL,
+            self.payload(times=["10:00", "11:00"]),
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(ShowSession.objects.count(), 0)
+
+
+class ShowSessionOverlapTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="admin@example.com", password="password123", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.show = AstronomyShow.objects.create(
+            title="Black Holes", description="A show about black holes"
+        )
+        self.dome = PlanetariumDome.objects.create(
+            name="Main Dome", rows=10, seats_in_row=10
+        )
+        self.session = ShowSession.objects.create(
+            show_time="2024-06-01T20:00:00Z",
+            astronomy_show=self.show,
+            planetarium_dome=self.dome,
+        )
+
+    def test_end_time_follows_show_duration(self):
+        self.assertEqual(
+            self.session.end_time,
+            datetime(2024, 6, 1, 21, 0, tzinfo=timezone.utc),
+        )
+
+    def test_end_time_follows_duration_changes(self):
+        self.show.duration = 45
+        self.show.save()
+
+        self.session.refresh_from_db()
+        self.assertEqual(
+            self.session.end_time,
+            datetime(2024, 6, 1, 20, 45, tzinfo=timezone.utc),
+        )
+
+    def test_longer_show_must_not_overlap_next_session(self):
+        ShowSession.objects.create(
+            show_time="2024-06-01T21:30:00Z",
+            astronomy_show=AstronomyShow.objects.create(
+                title="Comets", description="Tails"
+            ),
+            planetarium_dome=self.dome,
+        )
+        self.show.duration = 120
+
+        with self.assertRaisesMessage(ValidationError, "would overlap"):
+            self.show.clean()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.show.save()
+
+        self.show.duration = 90
+        self.show.clean()
+
+    def test_overlapping_session_rejected_by_api(self):
+        response = self.client.post(
+            SHOW_SESSION_URL,
+            {
+                "show_time": "2024-06-01T20:30:00Z",
+                "astronomy_show": self.show.id,
+                "planetarium_dome": self.dome.id,
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_back_to_back_session_accepted(self):
+        response = self.client.post(
+            SHOW_SESSION_URL,
+            {
+                "show_time": "2024-06-01T21:00:00Z",
+                "astronomy_show": self.show.id,
+                "planetarium_dome": self.dome.id,
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_database_rejects_overlap(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ShowSession.objects.create(
+                show_time="2024-06-01T20:59:00Z",
+                astronomy_show=self.show,
+                planetarium_dome=self.dome,
+            )
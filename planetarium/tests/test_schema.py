@@ -0,0 +1,84 @@
+import gzip
+import json
+import tempfile
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from io import StringIO
+from rest_framework import status
+
+from planetarium.schema import accepts_gzip
+
+SCHEMA_URL = reverse("schema")
+
+
+class PrecomputedSchemaTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        schema_dir = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(schema_dir.cleanup)
+        cls.enterClassContext(
+            override_settings(SCHEMA_ARTIFACT_DIR=schema_dir.name)
+        )
+        call_command("build_schema", stdout=StringIO())
+
+    def test_schema_is_served_from_artifact(self):
+        response = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("openapi:", response.content.decode())
+        self.assertIn("ETag", response)
+
+    def test_unchanged_schema_is_not_sent_again(self):
+        etag = self.client.get(SCHEMA_URL)["ETag"]
+
+        response = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_gzip_and_json_variants(self):
+        response = self.client.get(
+            SCHEMA_URL, {"format": "json"}, HTTP_ACCEPT_ENCODING="gzip"
+        )
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        schema = json.loads(gzip.decompress(response.content))
+        self.assertIn("/api/planetarium/reservations/", schema["paths"])
+
+    def test_refused_gzip_is_not_sent(self):
+        response = self.client.get(
+            SCHEMA_URL, HTTP_ACCEPT_ENCODING="gzip;q=0, identity"
+        )
+
+        self.assertNotIn("Content-Encoding", response)
+        self.assertIn("openapi:", response.content.decode())
+
+    def test_missing_artifact(self):
+        with tempfile.TemporaryDirectory() as empty:
+            with self.settings(SCHEMA_ARTIFACT_DIR=empty):
+                response = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(response.status_code,
+                         status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+class AcceptsGzipTests(SimpleTestCase):
+    def test_q_values(self):
+        cases = {
+            "": False,
+            "gzip": True,
+            "GZIP;Q=0.5": True,
+            "x-gzip": True,
+            "gzip;q=0": False,
+            "gzip; q=0.000": False,
+            "br, *;q=0.5": True,
+            "*;q=0": False,
+            "*, gzip;q=0": False,
+            "identity": False,
+            "gzip;q=bogus": False,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertIs(accepts_gzip(header), expected)
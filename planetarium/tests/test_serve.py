@@ -0,0 +1,36 @@
+import subprocess
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from planetarium.management.commands import serve
+
+
+class FakeWorker:
+    def __init__(self, pid):
+        self.pid = pid
+
+
+class WorkerRecyclingTests(SimpleTestCase):
+    def test_rss_is_measured(self):
+        self.assertGreater(serve.rss_megabytes(), 1)
+
+    def test_worker_over_memory_limit_is_stopped(self):
+        process = subprocess.Popen(["sleep", "30"])
+        self.addCleanup(process.kill)
+
+        with mock.patch.object(serve, "RSS_CHECK_INTERVAL", 0.01):
+            serve.watch_memory(FakeWorker(process.pid), limit=1)
+            process.wait(timeout=5)
+
+        self.assertEqual(process.returncode, -15)
+
+    def test_worker_under_memory_limit_keeps_running(self):
+        process = subprocess.Popen(["sleep", "30"])
+        self.addCleanup(process.kill)
+
+        with mock.patch.object(serve, "RSS_CHECK_INTERVAL", 0.01):
+            stop = serve.watch_memory(FakeWorker(process.pid), limit=10 ** 6)
+            with self.assertRaises(subprocess.TimeoutExpired):
+                process.wait(timeout=0.2)
+            stop.set()
@@ -0,0 +1,110 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    Ticket,
+)
+
+SHOW_SESSION_URL = reverse("planetarium:showsession-list")
+ASTRONOMY_SHOW_URL = reverse("planetarium:astronomyshow-list")
+RESERVATION_URL = reverse("planetarium:reservation-list")
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="password123"
+        )
+        self.client.force_authenticate(self.user)
+        self.show = AstronomyShow.objects.create(
+            title="Black Holes", description="A show about black holes"
+        )
+        dome = PlanetariumDome.objects.create(
+            name="Main Dome", rows=5, seats_in_row=5
+        )
+        self.session = ShowSession.objects.create(
+            show_time="2024-06-01T20:00:00Z",
+            astronomy_show=self.show,
+            planetarium_dome=dome,
+        )
+        Ticket.objects.create(
+            show_session=self.session,
+            reservation=Reservation.objects.create(user=self.user),
+            row=1,
+            seat=1,
+        )
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, " ".join(
+            query["sql"] for query in context.captured_queries
+        )
+
+    def test_fields_skip_joins_and_annotation(self):
+        response, sql = self.get(
+            SHOW_SESSION_URL, {"fields": "id,show_time"}
+        )
+
+        self.assertEqual(
+            response.data,
+            [{"id": self.session.id, "show_time": "2024-06-01T20:00:00Z"}],
+        )
+        self.assertNotIn("planetarium_ticket", sql)
+        self.assertNotIn("planetarium_astronomyshow", sql)
+        self.assertNotIn("planetarium_planetariumdome", sql)
+
+    def test_omit_keeps_other_fields(self):
+        response, sql = self.get(
+            SHOW_SESSION_URL, {"omit": "tickets_available"}
+        )
+
+        self.assertNotIn("tickets_available", response.data[0])
+        self.assertEqual(
+            response.data[0]["astronomy_show_title"], "Black Holes"
+        )
+        self.assertNotIn("planetarium_ticket", sql)
+
+    def test_all_fields_by_default(self):
+        response, _ = self.get(SHOW_SESSION_URL, {})
+
+        self.assertEqual(response.data[0]["tickets_available"], 24)
+        self.assertEqual(response.data[0]["planetarium_dome_name"],
+                         "Main Dome")
+
+    def test_deferred_columns(self):
+        response, sql = self.get(
+            ASTRONOMY_SHOW_URL, {"title": "black", "fields": "id,title"}
+        )
+
+        self.assertEqual(
+            response.data, [{"id": self.show.id, "title": "Black Holes"}]
+        )
+        self.assertNotIn("description", sql)
+        self.assertNotIn("planetarium_showtheme", sql)
+
+    def test_reservations_without_tickets(self):
+        response, sql = self.get(
+            RESERVATION_URL, {"fields": "id,created_at"}
+        )
+
+        self.assertEqual(
+            set(response.data["results"][0]), {"id", "created_at"}
+        )
+        self.assertNotIn("planetarium_ticket", sql)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(SHOW_SESSION_URL, {"fields": "id,price"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("price", str(response.data["fields"]))
@@ -0,0 +1,181 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium import caching, startup
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    Ticket,
+)
+
+LIVE_URL = reverse("health-live")
+READY_URL = reverse("health-ready")
+
+
+class CachingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="password123"
+        )
+        self.client.force_authenticate(self.user)
+        self.show = AstronomyShow.objects.create(
+            title="Black Holes", description="A show about black holes"
+        )
+        dome = PlanetariumDome.objects.create(
+            name="Main Dome", rows=5, seats_in_row=5
+        )
+        self.session = ShowSession.objects.create(
+            show_time=timezone.now(),
+            astronomy_show=self.show,
+            planetarium_dome=dome,
+        )
+
+    def test_seat_map_follows_new_tickets(self):
+        self.assertEqual(caching.seat_map(self.session.id), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("planetarium:reservation-batch"),
+                {
+                    "reservations": [{
+                        "tickets": [{
+                            "row": 1,
+                            "seat": 2,
+                            "show_session": self.session.id,
+                        }]
+                    }]
+                },
+                format="json",
+            )
+            Ticket.objects.create(
+                reservation=Reservation.objects.create(user=self.user),
+                show_session=self.session,
+                row=3,
+                seat=4,
+            )
+
+        self.assertEqual(caching.seat_map(self.session.id), [(1, 2), (3, 4)])
+        response = self.client.get(
+            reverse("planetarium:showsession-detail", args=[self.session.id])
+        )
+        self.assertEqual(
+            response.data["taken_places"],
+            [{"row": 1, "seat": 2}, {"row": 3, "seat": 4}],
+        )
+
+    def test_catalog_follows_show_changes(self):
+        url = reverse("planetarium:astronomyshow-list")
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AstronomyShow.objects.create(title="Comets", description="Tails")
+            self.show.title = "Wormholes"
+            self.show.save()
+        response = self.client.get(url)
+
+        titles = {show["title"] for show in response.data}
+        self.assertEqual(titles, {"Comets", "Wormholes"})
+
+    def test_catalog_payload_is_cached(self):
+        url = reverse("planetarium:astronomyshow-list")
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as cached:
+            response = self.client.get(url)
+        filtered = self.client.get(url, {"fields": "id"})
+
+        self.assertEqual(len(cached), 0)
+        self.assertEqual(response.data[0]["title"], "Black Holes")
+        self.assertEqual(filtered.data, [{"id": self.show.id}])
+
+
+class HealthTests(TestCase):
+    def test_liveness(self):
+        response = self.client.get(LIVE_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_ready_once_warmed_up(self):
+        startup.warm_up()
+
+        response = self.client.get(READY_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["checks"],
+            {"database": "ok", "migrations": "ok", "warm_up": "ok"},
+        )
+        self.assertTrue(startup.state["warm"])
+
+    def test_probe_does_not_warm_up(self):
+        with mock.patch.dict(
+            startup.state, warm=False, error=None
+        ), mock.patch.object(startup, "warm_up") as warm_up:
+            response = self.client.get(READY_URL)
+
+        self.assertEqual(response.status_code,
+                         status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.data["checks"]["warm_up"], "in progress")
+        warm_up.assert_not_called()
+
+    def test_migrations_are_checked_until_applied(self):
+        with mock.patch.dict(
+            startup.state, migrated=False
+        ), mock.patch.object(
+            startup,
+            "pending_migrations",
+            side_effect=[["planetarium.0010_next"], []],
+        ) as pending_migrations:
+            checks = [startup.readiness()[1]["migrations"]
+                      for _ in range(3)]
+
+        self.assertEqual(checks, ["1 pending", "ok", "ok"])
+        self.assertEqual(pending_migrations.call_count, 2)
+
+    def test_not_ready_without_database(self):
+        with mock.patch.object(
+            startup,
+            "check_database",
+            side_effect=OperationalError("connection refused"),
+        ):
+            response = self.client.get(READY_URL)
+
+        self.assertEqual(response.status_code,
+                         status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn(
+            "connection refused", response.data["checks"]["database"]
+        )
+
+
+class WaitForDbTests(TestCase):
+    def test_database_available(self):
+        out = StringIO()
+
+        call_command("wait_for_db", "--wait-for-migrations", stdout=out)
+
+        self.assertIn("Database available!", out.getvalue())
+
+    def test_gives_up_after_timeout(self):
+        with mock.patch(
+            "planetarium.management.commands.wait_for_db.check_database",
+            side_effect=OperationalError("connection refused"),
+        ) as check, self.assertRaisesMessage(CommandError, "Gave up"):
+            call_command(
+                "wait_for_db", "--timeout", "0.5", stdout=StringIO()
+            )
+
+        self.assertGreater(check.call_count, 1)
@@ -0,0 +1,82 @@
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.tests.samples import (
+    sample_show_session,
+    sample_user,
+)
+from planetarium.throttling import hit
+
+RESERVATION_URL = reverse("planetarium:reservation-list")
+RESERVATION_BATCH_URL = reverse("planetarium:reservation-batch")
+
+
+class SlidingWindowThrottleTests(SimpleTestCase):
+    def test_rejects_requests_over_limit(self):
+        for _ in range(3):
+            allowed, _wait = hit("key", 3, 60, 1, now=600)
+            self.assertTrue(allowed)
+
+        allowed, wait = hit("key", 3, 60, 1, now=610)
+        self.assertFalse(allowed)
+        self.assertGreater(wait, 0)
+
+    def test_previous_window_decays(self):
+        for _ in range(4):
+            hit("key", 4, 60, 1, now=600)
+
+        # 3/4 of the previous window still overlaps: 4 * 0.75 = 3 used.
+        self.assertTrue(hit("key", 4, 60, 1, now=675)[0])
+        self.assertFalse(hit("key", 4, 60, 1, now=676)[0])
+
+    def test_cost_is_charged(self):
+        self.assertTrue(hit("key", 10, 60, 6, now=600)[0])
+        self.assertFalse(hit("key", 10, 60, 6, now=601)[0])
+        self.assertTrue(hit("key", 10, 60, 4, now=602)[0])
+
+    def test_keys_are_independent(self):
+        hit("first", 1, 60, 1, now=600)
+        self.assertFalse(hit("first", 1, 60, 1, now=601)[0])
+        self.assertTrue(hit("second", 1, 60, 1, now=601)[0])
+
+
+class BookingAllowanceTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(sample_user())
+        self.session = sample_show_session()
+
+    def book(self, url, number):
+        row, seat = divmod(number, 10)
+        ticket = {
+            "row": row + 1, "seat": seat + 1, "show_session": self.session.id
+        }
+        if url == RESERVATION_BATCH_URL:
+            payload = {"reservations": [{"tickets": [ticket]}]}
+        else:
+            payload = {"tickets": [ticket]}
+        return self.client.post(url, payload, format="json").status_code
+
+    def test_batches_have_their_own_allowance(self):
+        statuses = [
+            self.book(RESERVATION_BATCH_URL, number) for number in range(7)
+        ]
+
+        # 60 per minute at 10 per batch.
+        self.assertEqual(
+            statuses, [status.HTTP_201_CREATED] * 6
+            + [status.HTTP_429_TOO_MANY_REQUESTS]
+        )
+        self.assertEqual(
+            self.client.get(RESERVATION_URL).status_code, status.HTTP_200_OK
+        )
+
+    def test_single_bookings_keep_the_user_rate(self):
+        statuses = [self.book(RESERVATION_URL, number) for number in range(31)]
+
+        self.assertEqual(
+            statuses, [status.HTTP_201_CREATED] * 30
+            + [status.HTTP_429_TOO_MANY_REQUESTS]
+        )
@@ -0,0 +1,157 @@
+import random
+
+from rest_framework.throttling import (
+    SimpleRateThrottle,
+    AnonRateThrottle,
+    ScopedRateThrottle,
+    UserRateThrottle,
+)
+
+from planetarium.metrics import count_rejection
+from planetarium.store import get_store
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS throttle_window (
+    key TEXT PRIMARY KEY,
+    window INTEGER NOT NULL,
+    current INTEGER NOT NULL,
+    previous INTEGER NOT NULL,
+    expires REAL NOT NULL
+);
+"""
+
+PURGE_PROBABILITY = 0.01
+
+
+def hit(key, num_requests, duration, cost, now):
+    """Charge ``cost`` against ``key`` unless it would exceed the limit.
+
+    Returns ``(allowed, wait)``, where ``wait`` is the number of seconds
+    until the request would fit (``None`` if it never will).
+    """
+    store = get_store()
+    store.ensure_schema("throttle", SCHEMA)
+    window, offset = divmod(now, duration)
+    window = int(window)
+
+    with store.transaction() as connection:
+        row = connection.execute(
+            "SELECT window, current, previous FROM throttle_window "
+            "WHERE key = ?",
+            (key,),
+        ).fetchone()
+        current = previous = 0
+        if row is not None:
+            if row[0] == window:
+                current, previous = row[1], row[2]
+            elif row[0] == window - 1:
+                previous = row[1]
+
+        elapsed = offset / duration
+        estimate = previous * (1 - elapsed) + current
+        if estimate + cost > num_requests:
+            return False, _wait(
+                num_requests, duration, cost, current, previous, offset
+            )
+
+        connection.execute(
+            "INSERT INTO throttle_window "
+            "(key, window, current, previous, expires) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET window = excluded.window, "
+            "current = excluded.current, previous = excluded.previous, "
+            "expires = excluded.expires",
+            (key, window, current + cost, previous,
+             (window + 2) * duration),
+        )
+        if random.random() < PURGE_PROBABILITY:
+            connection.execute(
+                "DELETE FROM throttle_window WHERE expires < ?", (now,)
+            )
+    return True, None
+
+
+def _wait(num_requests, duration, cost, current, previous, offset):
+    if cost > num_requests:
+        return None
+    if current + cost > num_requests:
+        # The current window is spent; wait for it to become the
+        # previous one and decay far enough to fit the request.
+        decay = 1 - (num_requests - cost) / current
+        return duration - offset + duration * max(decay, 0)
+    decay = 1 - (num_requests - cost - current) / previous
+    return max(duration * decay - offset, 0)
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """Sliding-window throttle whose counters live in the shared store.
+
+    Only two counters are kept per key (the current and the previous fixed
+    window), the previous one weighted by its overlap with the sliding
+    window, so a check costs the same whatever the rate. The store is
+    shared by all workers, so the configured rate holds per host rather
+    than per process.
+
+    Requests cost 1 unless the view's ``get_throttle_cost`` says
+    otherwise. Requests made by a batch were paid for by the batch.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None or getattr(request, "batch_item", False):
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        allowed, self.wait_seconds = hit(
+            self.key,
+            self.num_requests,
+            self.duration,
+            self.get_cost(request, view),
+            self.now,
+        )
+        if not allowed:
+            count_rejection(view, self.scope)
+        return allowed
+
+    def get_cost(self, request, view):
+        if hasattr(view, "get_throttle_cost"):
+            return view.get_throttle_cost(request)
+        return 1
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AnonSlidingWindowThrottle(SlidingWindowRateThrottle, AnonRateThrottle):
+    pass
+
+
+class UserSlidingWindowThrottle(SlidingWindowRateThrottle, UserRateThrottle):
+    pass
+
+
+class ScopedSlidingWindowThrottle(
+    SlidingWindowRateThrottle, ScopedRateThrottle
+):
+    """Weigh expensive actions against a rate of their own.
+
+    Actions listed in a view's ``throttle_costs`` mapping of action name
+    to cost are charged that cost against the view's ``throttle_scope``
+    rate, on top of the usual user or anon rate, so they do not use up
+    the allowance for browsing. Other actions pass.
+    """
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, "throttle_scope", None)
+        costs = getattr(view, "throttle_costs", {})
+        if not self.scope or getattr(view, "action", None) not in costs:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_cost(self, request, view):
+        return view.throttle_costs[view.action]
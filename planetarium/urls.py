@@ -7,6 +7,8 @@ from planetarium.views import (
     PlanetariumDomeViewSet,
     ShowSessionViewSet,
     ReservationViewSet,
+    RequestProfileViewSet,
+    ArchivedSessionViewSet,
 )
 
 router = routers.DefaultRouter()
@@ -15,6 +17,10 @@ router.register("astronomy_shows", AstronomyShowViewSet)
 router.register("planetarium_domes", PlanetariumDomeViewSet)
 router.register("show_sessions", ShowSessionViewSet)
 router.register("reservations", ReservationViewSet)
+router.register("profiles", RequestProfileViewSet)
+router.register(
+    "archived_sessions", ArchivedSessionViewSet, basename="archivedsession"
+)
 
 urlpatterns = [
     path("", include(router.urls)),
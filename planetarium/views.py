@@ -1,37 +1,72 @@
 from datetime import datetime
-from django.db.models import F, Count
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from planetarium import archive, caching
+from planetarium.admission import AdmissionControlMixin
+from planetarium.batch import (
+    BatchRequestSerializer,
+    BatchResponseSerializer,
+    run_batch,
+)
+from planetarium.idempotency import IdempotencyMixin
+from planetarium.images import process_show_image
+from planetarium.metrics import (
+    MetricsTokenAuthentication,
+    PrometheusRenderer,
+    registry,
+)
+from planetarium.pagination import EstimatedCountPagination
+from planetarium.profiling import make_token
+from planetarium.sparse import FIELDS, OMIT, SparseFieldsMixin
+from planetarium.startup import readiness
 from planetarium.models import (
     ShowTheme,
     AstronomyShow,
     PlanetariumDome,
     ShowSession,
-    Reservation
+    Reservation,
+    RequestProfile,
+)
+from planetarium.permissions import (
+    CanViewMetrics,
+    IsAdminOrIfAuthenticatedReadOnly,
+)
+from planetarium.reservations import (
+    ReservationBatchSerializer,
+    book_reservations,
 )
-from planetarium.permissions import IsAdminOrIfAuthenticatedReadOnly
 from planetarium.serializers import (
     ShowThemeSerializer,
     AstronomyShowSerializer,
     AstronomyShowDetailSerializer,
+    AstronomyShowCalendarSerializer,
     PlanetariumDomeSerializer,
     ShowSessionSerializer,
     ShowSessionListSerializer,
     ShowSessionDetailSerializer,
+    ShowSessionScheduleSerializer,
     ReservationSerializer,
     ReservationListSerializer,
     AstronomyShowImageSerializer,
+    RequestProfileListSerializer,
+    RequestProfileDetailSerializer,
 )
 
 
 class ShowThemeViewSet(
+    IdempotencyMixin,
+    SparseFieldsMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
@@ -42,6 +77,8 @@ class ShowThemeViewSet(
 
 
 class AstronomyShowViewSet(
+    IdempotencyMixin,
+    SparseFieldsMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -55,12 +92,29 @@ class AstronomyShowViewSet(
     def _params_to_ints(qs):
         return [int(str_id) for str_id in qs.split(",")]
 
+    def is_catalog(self):
+        """Whether the request lists every show with all its fields."""
+        params = self.request.query_params
+        return self.action == "list" and not any(
+            params.get(name) for name in ("title", "theme", FIELDS, OMIT)
+        )
+
     def get_queryset(self):
         title = self.request.query_params.get("title")
         theme = self.request.query_params.get("theme")
 
+        if self.action == "calendar":
+            return AstronomyShow.objects.only("id")
+
         queryset = self.queryset
 
+        if not self.wants("theme"):
+            queryset = queryset.prefetch_related(None)
+        if not self.wants("description"):
+            queryset = queryset.defer("description")
+        if not self.wants("image", "image_renditions"):
+            queryset = queryset.defer("image", "image_renditions")
+
         if title:
             queryset = queryset.filter(title__icontains=title)
 
@@ -82,6 +136,11 @@ class AstronomyShowViewSet(
 
         return AstronomyShowSerializer
 
+    def perform_create(self, serializer):
+        astronomy_show = serializer.save()
+        if astronomy_show.image:
+            process_show_image.enqueue(astronomy_show.id)
+
     @action(
         methods=["POST"],
         detail=True,
@@ -93,13 +152,48 @@ class AstronomyShowViewSet(
         serializer = self.get_serializer(astronomy_show, data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
+            serializer.save(
+                image_width=None, image_height=None, image_renditions={}
+            )
+            process_show_image.enqueue(astronomy_show.id)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response(
             serializer.errors, status=status.HTTP_400_BAD_REQUEST
         )
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="month",
+                description="Month to show (e.g., ?month=2024-06), "
+                            "the current one by default",
+                required=False,
+                type=str,
+            ),
+        ],
+        responses=AstronomyShowCalendarSerializer,
+    )
+    @action(methods=["GET"], detail=True, url_path="calendar")
+    def calendar(self, request, pk=None):
+        """Days of a month with sessions of the show and seats left."""
+        astronomy_show = self.get_object()
+        month = request.query_params.get("month")
+        if month:
+            try:
+                month = datetime.strptime(month, "%Y-%m").date()
+            except ValueError:
+                raise ValidationError({"month": "Use the YYYY-MM format."})
+        else:
+            month = timezone.localdate()
+        return Response(AstronomyShowCalendarSerializer({
+            "astronomy_show": astronomy_show.id,
+            "month": f"{month:%Y-%m}",
+            "days": caching.calendar(
+                astronomy_show.id, month.year, month.month
+            ),
+        }).data)
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -118,10 +212,21 @@ class AstronomyShowViewSet(
         ],
     )
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        if not self.is_catalog():
+            return super().list(request, *args, **kwargs)
+        build = super().list
+        return Response(caching.catalog(
+            lambda: list(build(request, *args, **kwargs).data),
+            variant=(
+                f"{request.build_absolute_uri('/')}"
+                f"{request.query_params.get('image_format', '')}"
+            ),
+        ))
 
 
 class PlanetariumDomeViewSet(
+    IdempotencyMixin,
+    SparseFieldsMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
@@ -131,17 +236,11 @@ class PlanetariumDomeViewSet(
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
 
-class ShowSessionViewSet(viewsets.ModelViewSet):
-    queryset = (
-        ShowSession.objects.all()
-        .select_related("astronomy_show", "planetarium_dome")
-        .annotate(
-            tickets_available=(
-                    F("planetarium_dome__rows") * F(
-                     "planetarium_dome__seats_in_row")
-                    - Count("tickets")
-            )
-        )
+class ShowSessionViewSet(
+    IdempotencyMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
+    queryset = ShowSession.objects.select_related(
+        "astronomy_show", "planetarium_dome"
     )
     serializer_class = ShowSessionSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
@@ -150,7 +249,32 @@ class ShowSessionViewSet(viewsets.ModelViewSet):
         date = self.request.query_params.get("date")
         show_id_str = self.request.query_params.get("show")
 
-        queryset = self.queryset
+        queryset = super().get_queryset()
+
+        related = [
+            name for name, fields in (
+                ("astronomy_show", (
+                    "astronomy_show_title", "astronomy_show_image"
+                )),
+                ("planetarium_dome", (
+                    "planetarium_dome_name", "planetarium_dome_capacity"
+                )),
+            )
+            if self.wants(name, *fields)
+        ]
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+
+        if self.action == "list":
+            if "astronomy_show" in related:
+                queryset = queryset.defer("astronomy_show__description")
+            if self.wants("tickets_available"):
+                queryset = queryset.annotate(
+                    tickets_available=(
+                        ShowSession.tickets_available_expression()
+                    )
+                )
 
         if date:
             date = datetime.strptime(date, "%Y-%m-%d").date()
@@ -161,6 +285,11 @@ class ShowSessionViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def perform_update(self, serializer):
+        # The show the session is moved away from loses it too.
+        caching.invalidate_calendars([serializer.instance.astronomy_show_id])
+        super().perform_update(serializer)
+
     def get_serializer_class(self):
         if self.action == "list":
             return ShowSessionListSerializer
@@ -168,8 +297,27 @@ class ShowSessionViewSet(viewsets.ModelViewSet):
         if self.action == "retrieve":
             return ShowSessionDetailSerializer
 
+        if self.action == "bulk_schedule":
+            return ShowSessionScheduleSerializer
+
         return ShowSessionSerializer
 
+    @extend_schema(responses=ShowSessionSerializer(many=True))
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="bulk-schedule",
+        permission_classes=[IsAdminUser],
+    )
+    def bulk_schedule(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        show_sessions = serializer.save()
+        return Response(
+            ShowSessionSerializer(show_sessions, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -191,17 +339,20 @@ class ShowSessionViewSet(viewsets.ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class ReservationPagination(PageNumberPagination):
+class ReservationPagination(EstimatedCountPagination):
     page_size = 10
     max_page_size = 100
 
 
 class ReservationViewSet(
+    AdmissionControlMixin,
+    IdempotencyMixin,
+    SparseFieldsMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
 ):
-    queryset = Reservation.objects.prefetch_related(
+    queryset = Reservation.objects.select_related("user").prefetch_related(
         "tickets__show_session__astronomy_show",
         "tickets__show_session__planetarium_dome"
     )
@@ -209,18 +360,236 @@ class ReservationViewSet(
     pagination_class = ReservationPagination
     authentication_classes = (JWTAuthentication,)
     permission_classes = (IsAuthenticated,)
+    throttle_scope = "booking"
+    throttle_costs = {"create": 1, "batch": 10}
+    admission_actions = ("create", "batch")
 
     def get_queryset(self):
         user = self.request.user
+        queryset = super().get_queryset()
+        if not self.wants("user"):
+            queryset = queryset.select_related(None)
+        if not self.wants("tickets"):
+            queryset = queryset.prefetch_related(None)
         if user.is_staff:
-            return Reservation.objects.all()
-        return Reservation.objects.filter(user=user)
+            return queryset
+        return queryset.filter(user=user)
 
     def get_serializer_class(self):
         if self.action == "list":
             return ReservationListSerializer
 
+        if self.action == "batch":
+            return ReservationBatchSerializer
+
         return ReservationSerializer
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+    @action(methods=["POST"], detail=False, url_path="batch")
+    def batch(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = book_reservations(
+            request.user,
+            serializer.validated_data["reservations"],
+            atomic=serializer.validated_data["atomic"],
+        )
+
+        created = sum(result["status"] == 201 for result in results)
+        if created == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(
+            {
+                "created": created,
+                "failed": len(results) - created,
+                "results": results,
+            },
+            status=response_status,
+        )
+
+
+class RequestProfileViewSet(
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    GenericViewSet,
+):
+    queryset = RequestProfile.objects.select_related("requested_by")
+    serializer_class = RequestProfileDetailSerializer
+    permission_classes = (IsAdminUser,)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            queryset = queryset.defer("summary", "stats")
+        view_name = self.request.query_params.get("view_name")
+        if view_name:
+            queryset = queryset.filter(view_name=view_name)
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return RequestProfileListSerializer
+
+        return RequestProfileDetailSerializer
+
+    @action(methods=["GET"], detail=True, url_path="download")
+    def download(self, request, pk=None):
+        """Download the profile in pstats format (e.g. for snakeviz)."""
+        profile = self.get_object()
+        response = HttpResponse(
+            bytes(profile.stats), content_type="application/octet-stream"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="profile-{profile.id}.prof"'
+        )
+        return response
+
+    @extend_schema(request=None, responses={201: None})
+    @action(methods=["POST"], detail=False, url_path="token")
+    def token(self, request):
+        """Issue a value for the X-Profile header of requests to profile."""
+        return Response(
+            {"header": "X-Profile", "value": make_token(request.user)},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class ArchivedSessionViewSet(viewsets.ViewSet):
+    """Past show sessions moved out by ``manage.py archive_sessions``.
+
+    Streams one JSON object per line, read from the archive files, so
+    large ranges are never held in memory.
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    @staticmethod
+    def _date_param(request, name):
+        value = request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            raise ValidationError({name: "Use the YYYY-MM-DD format."})
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="date_from",
+                description="Sessions shown on or after this date "
+                            "(e.g., ?date_from=2021-01-01)",
+                required=False,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="date_to",
+                description="Sessions shown on or before this date "
+                            "(e.g., ?date_to=2021-12-31)",
+                required=False,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="show",
+                description="Optional filter by show ID",
+                required=False,
+                type=int,
+            ),
+        ],
+        responses={(200, "application/x-ndjson"): str},
+    )
+    def list(self, request):
+        show_id_str = request.query_params.get("show")
+        if show_id_str and not show_id_str.isdigit():
+            raise ValidationError({"show": "Must be a show ID."})
+        return StreamingHttpResponse(
+            archive.archived_sessions(
+                date_from=self._date_param(request, "date_from"),
+                date_to=self._date_param(request, "date_to"),
+                show_id=int(show_id_str) if show_id_str else None,
+            ),
+            content_type="application/x-ndjson",
+        )
+
+
+class BatchView(APIView):
+    """Run several GET requests to the API in one round trip.
+
+    Each request goes through its own view and permissions as the
+    batch's user, and the responses come back in order with their
+    status codes. The batch is throttled once, at one request per item.
+    Items skip the middleware: they are recorded in the request metrics,
+    but slow queries and traffic capture only see the batch.
+    """
+
+    def get_throttle_cost(self, request):
+        data = request.data
+        if isinstance(data, dict) and isinstance(data.get("requests"), list):
+            return min(max(len(data["requests"]), 1),
+                       settings.BATCH_MAX_REQUESTS)
+        return 1
+
+    @extend_schema(
+        request=BatchRequestSerializer, responses=BatchResponseSerializer
+    )
+    def post(self, request):
+        serializer = BatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({
+            "responses": run_batch(
+                request,
+                serializer.validated_data["requests"],
+                concurrent=serializer.validated_data["concurrent"],
+            ),
+        })
+
+
+class MetricsView(APIView):
+    """Prometheus metrics aggregated over every worker on the host."""
+
+    authentication_classes = (MetricsTokenAuthentication, JWTAuthentication)
+    permission_classes = (CanViewMetrics,)
+    renderer_classes = (PrometheusRenderer,)
+    throttle_classes = ()
+
+    @extend_schema(exclude=True)
+    def get(self, request):
+        return Response(registry.render())
+
+
+class LivenessView(APIView):
+    """Answer as long as the process serves requests at all."""
+
+    authentication_classes = ()
+    permission_classes = ()
+    throttle_classes = ()
+
+    @extend_schema(exclude=True)
+    def get(self, request):
+        return Response({"status": "ok"})
+
+
+class ReadinessView(APIView):
+    """Report whether this worker is connected, migrated and warmed up."""
+
+    authentication_classes = ()
+    permission_classes = ()
+    throttle_classes = ()
+
+    @extend_schema(exclude=True)
+    def get(self, request):
+        ready, checks = readiness()
+        return Response(
+            {"status": "ok" if ready else "unavailable", "checks": checks},
+            status=(
+                status.HTTP_200_OK
+                if ready
+                else status.HTTP_503_SERVICE_UNAVAILABLE
+            ),
+        )
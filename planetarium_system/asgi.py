@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'planetarium_system.settings')
 
 application = get_asgi_application()
+
+from planetarium.startup import warm_up_in_background  # noqa: E402
+
+warm_up_in_background()
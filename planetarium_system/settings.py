@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 import environ
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
@@ -41,6 +42,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'drf_spectacular',
@@ -50,12 +52,16 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'planetarium.middleware.MetricsMiddleware',
+    'planetarium.middleware.SlowQueryLogMiddleware',
+    'planetarium.middleware.RequestProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'planetarium.middleware.TrafficCaptureMiddleware',
 ]
 
 ROOT_URLCONF = 'planetarium_system.urls'
@@ -85,12 +91,36 @@ REST_FRAMEWORK = {
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "planetarium.throttling.AnonSlidingWindowThrottle",
+        "planetarium.throttling.UserSlidingWindowThrottle",
+        "planetarium.throttling.ScopedSlidingWindowThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "10/min", "user": "30/min"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": "10/min",
+        "user": "30/min",
+        # Bookings, weighed by the views' throttle_costs.
+        "booking": "60/min",
+    },
 }
 
+# Host-local SQLite file holding state that all worker processes share
+# (throttle counters and similar).
+SHARED_STORE_PATH = env(
+    "SHARED_STORE_PATH",
+    default=str(Path(tempfile.gettempdir()) / "planetarium-shared.sqlite3"),
+)
+
+# Tests get a shared store of their own, emptied before every test.
+TEST_RUNNER = "planetarium_system.test_runner.TestRunner"
+
+# Cached seat maps, show catalog and show calendars; their versions live
+# in the shared store, so a per-process cache is never read stale after a
+# write.
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+SEAT_MAP_CACHE_TIMEOUT = 60
+CATALOG_CACHE_TIMEOUT = 300
+CALENDAR_CACHE_TIMEOUT = 60
+
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
@@ -125,6 +155,68 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+PASSWORD_HASHERS = [
+    # Django looks hashers up by algorithm name and keeps the last entry
+    # for a name, so no other pbkdf2_sha256 hasher may follow this one.
+    "user.hashers.PooledPBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
+# Processes per worker that run password hashing (0 hashes inline), and
+# the host-wide number of register/login requests allowed in flight.
+PASSWORD_HASHING_WORKERS = env.int("PASSWORD_HASHING_WORKERS", default=2)
+AUTH_CONCURRENCY_LIMIT = env.int("AUTH_CONCURRENCY_LIMIT", default=8)
+
+# How long a POST response is kept for replay under its Idempotency-Key,
+# and how long a duplicate waits for the original request to finish.
+IDEMPOTENCY_KEY_TTL = env.int("IDEMPOTENCY_KEY_TTL", default=24 * 3600)
+IDEMPOTENCY_WAIT_TIMEOUT = env.float(
+    "IDEMPOTENCY_WAIT_TIMEOUT", default=10.0
+)
+
+# Waiting room for bookings: requests per show session served at once,
+# clients allowed to queue for it, and lease/queue token lifetimes.
+ADMISSION_SESSION_CONCURRENCY = env.int(
+    "ADMISSION_SESSION_CONCURRENCY", default=20
+)
+ADMISSION_QUEUE_LIMIT = env.int("ADMISSION_QUEUE_LIMIT", default=500)
+ADMISSION_LEASE = 30
+ADMISSION_TOKEN_TTL = 30
+
+# Share of /api/ requests written, anonymised, to TRAFFIC_CAPTURE_PATH
+# for replay_traffic (0 turns capturing off).
+TRAFFIC_CAPTURE_RATE = env.float("TRAFFIC_CAPTURE_RATE", default=0.0)
+TRAFFIC_CAPTURE_PATH = env(
+    "TRAFFIC_CAPTURE_PATH",
+    default=str(BASE_DIR / "captures" / "traffic.jsonl"),
+)
+TRAFFIC_CAPTURE_PREFIX = "/api/"
+
+# Share of requests profiled at random (requests can also be profiled
+# on demand with a signed X-Profile header), how long such a header stays
+# valid, and how many profiles are kept.
+PROFILING_SAMPLE_RATE = env.float("PROFILING_SAMPLE_RATE", default=0.0)
+PROFILING_TOKEN_MAX_AGE = 3600
+PROFILING_MAX_PROFILES = 500
+
+# Bearer token Prometheus scrapes /metrics/ with (staff may use their
+# JWT instead), and how often each worker adds its counts to the store.
+METRICS_TOKEN = env("METRICS_TOKEN", default=None)
+METRICS_FLUSH_INTERVAL = 1.0
+
+# Queries taking at least this many milliseconds are logged with their
+# call site and summed up for manage.py slow_queries (0 turns this off).
+SLOW_QUERY_THRESHOLD = env.float("SLOW_QUERY_THRESHOLD", default=100.0)
+
+# Where manage.py build_schema writes the OpenAPI schema that the schema
+# view serves outside DEBUG.
+SCHEMA_ARTIFACT_DIR = env(
+    "SCHEMA_ARTIFACT_DIR", default=str(BASE_DIR / "build" / "schema")
+)
+
 AUTH_USER_MODEL = "user.User"
 
 
@@ -148,6 +240,51 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Let the front proxy send media files: nginx through an internal
+# location at this prefix (X-Accel-Redirect), Apache or lighttpd with
+# X-Sendfile. Files without a content hash or UUID in their name are
+# cached for MEDIA_CACHE_MAX_AGE seconds, the others for a year.
+MEDIA_ACCEL_REDIRECT_PREFIX = env("MEDIA_ACCEL_REDIRECT_PREFIX", default="")
+MEDIA_X_SENDFILE = env.bool("MEDIA_X_SENDFILE", default=False)
+MEDIA_CACHE_MAX_AGE = 3600
+
+# manage.py archive_sessions writes past show sessions here as gzipped
+# JSON Lines files.
+ARCHIVE_DIR = env("ARCHIVE_DIR", default=str(BASE_DIR / "archive"))
+
+# Paginated lists estimated by the query planner to hold more rows than
+# this are counted from the estimate instead of with COUNT(*).
+ESTIMATED_COUNT_THRESHOLD = env.int(
+    "ESTIMATED_COUNT_THRESHOLD", default=10000
+)
+
+# /api/batch/: GET requests per batch, and threads for concurrent ones.
+BATCH_MAX_REQUESTS = env.int("BATCH_MAX_REQUESTS", default=10)
+BATCH_MAX_CONCURRENCY = env.int("BATCH_MAX_CONCURRENCY", default=4)
+
+# Background jobs (see planetarium.jobs and the run_workers command)
+JOB_WORKER_CONCURRENCY = env.int("JOB_WORKER_CONCURRENCY", default=4)
+JOB_WORKER_MODE = env("JOB_WORKER_MODE", default="thread")
+JOB_POLL_INTERVAL = env.float("JOB_POLL_INTERVAL", default=1.0)
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BACKOFF = 10
+JOB_RETRY_BACKOFF_MAX = 3600
+JOB_LOCK_TIMEOUT = 15 * 60
+JOB_HEARTBEAT_INTERVAL = 60
+JOB_RETENTION = 7 * 24 * 3600
+
+# manage.py serve: gunicorn workers (0: two per CPU, plus one), "sync"
+# (threaded WSGI) or "async" (uvicorn ASGI) workers, and when a worker is
+# recycled (after a number of requests or above an RSS in MiB).
+SERVER_BIND = env("SERVER_BIND", default="0.0.0.0:8000")
+SERVER_WORKERS = env.int("SERVER_WORKERS", default=0)
+SERVER_WORKER_CLASS = env("SERVER_WORKER_CLASS", default="sync")
+SERVER_THREADS = env.int("SERVER_THREADS", default=4)
+SERVER_MAX_REQUESTS = env.int("SERVER_MAX_REQUESTS", default=5000)
+SERVER_MAX_RSS = env.int("SERVER_MAX_RSS", default=512)
+SERVER_TIMEOUT = env.int("SERVER_TIMEOUT", default=30)
+SERVER_GRACEFUL_TIMEOUT = env.int("SERVER_GRACEFUL_TIMEOUT", default=30)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings, runner
+
+from planetarium.metrics import registry
+from planetarium.store import get_store
+
+
+def clear_shared_store():
+    store = get_store()
+    with store.transaction() as connection:
+        tables = connection.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        ).fetchall()
+        for (table,) in tables:
+            connection.execute(f'DELETE FROM "{table}"')
+
+
+class ClearSharedStoreMixin:
+    """Start every test with an empty shared store and cache.
+
+    Cache versions start over with the store, so the values cached
+    under them must go too. Metrics recorded by earlier tests are
+    flushed first, so the flusher thread cannot add them to the next
+    test's store.
+    """
+
+    def startTest(self, test):
+        registry.flush()
+        clear_shared_store()
+        cache.clear()
+        super().startTest(test)
+
+
+class TextTestResult(ClearSharedStoreMixin, unittest.TextTestResult):
+    pass
+
+
+class DebugSQLTextTestResult(
+    ClearSharedStoreMixin, runner.DebugSQLTextTestResult
+):
+    pass
+
+
+class PDBDebugResult(ClearSharedStoreMixin, runner.PDBDebugResult):
+    pass
+
+
+class RemoteTestResult(ClearSharedStoreMixin, runner.RemoteTestResult):
+    pass
+
+
+class RemoteTestRunner(runner.RemoteTestRunner):
+    resultclass = RemoteTestResult
+
+
+def init_worker(counter, *args, **kwargs):
+    runner._init_worker(counter, *args, **kwargs)
+    # Workers run at the same time, so each gets a store of its own.
+    override_settings(
+        SHARED_STORE_PATH=os.path.join(
+            os.path.dirname(settings.SHARED_STORE_PATH),
+            f"store-{runner._worker_id}.sqlite3",
+        )
+    ).enable()
+
+
+class ParallelTestSuite(runner.ParallelTestSuite):
+    init_worker = init_worker
+    runner_class = RemoteTestRunner
+
+
+class TestRunner(runner.DiscoverRunner):
+    """Run the tests against a shared store of their own.
+
+    Throttle counters, admission queues and cache versions live in a
+    temporary directory removed after the run, and are cleared before
+    every test, so they neither leak between tests nor survive into the
+    next run.
+    """
+
+    parallel_test_suite = ParallelTestSuite
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.store_dir = tempfile.TemporaryDirectory()
+        self.store_settings = override_settings(
+            SHARED_STORE_PATH=os.path.join(
+                self.store_dir.name, "store.sqlite3"
+            )
+        )
+        self.store_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.store_settings.disable()
+        self.store_dir.cleanup()
+        super().teardown_test_environment(**kwargs)
+
+    def get_resultclass(self):
+        if self.debug_sql:
+            return DebugSQLTextTestResult
+        if self.pdb:
+            return PDBDebugResult
+        return TextTestResult
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'planetarium_system.settings')
 
 application = get_wsgi_application()
+
+from planetarium.startup import warm_up_in_background  # noqa: E402
+
+warm_up_in_background()
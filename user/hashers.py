@@ -0,0 +1,64 @@
+import base64
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.utils.encoding import force_bytes
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return this process's hashing pool, or ``None`` to hash inline."""
+    global _executor, _executor_pid
+
+    workers = settings.PASSWORD_HASHING_WORKERS
+    if workers <= 0:
+        return None
+
+    pid = os.getpid()
+    if _executor_pid != pid:
+        with _executor_lock:
+            if _executor_pid != pid:
+                # A pool inherited through fork() is unusable; start a
+                # fresh one in every worker process.
+                _executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                _executor_pid = pid
+    return _executor
+
+
+class PooledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 hasher that derives keys in a bounded process pool.
+
+    Produces the same ``pbkdf2_sha256`` hashes as Django's hasher, so
+    existing passwords keep working. Both ``set_password`` and
+    ``check_password`` go through ``encode``, so registration and login
+    burn CPU only in the pool and the number of cores that password
+    hashing can occupy is capped by ``PASSWORD_HASHING_WORKERS``.
+    """
+
+    def encode(self, password, salt, iterations=None):
+        executor = get_executor()
+        if executor is None:
+            return super().encode(password, salt, iterations)
+
+        self._check_encode_args(password, salt)
+        iterations = iterations or self.iterations
+        hash = executor.submit(
+            hashlib.pbkdf2_hmac,
+            self.digest().name,
+            force_bytes(password),
+            force_bytes(salt),
+            iterations,
+        ).result()
+        hash = base64.b64encode(hash).decode("ascii").strip()
+        return "%s$%d$%s$%s" % (self.algorithm, iterations, salt, hash)
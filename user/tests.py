@@ -1,9 +1,15 @@
-from django.test import TestCase
+from unittest import mock
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, identify_hasher
+from django.test import TestCase, SimpleTestCase
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
 
+from user import hashers
+from user.hashers import PooledPBKDF2PasswordHasher
+
 CREATE_USER_URL = reverse("user:create")
 TOKEN_URL = reverse("user:login")
 ME_URL = reverse("user:manage")
@@ -117,3 +123,93 @@ class PrivateUserApiTests(TestCase):
         self.user.refresh_from_db()
         self.assertTrue(self.user.check_password(payload['password']))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class PooledPasswordHasherTests(SimpleTestCase):
+
+    def test_matches_django_hasher(self):
+        pooled = PooledPBKDF2PasswordHasher()
+        encoded = pooled.encode('testpass123', 'somesalt', iterations=1000)
+
+        self.assertEqual(
+            encoded,
+            PBKDF2PasswordHasher().encode('testpass123', 'somesalt', 1000),
+        )
+        self.assertTrue(pooled.verify('testpass123', encoded))
+        self.assertFalse(pooled.verify('wrong', encoded))
+
+
+class PooledLoginTests(TestCase):
+
+    def test_login_checks_password_in_pool(self):
+        payload = {'email': 'test@example.com', 'password': 'testpass123'}
+        user = create_user(**payload)
+        executor = hashers.get_executor()
+
+        with mock.patch.object(
+            executor, 'submit', wraps=executor.submit
+        ) as submit:
+            response = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(submit.call_count, 1)
+        self.assertIsInstance(
+            identify_hasher(user.password), PooledPBKDF2PasswordHasher
+        )
+
+
+class AuthConcurrencyLimitTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_login_rejected_when_no_slots_left(self):
+        create_user(email='test@example.com', password='testpass123')
+        payload = {'email': 'test@example.com', 'password': 'testpass123'}
+
+        with self.settings(AUTH_CONCURRENCY_LIMIT=0):
+            response = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_slot_released_after_request(self):
+        payload = {'email': 'test@example.com', 'password': 'testpass123'}
+
+        with self.settings(AUTH_CONCURRENCY_LIMIT=1):
+            first = self.client.post(CREATE_USER_URL, payload)
+            second = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+
+    def test_password_change_is_limited(self):
+        user = create_user(email='test@example.com', password='testpass123')
+        self.client.force_authenticate(user)
+
+        with self.settings(AUTH_CONCURRENCY_LIMIT=0):
+            profile = self.client.get(ME_URL)
+            email_change = self.client.patch(
+                ME_URL, {'email': 'new@example.com'}
+            )
+            password_change = self.client.patch(
+                ME_URL, {'password': 'newpass123'}
+            )
+
+        self.assertEqual(profile.status_code, status.HTTP_200_OK)
+        self.assertEqual(email_change.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            password_change.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        user.refresh_from_db()
+        self.assertTrue(user.check_password('testpass123'))
+
+    def test_list_body_is_a_validation_error(self):
+        user = create_user(email='test@example.com', password='testpass123')
+        self.client.force_authenticate(user)
+
+        response = self.client.patch(ME_URL, ['password'], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,21 +1,73 @@
-from rest_framework import generics
-from rest_framework.permissions import IsAuthenticated
+from collections.abc import Mapping
+
+from django.conf import settings
+from rest_framework import generics, status
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from planetarium.store import SharedSemaphore
 from user.serializers import UserSerializer, AuthTokenSerializer
 
 
-class CreateUserView(generics.CreateAPIView):
+class AuthBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many sign-in requests, try again shortly."
+    default_code = "auth_busy"
+    wait = 1
+
+
+class AuthConcurrencyLimitMixin:
+    """Cap the number of password-hashing requests in flight on the host.
+
+    Requests over ``AUTH_CONCURRENCY_LIMIT`` are answered with 503 and
+    ``Retry-After`` instead of queueing behind the hashing pool, so a
+    burst of logins cannot tie up the workers that serve bookings.
+    Views whose requests do not all hash a password override
+    ``hashes_password``.
+    """
+
+    def hashes_password(self, request):
+        return True
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if not self.hashes_password(request):
+            return
+        semaphore = SharedSemaphore("auth", settings.AUTH_CONCURRENCY_LIMIT)
+        self.auth_lease = semaphore.acquire()
+        if self.auth_lease is None:
+            raise AuthBusy()
+        self.auth_semaphore = semaphore
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if getattr(self, "auth_lease", None):
+            self.auth_semaphore.release(self.auth_lease)
+            self.auth_lease = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class CreateUserView(AuthConcurrencyLimitMixin, generics.CreateAPIView):
     serializer_class = UserSerializer
 
 
-class CreateTokenView(TokenObtainPairView):
+class CreateTokenView(AuthConcurrencyLimitMixin, TokenObtainPairView):
     serializer_class = AuthTokenSerializer
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(
+    AuthConcurrencyLimitMixin, generics.RetrieveUpdateAPIView
+):
     serializer_class = UserSerializer
     permission_classes = (IsAuthenticated,)
 
+    def hashes_password(self, request):
+        # Other bodies are left for the serializer to reject.
+        return (
+            request.method not in SAFE_METHODS
+            and isinstance(request.data, Mapping)
+            and bool(request.data.get("password"))
+        )
+
     def get_object(self):
         return self.request.user